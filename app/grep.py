@@ -1,43 +1,141 @@
+r""" Library entry points: the same matching as the CLI, returning results
+instead of exiting, so callers don't need a process per line.
 
-from typing import Optional
+    import grep
+    pattern = grep.compile(r"\d+ms")
+    grep.match_many(pattern, ["took 12ms", "ok"])   # [0]
+    list(grep.filter(pattern, lines))              # matching lines
+"""
+from functools import lru_cache
+from typing import BinaryIO, Callable, Iterable, Iterator, Optional, TypeVar, Union
+import os
 import sys
 import logging
 
+from inp_parser.parse import EXIT_ERROR, RegexParser, compile_patterns
+from inp_parser.pattern import CompiledPattern
+from inp_parser.pattern_set import PatternSet
 from inp_parser.types import FilterKeyType
-from app.regex_definitions import match_single_char
-from app.regex_definitions import single_digit
-from app.regex_definitions import alpha_numeric
-from app.regex_definitions import positive_char_group as pcg
-from app.regex_definitions import negative_char_group as ncg
+from inp_reader.stream import WriteError
+from regex_definitions import match_single_char
+from regex_definitions import single_digit
+from regex_definitions import alpha_numeric
+from regex_definitions import positive_char_group as pcg
+from regex_definitions import negative_char_group as ncg
 
 logger = logging.getLogger(__name__)
 
-def grep(filter_key: FilterKeyType, input_line: str, search_pattern: Optional[str] = None) -> None:
+Pattern = Union[CompiledPattern, PatternSet]
+Line = Union[str, bytes, bytearray, memoryview]
+L = TypeVar("L", str, bytes, bytearray, memoryview)
 
+# Compiled patterns kept for callers passing pattern strings
+COMPILE_CACHE_SIZE = 256
+
+
+def grep(filter_key: FilterKeyType, input_line: str, search_pattern: Optional[str] = None) -> bool:
+    """ Whether `input_line` matches, using one standalone definition matcher.
+    """
     if filter_key == "digit":
-        if single_digit.match_any_digit(input_line):
-            exit(0)
- 
+        if single_digit.match_digit(input_line):
+            return True
+
     elif filter_key == "alpha_numeric":
         if alpha_numeric.match_alphanum(input_line):
-            exit(0)
+            return True
 
     elif filter_key == "single_char":
         # If not a digit pattern, treat as single char pattern
         if match_single_char.match_pattern(input_line, search_pattern):
-            exit(0)
+            return True
 
     elif filter_key in ("positive_char_group"):
         if pcg.match_char_group(input_line, search_pattern):
-            exit(0)
-    
+            return True
+
     elif filter_key in ("negative_char_group"):
         if ncg.match_neg_char_group(input_line, search_pattern):
-            exit(0)
+            return True
 
     else:
         raise RuntimeError(f"Unhandled filter key: {filter_key}")
 
     # if not matched
     logger.info(f"No match found :: {input_line=}, {search_pattern=}, {filter_key=}")
-    exit(1)
+    return False
+
+
+# ---------
+@lru_cache(maxsize=COMPILE_CACHE_SIZE)
+def compile(*patterns: str) -> Pattern:
+    """ One pattern, or several matched as `-e p1 -e p2` would be. Repeated
+    calls with the same patterns return the same object.
+    """
+    if not patterns:
+        raise ValueError("No pattern given")
+    return compile_patterns(list(patterns))
+
+
+def _compiled(pattern: Union[str, Pattern]) -> Pattern:
+    return compile(pattern) if isinstance(pattern, str) else pattern
+
+
+def _line_matcher(compiled: Pattern) -> Callable[[Line], bool]:
+    is_match, is_match_bytes = compiled.is_match, compiled.is_match_bytes
+    return lambda line: is_match(line) if isinstance(line, str) else is_match_bytes(line)
+
+
+def match_many(pattern: Union[str, Pattern], lines: Iterable[Line]) -> list[int]:
+    """ Indices of the matching lines, in order. Lines may be str or bytes.
+    """
+    matches = _line_matcher(_compiled(pattern))
+    return [index for index, line in enumerate(lines) if matches(line)]
+
+
+def match_mask(pattern: Union[str, Pattern], lines: Iterable[Line]) -> int:
+    """ `match_many` as a bitmask: bit i is set when line i matches.
+    """
+    # Bits are set in a bytearray and converted once; `mask |= 1 << index`
+    # would copy the whole int for every match
+    indexes = match_many(pattern, lines)
+    if not indexes:
+        return 0
+    bits = bytearray(indexes[-1] // 8 + 1)
+    for index in indexes:
+        bits[index >> 3] |= 1 << (index & 7)
+    return int.from_bytes(bits, "little")
+
+
+def filter(pattern: Union[str, Pattern], lines: Iterable[L]) -> Iterator[L]:
+    """ The matching lines, lazily, so `lines` may be a file or a generator.
+    """
+    matches = _line_matcher(_compiled(pattern))
+    return (line for line in lines if matches(line))
+
+
+def run(args: list[str], stream: Optional[BinaryIO] = None, out: Optional[BinaryIO] = None) -> int:
+    """ The CLI without exiting: `args` as in sys.argv, stdin and stdout by
+    default. Returns grep's exit status; a bad pattern or missing arguments
+    are reported on stderr with EXIT_ERROR, as grep does. So are write
+    errors, except that a reader closing the pipe early (`grep ... | head`)
+    ends the search quietly.
+    """
+    try:
+        return RegexParser().parse_stream(
+            args=args,
+            stream=sys.stdin.buffer if stream is None else stream,
+            out=sys.stdout.buffer if out is None else out,
+        )
+    except ValueError as e:
+        print(f"grep: {e}", file=sys.stderr)
+        return EXIT_ERROR
+    except WriteError as e:
+        if not isinstance(e.__cause__, BrokenPipeError):
+            print(f"grep: write error: {e}", file=sys.stderr)
+        if out is None:
+            # What's left in stdout's buffer can't be written either; without
+            # this the interpreter's flush at exit fails again
+            devnull = os.open(os.devnull, os.O_WRONLY)
+            os.dup2(devnull, sys.stdout.fileno())
+            os.close(devnull)
+        return EXIT_ERROR
@@ -0,0 +1,184 @@
+import logging
+import marshal
+import os
+import sys
+from array import array
+from typing import Optional
+
+from regex_definitions.char_class import CharClass
+from regex_engine.compiler import ENGINE_VERSION, Program
+
+from .pattern import CompiledPattern
+
+logger = logging.getLogger(__name__)
+
+CACHE_DIR_ENV_VAR = "GREP_CACHE_DIR"
+# "0", "off" or "false" turns the cache off
+CACHE_ENV_VAR = "GREP_CACHE"
+MAX_CACHE_BYTES = 4 << 20
+# Eviction trims the cache down to this share of MAX_CACHE_BYTES, so it doesn't run on every store
+EVICT_TO_FRACTION = 0.75
+SUFFIX = ".grepc"
+# Bumped whenever the layout of an entry changes
+CACHE_FORMAT = 2
+
+# marshal's format belongs to the interpreter, so it is part of the key too
+_FORMAT_TAG = f"{ENGINE_VERSION}:{CACHE_FORMAT}:{sys.implementation.cache_tag}"
+
+_FNV_OFFSET = 0xCBF29CE484222325
+_FNV_PRIME = 0x100000001B3
+_MASK_64 = (1 << 64) - 1
+
+
+def cache_enabled() -> bool:
+    return os.environ.get(CACHE_ENV_VAR, "").lower() not in ("0", "off", "false")
+
+
+def cache_dir() -> str:
+    """ $GREP_CACHE_DIR, else the XDG cache directory.
+    """
+    configured = os.environ.get(CACHE_DIR_ENV_VAR)
+    if configured:
+        return configured
+    base = os.environ.get("XDG_CACHE_HOME") or os.path.join(os.path.expanduser("~"), ".cache")
+    return os.path.join(base, "codecrafters-grep")
+
+
+def pattern_key(pattern: str) -> str:
+    """ 64-bit FNV-1a of the engine version and pattern text.
+
+    Only names the file; `load` checks the stored pattern, so a collision is
+    a miss, never a wrong program. hashlib would cost more to import than
+    most patterns take to compile.
+    """
+    digest = _FNV_OFFSET
+    for byte in f"{_FORMAT_TAG}\0{pattern}".encode("utf-8", "surrogatepass"):
+        digest = ((digest ^ byte) * _FNV_PRIME) & _MASK_64
+    return f"{digest:016x}"
+
+
+def _dump_program(program: Program) -> tuple:
+    return (
+        program.ops.tobytes(),
+        program.arg_x.tobytes(),
+        program.arg_y.tobytes(),
+        tuple(each.tables() for each in program.classes),
+        program.n_slots,
+    )
+
+
+def _dump(compiled: CompiledPattern) -> bytes:
+    return marshal.dumps((
+        _FORMAT_TAG,
+        compiled.pattern,
+        compiled.tokens,
+        compiled.required_literal,
+        _dump_program(compiled.program),
+        None if compiled.reverse_program is None else _dump_program(compiled.reverse_program),
+    ))
+
+
+def _array(typecode: str, raw: bytes) -> array:
+    loaded = array(typecode)
+    loaded.frombytes(raw)
+    return loaded
+
+
+def _load_program(ops: bytes, arg_x: bytes, arg_y: bytes, classes: tuple, n_slots: int) -> Program:
+    return Program(
+        ops=_array("B", ops),
+        arg_x=_array("i", arg_x),
+        arg_y=_array("i", arg_y),
+        classes=tuple(CharClass.from_tables(*each) for each in classes),
+        n_slots=n_slots,
+    )
+
+
+def _load(data: bytes, pattern: str) -> Optional[CompiledPattern]:
+    (format_tag, stored_pattern, tokens, literal, program, reverse_program) = marshal.loads(data)
+    if format_tag != _FORMAT_TAG or stored_pattern != pattern:
+        return None
+    return CompiledPattern.from_program(
+        pattern,
+        tokens,
+        _load_program(*program),
+        literal,
+        reverse_program=None if reverse_program is None else _load_program(*reverse_program),
+    )
+
+
+def load(pattern: str, directory: Optional[str] = None) -> Optional[CompiledPattern]:
+    """ The cached compilation of `pattern`, or None on a miss. Unreadable
+    or stale entries count as misses.
+    """
+    path = os.path.join(directory or cache_dir(), pattern_key(pattern) + SUFFIX)
+    try:
+        with open(path, "rb") as file_obj:
+            data = file_obj.read()
+    except OSError:
+        return None
+    try:
+        compiled = _load(data, pattern)
+    except (EOFError, ValueError, TypeError):
+        logger.debug(f"Ignoring corrupt cache entry :: {path=}")
+        compiled = None
+    if compiled is not None:
+        try:
+            # mtime doubles as the LRU clock
+            os.utime(path)
+        except OSError:
+            pass
+    return compiled
+
+
+def store(compiled: CompiledPattern, directory: Optional[str] = None, max_bytes: int = MAX_CACHE_BYTES) -> None:
+    """ Write `compiled` to the cache atomically, then evict the least
+    recently used entries if the cache is over `max_bytes`. Failures are
+    ignored: the cache is only an optimization.
+    """
+    directory = directory or cache_dir()
+    path = os.path.join(directory, pattern_key(compiled.pattern) + SUFFIX)
+    tmp_path = f"{path}.{os.getpid()}.tmp"
+    try:
+        os.makedirs(directory, exist_ok=True)
+        with open(tmp_path, "wb") as file_obj:
+            file_obj.write(_dump(compiled))
+        os.replace(tmp_path, path)
+        evict(directory, max_bytes)
+    except OSError as e:
+        logger.debug(f"Cannot write cache entry :: {path=} :: {e}")
+        try:
+            os.unlink(tmp_path)
+        except OSError:
+            pass
+
+
+def evict(directory: str, max_bytes: int = MAX_CACHE_BYTES) -> None:
+    entries = []
+    total = 0
+    with os.scandir(directory) as listing:
+        for entry in listing:
+            if entry.name.endswith(SUFFIX):
+                entry_stat = entry.stat()
+                entries.append((entry_stat.st_mtime_ns, entry_stat.st_size, entry.path))
+                total += entry_stat.st_size
+    if total <= max_bytes:
+        return
+    for _, size, path in sorted(entries):
+        if total <= max_bytes * EVICT_TO_FRACTION:
+            break
+        try:
+            os.unlink(path)
+            total -= size
+        except OSError:
+            pass
+
+
+def cached_compile(pattern: str, tokenize, directory: Optional[str] = None) -> CompiledPattern:
+    """ `pattern` from the cache, or compiled from `tokenize(pattern)` and stored.
+    """
+    compiled = load(pattern, directory)
+    if compiled is None:
+        compiled = CompiledPattern.from_tokens(pattern, tokenize(pattern))
+        store(compiled, directory)
+    return compiled
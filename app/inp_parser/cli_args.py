@@ -0,0 +1,108 @@
+import argparse
+import logging
+
+from .trace import trace_requested
+
+logger = logging.getLogger(__name__)
+
+HELP_WIDTH = 100
+# Take a pattern as their argument, besides the start-of-expression flags
+REGEXP_FLAGS = ["-e", "--regexp"]
+
+
+class _RaisingArgumentParser(argparse.ArgumentParser):
+    """ Surface bad command lines as ValueError, like the rest of the parser.
+    """
+    def error(self, message):
+        raise ValueError(message)
+
+
+def _fixed_width_formatter(prog: str) -> argparse.HelpFormatter:
+    # Without a width argparse imports shutil (and with it bz2/lzma) on every
+    # add_argument just to ask for the terminal size
+    return argparse.HelpFormatter(prog, width=HELP_WIDTH)
+
+
+def build_arg_parser(start_of_expr_flags: list[str]) -> argparse.ArgumentParser:
+    parser = _RaisingArgumentParser(prog="grep", add_help=False, formatter_class=_fixed_width_formatter)
+    parser.add_argument(*start_of_expr_flags, dest="pattern",
+                        help="Extended regular expression to search for")
+    parser.add_argument(*REGEXP_FLAGS, dest="regexps", action="append", default=[], metavar="PATTERN",
+                        help="Another pattern; lines matching any pattern are printed")
+    parser.add_argument("-f", "--file", dest="pattern_files", action="append", default=[], metavar="FILE",
+                        help="Read patterns from FILE, one per line")
+    parser.add_argument("-j", "--jobs", type=int, default=1,
+                        help="Search files in N worker processes")
+    parser.add_argument("-n", "--line-number", dest="line_numbers", action="store_true",
+                        help="Prefix each matching line with its 1-based line number")
+    parser.add_argument("-r", "--recursive", action="store_true",
+                        help="Search directories recursively, skipping symlinks below them")
+    parser.add_argument("-R", "--dereference-recursive", dest="dereference_recursive", action="store_true",
+                        help="Like -r, following every symlink")
+    parser.add_argument("--include", action="append", default=[], metavar="GLOB",
+                        help="With -r, only search files whose name matches GLOB")
+    parser.add_argument("--exclude", action="append", default=[], metavar="GLOB",
+                        help="With -r, skip files whose name matches GLOB")
+    parser.add_argument("--exclude-dir", dest="exclude_dirs", action="append", default=[], metavar="GLOB",
+                        help="With -r, skip directories whose name matches GLOB")
+    parser.add_argument("--trace", action="store_true",
+                        help="Print engine counters to stderr when done (also GREP_TRACE=1)")
+    parser.add_argument("--debug", action="store_true",
+                        help="Log debug output to stderr (also GREP_DEBUG=1)")
+    parser.add_argument("--profile", action="store_true",
+                        help="Write per-stage timings and instruction counts as JSON to stderr")
+    parser.add_argument("--profile-output", metavar="FILE",
+                        help="Like --profile, writing the JSON to FILE")
+    parser.add_argument("files", nargs="*",
+                        help="Files to search; stdin when omitted, '-' for stdin")
+    return parser
+
+
+def read_pattern_file(path: str) -> list[str]:
+    """ One pattern per line; an empty line is an empty pattern, which matches every line.
+    """
+    try:
+        with open(path, encoding="utf-8", errors="surrogateescape") as file_obj:
+            return file_obj.read().splitlines()
+    except OSError as e:
+        raise ValueError(f"{path}: {e.strerror}") from e
+
+
+def attach_patterns(args: list[str], pattern_flags: list[str]) -> list[str]:
+    """ `-E PATTERN` rewritten as `-E=PATTERN`, so the argument after a
+    pattern flag is the pattern even when it starts with '-' (`-E -x`), as
+    in grep; argparse would take it for an option. Nothing after `--` is
+    rewritten.
+    """
+    attached = []
+    index = 0
+    while index < len(args):
+        if args[index] == "--":
+            attached.extend(args[index:])
+            break
+        if args[index] in pattern_flags and index + 1 < len(args):
+            attached.append(f"{args[index]}={args[index + 1]}")
+            index += 2
+        else:
+            attached.append(args[index])
+            index += 1
+    return attached
+
+
+def parse_cli_args(args: list[str], start_of_expr_flags: list[str]) -> argparse.Namespace:
+    """ Parse `sys.argv[1:]` into grep options.
+    """
+    args = attach_patterns(args, start_of_expr_flags + REGEXP_FLAGS)
+    options = build_arg_parser(start_of_expr_flags).parse_args(args)
+    if options.pattern is None and not options.regexps and not options.pattern_files:
+        raise ValueError(f"No pattern given; use {' or '.join(start_of_expr_flags)}, -e or -f")
+    options.patterns = ([] if options.pattern is None else [options.pattern]) + options.regexps
+    for each_path in options.pattern_files:
+        options.patterns.extend(read_pattern_file(each_path))
+    if options.jobs < 1:
+        raise ValueError(f"Invalid number of jobs: {options.jobs}")
+    options.recursive = options.recursive or options.dereference_recursive
+    options.trace = trace_requested(options.trace)
+    options.profile = options.profile or options.profile_output is not None
+    logger.debug(f"Parsed CLI options :: {options=}")
+    return options
@@ -1,24 +1,36 @@
 
-import pyparsing as pp 
-from pyparsing import ParserElement, ParseException
 import logging
+import os
 import sys
+from contextlib import nullcontext
 from dataclasses import dataclass
+from functools import partial
+from time import perf_counter_ns
 
 
-from .types import FilterKeyType
-from typing import Optional
+from .cache import cache_enabled, load as load_cached, store as store_cached
+from .cli_args import parse_cli_args
+from .pattern import CompiledPattern
+from .pattern_set import PatternSet
+from .trace import TraceCounters, write_trace
+from typing import TYPE_CHECKING, BinaryIO, Iterable, Optional, Union
 
-from regex_definitions import (
-    alpha_numeric, 
-    positive_char_group as pcg, 
-    negative_char_group as ncg,
-    single_digit,
-    match_single_char as msc
-)
+from inp_reader.mapped_file import scan_file
+from inp_reader.stream import checked_output, line_writer, scan_stream
+from inp_reader.literal import buffer_searcher
+
+# Process pools, the directory walker and the profiler are imported where
+# they are used, so a plain `grep -E pat` doesn't pay for them at startup
+if TYPE_CHECKING:
+    from .profile import Profiler
 
 logger = logging.getLogger(__name__)
 
+# grep's exit statuses, returned rather than exited with so callers decide
+EXIT_MATCH = 0
+EXIT_NO_MATCH = 1
+EXIT_ERROR = 2
+
 
 class RegexDefinitiions:
     def __init__(self):
@@ -26,6 +38,7 @@ class RegexDefinitiions:
         self.meta_chars: list[str]=[
                 'w', "W",  # Any alphanumeric character
                 "d","D",  # Any digit,
+                "s","S",  # Any whitespace
                 "[^", # Negated character group
                 "[",  # Start of a character group class
                 ]
@@ -49,6 +62,15 @@ class RegexDefinitiions:
             ')', # End of group
         ]
 
+        self.back_references: list[str] = [
+                '1', '2', '3', '4', '5', '6', '7', '8', '9', # \1 to \9
+            ]
+
+        self.anchors: list[str] = [
+            '^', # Start of line
+            '$', # End of line
+        ]
+
 
 class RegexParser:
     
@@ -60,8 +82,18 @@ class RegexParser:
         self._matched_groups: dict[str, str] = {}
         self._final_match_state: bool = False
         self._args = None
-        self._regex_tokens: list[tuple[str]] = []
+        self._regex_tokens: list[tuple[str, str]] = []
         self._regex_defs = RegexDefinitiions()
+        self._compiled: Union[CompiledPattern, PatternSet, None] = None
+        self._options = None
+        self._files: list[str] = []
+        self._had_errors: bool = False
+        # Line matcher and prefilter literal handed to the scanners
+        self._matches = None
+        self._required: bytes = b""
+        self._searcher = None
+        self._trace: Optional[TraceCounters] = None
+        self._profile: Optional[Profiler] = None
     
     def __repr__(self):
         logger.debug(f"# ---- Regex Parser State ---- #")
@@ -69,24 +101,28 @@ class RegexParser:
         logger.debug(f"{self._regex_expr=}")
         logger.debug(f"{self._user_input=}")
         logger.debug(f"{self._matched_groups=}")
-        logger.debug(f"{self._match_state=}")
+        logger.debug(f"{self._final_match_state=}")
         logger.debug(f"{self._args=}")
+        return f"RegexParser({self._regex_expr!r})"
     
     # ---------
-    def parse(self, args: list[str], usr_input: str) -> None:
+    def parse(self, args: list[str], usr_input: str) -> bool:
+        """ Whether `usr_input` matches the pattern given in `args`.
+        """
         # Standard Lexical checks
         logger.info(f"Starting parsing with Lex checks...")
         self._args = args
         self._lex_checks()
-        self._regex_expr = args[2]
+        self._regex_expr = "\n".join(self._options.patterns)
         self._user_input = usr_input 
         logger.debug(f"DEBUG :: {self._regex_expr=}, {self._user_input=}")
 
-        # Tokenize the regex expression
-        logger.info(f"Starting regex tokenization...")
-        self._regex_tokens = self.parse_regex_tokens(self._regex_expr)
+        # Tokenize and compile the regex expression once
+        logger.info(f"Starting regex compilation...")
+        self._compiled = compile_patterns(self._options.patterns)
+        self._regex_tokens = list(self._compiled.tokens)
 
-        # Parse the input char by char
+        # Run the compiled pattern over the input
         logger.info(f"Starting regex matching...")
         self._parse_and_match_usr_inp_char_by_char()
 
@@ -95,22 +131,202 @@ class RegexParser:
         self._analyse_match_state()
         
         # Debug current state
-        self.__repr()
+        self.__repr__()
+        return self._final_match_state
+
+    def parse_stream(self, args: list[str], stream: BinaryIO, out: BinaryIO) -> int:
+        """ Line-oriented variant of `parse` over the FILE arguments, or over
+        `stream` when there are none. Matching lines are printed as soon as
+        they are found (prefixed with `filename:` when searching several
+        files). Returns grep's exit status: EXIT_MATCH if any line matched,
+        EXIT_NO_MATCH if none did, EXIT_ERROR on errors.
+        """
+        logger.info(f"Starting parsing with Lex checks...")
+        started_ns = perf_counter_ns()
+        self._args = args
+        self._lex_checks()
+        self._regex_expr = "\n".join(self._options.patterns)
+        if self._options.profile:
+            from .profile import Profiler
+            self._profile = Profiler(started_ns)
+            self._profile.add("lex_checks", perf_counter_ns() - started_ns)
+            stream = self._profile.count_bytes(stream)
+
+        logger.info(f"Starting regex compilation...")
+        if len(self._options.patterns) != 1:
+            with self._stage("compile"):
+                self._compiled = PatternSet.from_patterns(self._options.patterns, self.parse_regex_tokens)
+            self._regex_tokens = list(self._compiled.tokens)
+        elif cache_enabled():
+            with self._stage("cache"):
+                self._compiled = load_cached(self._regex_expr)
+        if self._compiled is None:
+            with self._stage("tokenize"):
+                self._regex_tokens = self.parse_regex_tokens(self._regex_expr)
+            with self._stage("compile"):
+                self._compiled = CompiledPattern.from_tokens(self._regex_expr, self._regex_tokens)
+            if cache_enabled():
+                with self._stage("cache"):
+                    store_cached(self._compiled)
+        else:
+            self._regex_tokens = list(self._compiled.tokens)
+
+        self._matches = self._compiled.is_match_bytes
+        self._required = self._compiled.required_bytes
+        if self._profile is not None:
+            self._matches = self._profile.sampling_matcher(self._compiled)
+        if self._options.trace:
+            self._start_trace()
+        else:
+            # Bypasses the matcher, so not while tracing it. A profile keeps it,
+            # to time the engine a normal run uses, and reports how much it took
+            self._searcher = buffer_searcher(self._compiled)
+            if self._profile is not None:
+                self._searcher = self._profile.counting_searcher(self._searcher)
+
+        with self._stage("scan"):
+            n_matched = self._scan(stream, out)
+
+        self._final_match_state = n_matched > 0
+        logger.info(f"Matched {n_matched} lines")
+        checked_output(out.flush)()
+        if self._trace is not None:
+            write_trace(self._trace, sys.stderr)
+        if self._profile is not None:
+            self._profile.write(self._regex_expr, self._options.profile_output)
+        if self._had_errors:
+            return EXIT_ERROR
+        return self._analyse_match_state()
+
+    def _scan(self, stream: BinaryIO, out: BinaryIO) -> int:
+        """ Search stdin, the FILE arguments or the tree under them; returns
+        the number of matching lines.
+        """
+        logger.info(f"Starting streaming regex matching...")
+        if self._options.recursive:
+            from inp_reader.walker import walk_files
+            return self._scan_files(
+                walk_files(
+                    self._files or ["."],
+                    follow_symlinks=self._options.dereference_recursive,
+                    include=self._options.include,
+                    exclude=self._options.exclude,
+                    exclude_dirs=self._options.exclude_dirs,
+                    on_error=self._report_file_error,
+                ),
+                stream,
+                out,
+                with_prefix=True,
+            )
+        elif not self._files:
+            return scan_stream(
+                stream,
+                self._matches,
+                self._line_writer(out),
+                flush=checked_output(out.flush),
+                required=self._required,
+                searcher=self._searcher,
+            )
+        elif self._options.jobs > 1 and len(self._files) == 1 and self._files[0] != "-":
+            return self._scan_one_file(self._files[0], stream, out, split_jobs=self._options.jobs)
+        else:
+            return self._scan_files(self._files, stream, out, with_prefix=len(self._files) > 1)
+
+    def _stage(self, name: str):
+        return nullcontext() if self._profile is None else self._profile.stage(name)
+
+    def _line_writer(self, out: BinaryIO, prefix: bytes = b""):
+        emit = line_writer(out, prefix, self._options.line_numbers)
+        return emit if self._profile is None else self._profile.timed_emitter(emit)
+
+    def _start_trace(self) -> None:
+        """ Swap in the counting matcher. Counters can't cross process
+        boundaries, so a traced run searches in this process only.
+        """
+        program = self._compiled.program
+        self._trace = TraceCounters(
+            pattern_tokens=len(self._compiled.tokens),
+            program_instructions=0 if program is None else len(program),
+        )
+        self._matches = partial(self._compiled.is_match_bytes_traced, counters=self._trace)
+        # The traced matcher applies the literal itself so rejected lines are counted
+        self._required = b""
+        self._options.jobs = 1
+
+    def _scan_files(self, paths: Iterable[str], stream: BinaryIO, out: BinaryIO, with_prefix: bool) -> int:
+        if self._profile is not None:
+            paths = self._profile.count_files(paths)
+        if self._options.jobs > 1 and "-" not in self._files:
+            from inp_reader.parallel import search_files_parallel
+            return search_files_parallel(
+                self._compiled,
+                paths,
+                self._options.jobs,
+                out,
+                with_prefix=with_prefix,
+                on_error=self._report_file_error,
+                line_numbers=self._options.line_numbers,
+            )
+        n_matched = 0
+        for each_file in paths:
+            n_matched += self._scan_one_file(each_file, stream, out, with_prefix=with_prefix)
+        return n_matched
+
+    def _scan_one_file(
+        self,
+        path: str,
+        stream: BinaryIO,
+        out: BinaryIO,
+        with_prefix: bool = False,
+        split_jobs: int = 1,
+    ) -> int:
+        prefix = path.encode("utf-8", "surrogateescape") + b":" if with_prefix else b""
+        emit = self._line_writer(out, prefix)
+        try:
+            if path == "-":
+                return scan_stream(
+                    stream,
+                    self._matches,
+                    emit,
+                    flush=checked_output(out.flush),
+                    required=self._required,
+                    searcher=self._searcher,
+                )
+            if split_jobs > 1:
+                from inp_reader.parallel import search_file_chunks_parallel
+                if self._profile is not None:
+                    self._profile.bytes_scanned += os.path.getsize(path)
+                return search_file_chunks_parallel(
+                    self._compiled, path, split_jobs, out, prefix, self._options.line_numbers
+                )
+            return scan_file(path, self._matches, emit, required=self._required, searcher=self._searcher)
+        except OSError as e:
+            logger.debug(f"Cannot read {path=} :: {e}")
+            checked_output(out.flush)()
+            self._report_file_error(path, e.strerror)
+            return 0
+
+    def _report_file_error(self, path: str, message: str) -> None:
+        self._had_errors = True
+        print(f"grep: {path}: {message}", file=sys.stderr)
 
     # ---------
     def _lex_checks(self) -> None:
         if len(self._args) < 3:
             raise ValueError("Not enough arguments")
-        
-        if self._args[1] not in self._regex_defs.start_of_expr_flags:
-            raise ValueError(f"Invalid flag {self._args[1]}. Expected one of {self._regex_defs.start_of_expr_flags}")
+
+        self._options = parse_cli_args(self._args[1:], self._regex_defs.start_of_expr_flags)
+        self._files = self._options.files
 
         logger.debug(f"Lexical checks passed :: {self._args=}")
 
-    def parse_regex_tokens(self, regex_expr):
+    def parse_regex_tokens(self, regex_expr: str) -> list[tuple[str, str]]:
         """
         Parses a simple regex string to identify metacharacters (flags/special sequences) 
         and literal characters, primarily handling the backslash escape.
+
+        Tokens are immutable `(token_type, value)` pairs; match state lives in
+        the compiled pattern, never in the token list.
         """
         logger.info(f"Starting regex token parsing...")
         tokens = []
@@ -126,34 +342,48 @@ class RegexParser:
                     next_char = regex_expr[i]
 
                     # Check for common metacharacter sequences (flags)
-                    # This list should be extensive in a real parser, e.g., \s, \w, \b, etc.
                     if next_char in self._regex_defs.meta_chars:
-                        tokens.append(['METACHAR', '\\' + next_char, False])  # False indicates not yet matched
-
-                    # Check for escaped special characters (literal versions of metachars)
-                    # E.g., \* becomes a literal *, not a quantifier. In this case, \d 
-                    # is classified above, but if the regex was \*, it would be treated differently.
-                    # For this specific example, all '\' + char are classified as METACHAR
-                    # since we only check \d. A real parser would have a full list.
-                    # For simplicity in this case, we treat \d as METACHAR:
+                        tokens.append(('METACHAR', '\\' + next_char))
+
+                    # \1 to \9 refer back to the text a group captured
+                    elif next_char in self._regex_defs.back_references:
+                        tokens.append(('BACKREF', next_char))
+
+                    # Escaped special characters are literal versions of metachars,
+                    # e.g. \* is a literal *, not a quantifier.
                     else:
-                        tokens.append(['METACHAR', '\\' + next_char, False])
+                        tokens.append(('LITERAL', next_char))
                 else:
                     # Backslash at the very end of the string is usually an error
-                    tokens.append(['ERROR', '\\', False])
+                    tokens.append(('ERROR', '\\'))
+
+            elif char == '[':
+                # A character group is kept whole, e.g. `[abc]` or `[^a-z]`
+                group_end = self._find_char_group_end(regex_expr, i)
+                if group_end is None:
+                    tokens.append(('ERROR', regex_expr[i:]))
+                    break
+                tokens.append(('MATCH_ANY_GROUP', regex_expr[i:group_end + 1]))
+                i = group_end
+
+            elif char == '{' and self._counted_repeat_end(regex_expr, i, tokens) is not None:
+                # `{m}`, `{m,}` or `{m,n}` after an atom; any other `{` is literal
+                repeat_end = self._counted_repeat_end(regex_expr, i, tokens)
+                tokens.append(('OPERATOR', regex_expr[i:repeat_end + 1]))
+                i = repeat_end
 
             elif char in self._regex_defs.operators:
                 # 2. Other Metacharacters (operators/quantifiers/anchors)
-                tokens.append(['OPERATOR', char, False])
-
-            elif char in self._regex_defs.match_any_in_group:
-                tokens.append(['MATCH_ANY_GROUP', char, False])
+                tokens.append(('OPERATOR', char))
 
             elif char in self._regex_defs.match_all_in_group:
-                tokens.append(['MATCH_ALL_GROUP', char, False])
+                tokens.append(('MATCH_ALL_GROUP', char))
+
+            elif char in self._regex_defs.anchors:
+                tokens.append(('ANCHOR', char))
             else:
                 # 3. Literal Character (everything else)
-                tokens.append(['LITERAL', char, False])
+                tokens.append(('LITERAL', char))
 
             i += 1
         
@@ -161,134 +391,71 @@ class RegexParser:
         logger.info(f"Completed regex token parsing.")
 
         return tokens
+
+    @staticmethod
+    def _counted_repeat_end(regex_expr: str, start: int, tokens: list[tuple[str, str]]) -> Optional[int]:
+        """ Index of the `}` closing a counted repetition opened at `start`,
+        or None when the brace is a literal one.
+        """
+        if not tokens or tokens[-1] in (('MATCH_ALL_GROUP', '('), ('OPERATOR', '|')):
+            return None
+        end = regex_expr.find('}', start)
+        if end < 0:
+            return None
+        low, _, high = regex_expr[start + 1:end].partition(',')
+        if not (low.isascii() and low.isdigit()) or (high and not (high.isascii() and high.isdigit())):
+            return None
+        return end
+
+    @staticmethod
+    def _find_char_group_end(regex_expr: str, start: int) -> Optional[int]:
+        """ Index of the `]` closing the character group opened at `start`.
+        """
+        i = start + 1
+        if i < len(regex_expr) and regex_expr[i] == '^':
+            i += 1
+        while i < len(regex_expr):
+            if regex_expr[i] == '\\':
+                i += 2
+                continue
+            if regex_expr[i] == ']':
+                return i
+            i += 1
+        return None
+
     # ---------
     def _parse_and_match_usr_inp_char_by_char(self) -> None:
         """
         In regex Matching the regex pattern is supposed to be sub-string of the input line.
         """
-        # To be used to match substring, to maintain match streak
-        _match_substring = self._user_input[::]
-        
-        for i in range(0, len(self._regex_tokens)):
-            each_regex_token = self._regex_tokens[i] 
-            
-            match_start_index: int = 0
-            first_match_index: Optional[int] = None
-            match_end_index: Optional[int] = None
-            
-            _break_match_loop: bool = False  # When regex match streak breaks
-
-            
-            if _break_match_loop:   
-                break
-            
-            
-            for j in range(match_start_index,len(_match_substring)): 
-                match_found: bool = False  # reset for each matching attempt
-                each_input_char = _match_substring[j]
-
-                logger.debug(f"Attempting to match token {each_regex_token} with {each_input_char}")
-
-                match_found = self._match(each_regex_token, each_input_char)
-                logger.debug(f"# ------ {match_found=}")
-                
-                # Updating the state of each regex token match
-                self._regex_tokens[i][-1]=match_found
-
-                if match_found:
-                    first_match_index = j if first_match_index is None else first_match_index
-                    match_start_index = j+1  # Next match has to start from next char of user input
-                    _match_substring = _match_substring[j+1::]
-                    break  # No need to check further input characters for this token
-                else:
-                    # do nothing, keep looking for a match with next regex token
-                    if first_match_index is None:
-                        # First match still not found
-                        pass
-                    elif first_match_index is not None:
-                        # If we had a previous match but current char didn't match, we can break
-                        _break_match_loop = True
-                        logger.warning(f"Breaking out of match loop as no further match possible for token: {each_regex_token=}")
-                        break
-                    else:
-                        # Wait for first match to happen
-                        pass
-            
-    # ---------
-    def _match(self, regex_token: tuple[str], input_char: str) -> bool:
-        _match_found: bool = False
-
-        if regex_token[0] == "METACHAR":
-            _match_found: bool = self._metachar_matching(regex_token, input_char)
-        
-        elif regex_token[0] == "LITERAL":
-            _match_found: bool = self._literal_matching(regex_token, input_char)
-        else:
-            raise RuntimeError(f"Unhandled token type: {regex_token[0]}")
-        
-        return _match_found
-    
-    def _metachar_matching(self, regex_token: tuple[str], input_char: str) -> bool:
-        _match_found: bool = False
-
-        if regex_token[1] == r"\d":
-            _match_found = single_digit.match_digit(input_char)
-                    
-        elif regex_token[1] == r"\w":
-            _match_found =  alpha_numeric.match_alphanum(input_char)
-                
-        else:
-            raise RuntimeError(f"Unhandled metacharacter: {regex_token[1]}")
-        
-        return _match_found
-    
-    def _group_matching(self, regex_token: tuple[str], input_char: str) -> None:
-        if regex_token[0] == "MATCH_ANY_GROUP":
-            if regex_token[1] == "[]":
-                # Positive character group matching
-                if pcg.match_char_group(input_char, regex_token[1]):
-                    _match_found = True
-                    logger.debug(f"Matched POSITIVE CHAR GROUP pattern :: {input_char=}")
-                # else:
-                #     self._match_state = False
-                #     logger.debug(f"DEBUG :: No match for POSITIVE CHAR GROUP pattern :: {input_char=}")
-            elif regex_token[1] == "[^]":
-                # Negative character group matching
-                if ncg.match_neg_char_group(input_char, regex_token[1]):
-                    _match_found = True
-                    logger.debug(f"Matched NEGATIVE CHAR GROUP pattern :: {input_char=}")
-                # else:
-                #     self._match_state = False
-                #     logger.debug(f"DEBUG :: No match for NEGATIVE CHAR GROUP pattern :: {input_char=}")
-            else:
-                raise RuntimeError(f"Unhandled group type: {regex_token[1]}")
-
-    def _literal_matching(self, regex_token: tuple[str], input_char: str) -> bool:
-        _match_found: bool = False
+        self._final_match_state = self._compiled.is_match(self._user_input)
+        # Group spans are only worked out for a line that matched
+        if self._final_match_state and isinstance(self._compiled, CompiledPattern):
+            found = self._compiled.search(self._user_input)
+            self._matched_groups = {
+                str(number): text for number, text in enumerate(found.groups(), 1) if text is not None
+            }
 
-        if regex_token[1] == input_char:
-            _match_found = True
-            logger.debug(f"Matched LITERAL pattern :: {regex_token[1]} with {input_char=}")
-        # else:
-        #     self._match_state = False
-        #     logger.debug(f"DEBUG :: No match for LITERAL pattern :: {input_char=}")
-        
-        return _match_found
     # ---------
-    def _analyse_match_state(self) -> None:
-        logger.debug(f"{self._regex_tokens=}")
-        for each_token in self._regex_tokens:
-            if each_token[-1] is False:
-                logger.info(f"Match failed for : {each_token=}")
-                exit(1)
-        logger.info(f"All tokens matched successfully!")
-        exit(0)
-    
-    
-        
-
-        
-
-
-
-
+    def _analyse_match_state(self) -> int:
+        logger.debug(f"{self._final_match_state=}")
+        if not self._final_match_state:
+            logger.info(f"Match failed for : {self._regex_expr=}")
+            return EXIT_NO_MATCH
+        logger.info(f"Pattern matched successfully!")
+        return EXIT_MATCH
+
+
+def compile(regex_expr: str) -> CompiledPattern:
+    """ Tokenize `regex_expr` once into a reusable `CompiledPattern`.
+    """
+    tokens = RegexParser().parse_regex_tokens(regex_expr)
+    return CompiledPattern.from_tokens(regex_expr, tokens)
+
+
+def compile_patterns(patterns: list[str]) -> Union[CompiledPattern, PatternSet]:
+    """ `compile` for one pattern, a `PatternSet` for any other number.
+    """
+    if len(patterns) == 1:
+        return compile(patterns[0])
+    return PatternSet.from_patterns(patterns, RegexParser().parse_regex_tokens)
@@ -0,0 +1,293 @@
+import logging
+from dataclasses import dataclass, field
+from functools import cached_property
+from typing import TYPE_CHECKING, Iterator, Optional, Sequence, Union
+
+from regex_engine.backtrack import Backtracker
+from regex_engine.compiler import Program, compile_tokens
+from regex_engine.lazy_dfa import LazyDFA
+from regex_engine.prefilter import anchored_prefix, anchored_suffix, required_literal
+from regex_engine.pike_vm import Slots, pike_search, to_code_points
+
+if TYPE_CHECKING:
+    from .trace import TraceCounters
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass(frozen=True)
+class Match:
+    """ A single match of a `CompiledPattern` inside `string`.
+    """
+    string: str
+    start: int
+    end: int
+    # Start and end of each group, in pairs from the whole match (group 0);
+    # -1 for a group that took no part in the match
+    slots: Slots = ()
+
+    def group(self, index: int = 0) -> Optional[str]:
+        start, end = self.span(index)
+        return None if start < 0 else self.string[start:end]
+
+    def groups(self) -> tuple[Optional[str], ...]:
+        return tuple(self.group(each) for each in range(1, len(self.slots) // 2))
+
+    def span(self, index: int = 0) -> tuple[int, int]:
+        if index == 0:
+            return self.start, self.end
+        if not 0 < index < len(self.slots) // 2:
+            raise IndexError(f"No such group: {index}")
+        return self.slots[2 * index], self.slots[2 * index + 1]
+
+
+@dataclass(frozen=True)
+class CompiledPattern:
+    """ Immutable result of compiling a regex once.
+
+    It holds no per-match state, so the same object can be run against any
+    number of input lines.
+    """
+    pattern: str
+    tokens: tuple[tuple[str, str], ...]
+    program: Program
+    # Substring every match contains; lines without it are rejected by `str.find`
+    # (or `bytes.find` over whole buffers) before the engine runs
+    required_literal: str
+    required_bytes: bytes
+    # Literal every matching line starts (`^...`) or ends (`...$`) with, checked
+    # with startswith/endswith first; None when the pattern isn't anchored there
+    prefix: Optional[str]
+    suffix: Optional[str]
+    prefix_bytes: Optional[bytes]
+    suffix_bytes: Optional[bytes]
+    # Every token is a LITERAL, apart from the anchors: a line matches exactly
+    # when it contains (starts with, ends with, equals) `required_literal`,
+    # and the engine never runs
+    literal_only: bool
+    # Capturing groups, and whether \1 to \9 refer back to any. `program` has
+    # neither: it only decides match/no-match (for a backreference, a superset
+    # of it), and `capture_program` runs on the lines it accepts
+    n_groups: int
+    backreferences: bool
+    # Match/no-match caches; the only mutable part, and never part of a result.
+    # `_byte_dfa` reads UTF-8 directly, so bytes input is never decoded
+    _dfa: LazyDFA = field(repr=False, compare=False)
+    _byte_dfa: LazyDFA = field(repr=False, compare=False)
+    # For patterns anchored only at the end: the reversed pattern, run as a
+    # DFA from the end of the line so it stops a few characters in
+    reverse_program: Optional[Program] = field(default=None, repr=False, compare=False)
+    _reverse_dfa: Optional[LazyDFA] = field(default=None, repr=False, compare=False)
+    # The same over raw bytes, for ASCII line endings
+    _reverse_byte_dfa: Optional[LazyDFA] = field(default=None, repr=False, compare=False)
+
+    @classmethod
+    def from_tokens(cls, pattern: str, tokens: list[tuple[str, str]]) -> "CompiledPattern":
+        program = compile_tokens(tokens)
+        literal = required_literal(tokens)
+        logger.debug(f"Compiled pattern :: {pattern=}, {len(program)=}, {literal=}")
+        return cls.from_program(pattern, tokens, program, literal)
+
+    @classmethod
+    def from_program(
+        cls,
+        pattern: str,
+        tokens: Sequence[tuple[str, str]],
+        program: Program,
+        literal: str,
+        reverse_program: Optional[Program] = None,
+    ) -> "CompiledPattern":
+        """ Wrap an already compiled `program`, e.g. one loaded from the cache.
+        `reverse_program` is compiled here when the pattern needs one and the
+        caller has none.
+        """
+        body = list(tokens)
+        if body[:1] == [("ANCHOR", "^")]:
+            body = body[1:]
+        if body[-1:] == [("ANCHOR", "$")]:
+            body = body[:-1]
+        prefix, suffix = anchored_prefix(tokens), anchored_suffix(tokens)
+        literal_only = (
+            bool(body)
+            and all(token_type == "LITERAL" for token_type, _ in body)
+            # Lines never contain a newline, so such a pattern goes through the engine
+            and "\n" not in literal
+        )
+        if suffix is None or prefix is not None or literal_only:
+            reverse_program = None
+        elif reverse_program is None:
+            reverse_program = compile_tokens(list(tokens), reverse=True)
+        return cls(
+            pattern=pattern,
+            tokens=tuple(tokens),
+            program=program,
+            required_literal=literal,
+            required_bytes=literal.encode("utf-8", "surrogateescape"),
+            prefix=prefix,
+            suffix=suffix,
+            prefix_bytes=None if prefix is None else prefix.encode("utf-8", "surrogateescape"),
+            suffix_bytes=None if suffix is None else suffix.encode("utf-8", "surrogateescape"),
+            literal_only=literal_only,
+            n_groups=sum(1 for token in tokens if token == ("MATCH_ALL_GROUP", "(")),
+            backreferences=any(token_type == "BACKREF" for token_type, _ in tokens),
+            _dfa=LazyDFA(program),
+            _byte_dfa=LazyDFA(program, utf8=True),
+            reverse_program=reverse_program,
+            _reverse_dfa=None if reverse_program is None else LazyDFA(reverse_program),
+            _reverse_byte_dfa=None if reverse_program is None else LazyDFA(reverse_program, utf8=True, reverse=True),
+        )
+
+    @cached_property
+    def capture_program(self) -> Program:
+        """ `program` with group slots and backreferences, compiled on first
+        use since only matching lines need it.
+        """
+        if not self.n_groups:
+            return self.program
+        return compile_tokens(list(self.tokens), captures=True)
+
+    @cached_property
+    def _backtracker(self) -> Backtracker:
+        return Backtracker(self.capture_program)
+
+    # ---------
+    def is_match(self, line: str) -> bool:
+        """ Whether `line` contains a match, without computing where.
+        """
+        if self.literal_only:
+            return self._matches_literal(line, self.required_literal)
+        if not self._anchors_hold(line, self.prefix, self.suffix):
+            return False
+        if self.required_literal and self.required_literal not in line:
+            return False
+        codes = to_code_points(line)
+        found = self._dfa_match(codes)
+        if found is None:
+            found = pike_search(self.program, codes, anchored=self.prefix is not None) is not None
+        if found and self.backreferences:
+            found = self._captures(codes, 0, anchored=self.prefix is not None) is not None
+        return found
+
+    def is_match_bytes(self, line: Union[bytes, memoryview]) -> bool:
+        """ `is_match` for raw UTF-8 input, read as "surrogateescape" decodes
+        it. The byte DFA runs on the bytes themselves; the line is only
+        decoded to reverse a non-ASCII line, after the DFA thrashes, or to
+        check backreferences on a line that passed. A memoryview (as the
+        mmap and buffer scanners hand over) is read in place, not copied.
+        """
+        if not self._edges_hold(line, self.prefix_bytes, self.suffix_bytes):
+            return False
+        if self.literal_only:
+            if self.prefix is not None:
+                # Anchored at both ends, the line is the literal itself
+                return self.suffix is None or len(line) == len(self.required_bytes)
+            if self.suffix is not None:
+                return True
+            # memoryview has no substring search; the buffer scanners use
+            # LiteralSearcher for these patterns instead
+            return self.required_bytes in (line if isinstance(line, bytes) else bytes(line))
+        # Over a memoryview the scanners have already found the literal in the buffer
+        if self.required_bytes and isinstance(line, bytes) and self.required_bytes not in line:
+            return False
+        if self._reverse_byte_dfa is None:
+            found = self._byte_dfa.is_match(line)
+        elif line and line[-1] >= 0x80:
+            # Would give up on the first byte
+            found = None
+        else:
+            found = self._reverse_byte_dfa.is_match(reversed(line))
+        if found is False or (found and not self.backreferences):
+            return found
+        return self.is_match(str(line, "utf-8", "surrogateescape"))
+
+    def is_match_bytes_traced(self, line: Union[bytes, memoryview], counters: "TraceCounters") -> bool:
+        """ `is_match_bytes` that records what each stage did in `counters`.
+        Only used with --trace, so the plain path pays nothing for it.
+        """
+        counters.lines_read += 1
+        text = str(line, "utf-8", "surrogateescape")
+        if not self._anchors_hold(text, self.prefix, self.suffix) or (
+            self.required_literal and self.required_literal not in text
+        ):
+            counters.prefilter_rejected += 1
+            return False
+        counters.lines_tested += 1
+        counters.chars_scanned += len(text)
+        codes = to_code_points(text)
+        found = self._dfa_match(codes)
+        if found is None:
+            counters.vm_fallbacks += 1
+            found = pike_search(self.program, codes, anchored=self.prefix is not None) is not None
+        if found and self.backreferences:
+            found = self._captures(codes, 0, anchored=self.prefix is not None) is not None
+        counters.lines_matched += found
+        dfa = self._dfa if self._reverse_dfa is None else self._reverse_dfa
+        counters.dfa_states = dfa.n_states
+        counters.dfa_flushes = dfa.flushes
+        return found
+
+    def match(self, line: str, pos: int = 0) -> Optional[Match]:
+        """ Match anchored at `pos`.
+        """
+        return self._run(line, to_code_points(line), pos, anchored=True)
+
+    def search(self, line: str, pos: int = 0) -> Optional[Match]:
+        """ Leftmost match starting at or after `pos`.
+        """
+        if self.required_literal and line.find(self.required_literal, pos) < 0:
+            return None
+        return self._run(line, to_code_points(line), pos, anchored=False)
+
+    def finditer(self, line: str) -> Iterator[Match]:
+        """ All non-overlapping matches, left to right.
+        """
+        codes = to_code_points(line)
+        pos = 0
+        while pos <= len(line):
+            found = self._run(line, codes, pos, anchored=False)
+            if found is None:
+                return
+            yield found
+            # An empty match must still make progress
+            pos = found.end if found.end > found.start else found.end + 1
+
+    # ---------
+    def _dfa_match(self, codes: Sequence[int]) -> Optional[bool]:
+        if self._reverse_dfa is not None:
+            return self._reverse_dfa.is_match(codes[::-1])
+        return self._dfa.is_match(codes)
+
+    @staticmethod
+    def _anchors_hold(line, prefix, suffix) -> bool:
+        """ The startswith/endswith checks, on str or bytes.
+        """
+        return (prefix is None or line.startswith(prefix)) and (suffix is None or line.endswith(suffix))
+
+    @staticmethod
+    def _edges_hold(line, prefix, suffix) -> bool:
+        """ `_anchors_hold` for bytes or a memoryview, which has no startswith.
+        """
+        if prefix is not None and line[:len(prefix)] != prefix:
+            return False
+        return suffix is None or (len(line) >= len(suffix) and line[len(line) - len(suffix):] == suffix)
+
+    def _matches_literal(self, line, literal) -> bool:
+        """ The whole test for a `literal_only` pattern, on str or bytes.
+        """
+        if self.prefix is None:
+            return line.endswith(literal) if self.suffix is not None else literal in line
+        return line == literal if self.suffix is not None else line.startswith(literal)
+
+    def _captures(self, codes: Sequence[int], pos: int, anchored: bool) -> Optional[Slots]:
+        if self.backreferences:
+            return self._backtracker.search(codes, pos, anchored)
+        return pike_search(self.capture_program, codes, pos, anchored)
+
+    def _run(self, line: str, codes: Sequence[int], pos: int, anchored: bool) -> Optional[Match]:
+        # Capture-free rejection first, so tracking groups costs only on hits
+        if pos == 0 and self._dfa_match(codes) is False:
+            return None
+        slots = self._captures(codes, pos, anchored)
+        if slots is None:
+            return None
+        return Match(line, slots[0], slots[1], slots)
@@ -0,0 +1,113 @@
+import logging
+from dataclasses import dataclass
+from typing import TYPE_CHECKING, Callable, Optional, Sequence, Union
+
+from regex_engine.aho_corasick import AhoCorasick
+
+from .pattern import CompiledPattern
+
+if TYPE_CHECKING:
+    from .trace import TraceCounters
+
+logger = logging.getLogger(__name__)
+
+Tokens = list[tuple[str, str]]
+
+
+def _alternation(token_lists: Sequence[Tokens]) -> Tokens:
+    """ `(a)|(b)|...` at token level, so no pattern has to be re-escaped.
+
+    The wrapping groups shift group numbers, so each pattern's
+    backreferences are renumbered to keep naming its own groups.
+    """
+    combined: Tokens = []
+    groups_before = 0
+    for index, tokens in enumerate(token_lists):
+        if index:
+            combined.append(("OPERATOR", "|"))
+        combined.append(("MATCH_ALL_GROUP", "("))
+        groups_before += 1
+        combined.extend(
+            (token_type, str(int(value) + groups_before)) if token_type == "BACKREF" else (token_type, value)
+            for token_type, value in tokens
+        )
+        groups_before += sum(1 for token in tokens if token == ("MATCH_ALL_GROUP", "("))
+        combined.append(("MATCH_ALL_GROUP", ")"))
+    return combined
+
+
+@dataclass(frozen=True)
+class PatternSet:
+    """ Several patterns (-e/-f) matched in one pass over each line.
+
+    Patterns made only of LITERAL tokens go into one Aho-Corasick automaton;
+    the rest are compiled into a single alternation. A line matches when
+    either does. Offers the line-matching side of `CompiledPattern`, so the
+    scanners and worker processes take either.
+    """
+    patterns: tuple[str, ...]
+    literals: Optional[AhoCorasick]
+    regex: Optional[CompiledPattern]
+    # No single literal is shared by every pattern, so nothing to prefilter on
+    required_literal: str = ""
+    required_bytes: bytes = b""
+
+    @classmethod
+    def from_patterns(cls, patterns: Sequence[str], tokenize: Callable[[str], Tokens]) -> "PatternSet":
+        literals: list[bytes] = []
+        regex_tokens: list[Tokens] = []
+        regex_patterns: list[str] = []
+        for each_pattern in patterns:
+            tokens = tokenize(each_pattern)
+            if all(token_type == "LITERAL" for token_type, _ in tokens):
+                literals.append("".join(value for _, value in tokens).encode("utf-8", "surrogateescape"))
+            else:
+                regex_tokens.append(tokens)
+                regex_patterns.append(each_pattern)
+
+        regex = None
+        if regex_tokens:
+            regex = CompiledPattern.from_tokens(
+                "|".join(f"({each})" for each in regex_patterns), _alternation(regex_tokens)
+            )
+        logger.debug(f"Pattern set :: {len(literals)} literals, {len(regex_patterns)} regexes")
+        return cls(
+            patterns=tuple(patterns),
+            literals=AhoCorasick(literals) if literals else None,
+            regex=regex,
+        )
+
+    # ---------
+    @property
+    def pattern(self) -> str:
+        return "\n".join(self.patterns)
+
+    @property
+    def program(self):
+        """ The alternation's program, if any pattern needed one.
+        """
+        return self.regex.program if self.regex is not None else None
+
+    @property
+    def tokens(self) -> tuple:
+        return self.regex.tokens if self.regex is not None else ()
+
+    def is_match(self, line: str) -> bool:
+        if self.literals is not None and self.literals.contains(line.encode("utf-8", "surrogateescape")):
+            return True
+        return self.regex is not None and self.regex.is_match(line)
+
+    def is_match_bytes(self, line: Union[bytes, memoryview]) -> bool:
+        if self.literals is not None and self.literals.contains(line):
+            return True
+        return self.regex is not None and self.regex.is_match_bytes(line)
+
+    def is_match_bytes_traced(self, line: Union[bytes, memoryview], counters: "TraceCounters") -> bool:
+        if self.literals is not None and self.literals.contains(line):
+            counters.lines_read += 1
+            counters.lines_matched += 1
+            return True
+        if self.regex is not None:
+            return self.regex.is_match_bytes_traced(line, counters)
+        counters.lines_read += 1
+        return False
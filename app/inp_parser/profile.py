@@ -0,0 +1,191 @@
+import json
+import logging
+import os
+import sys
+from contextlib import contextmanager
+from time import perf_counter_ns
+from typing import BinaryIO, Iterable, Iterator, Optional, Union
+
+from regex_engine.compiler import OPCODE_NAMES, OP_ANY, OP_CHAR, OP_CLASS
+from regex_engine.pike_vm import pike_count, to_code_points
+
+logger = logging.getLogger(__name__)
+
+STAGES = ("lex_checks", "cache", "tokenize", "compile", "scan", "output")
+# Instruction counts come from re-running the counting VM, so only this many
+# engine lines are sampled to keep --profile close to real scan times
+SAMPLE_LINES = 10_000
+
+
+class CountingReader:
+    """ Binary stream wrapper counting the bytes read through it.
+    """
+    def __init__(self, stream: BinaryIO):
+        self._stream = stream
+        self._read = getattr(stream, "read1", stream.read)
+        self.n_bytes = 0
+
+    def read1(self, size: int = -1) -> bytes:
+        data = self._read(size)
+        self.n_bytes += len(data)
+        return data
+
+    read = read1
+
+
+class CountingSearcher:
+    """ `BufferSearcher` wrapper counting the bytes the searcher took on
+    rather than leaving to the line matcher.
+    """
+    def __init__(self, searcher):
+        self._searcher = searcher
+        self.min_size = searcher.min_size
+        self.n_bytes = 0
+
+    @property
+    def name(self) -> str:
+        return type(self._searcher).__name__
+
+    def scan(self, buffer, start: int, end: int, emit, first_line_number: int = 1) -> Optional[tuple[int, int]]:
+        counts = self._searcher.scan(buffer, start, end, emit, first_line_number)
+        if counts is not None:
+            self.n_bytes += end - start
+        return counts
+
+
+class Profiler:
+    """ Per-stage wall times and per-instruction hit/miss counts for one run,
+    reported as a single JSON document.
+    """
+
+    def __init__(self, started_ns: Optional[int] = None):
+        self._stage_ns = dict.fromkeys(STAGES, 0)
+        self._started_ns = perf_counter_ns() if started_ns is None else started_ns
+        self.bytes_scanned = 0
+        self._readers: list[CountingReader] = []
+        self._program = None
+        self._hits: list[int] = []
+        self._misses: list[int] = []
+        self._sampled = 0
+        self._searcher: Optional[CountingSearcher] = None
+
+    # ---------
+    @contextmanager
+    def stage(self, name: str) -> Iterator[None]:
+        started = perf_counter_ns()
+        try:
+            yield
+        finally:
+            self._stage_ns[name] += perf_counter_ns() - started
+
+    def add(self, name: str, elapsed_ns: int) -> None:
+        self._stage_ns[name] += elapsed_ns
+
+    def count_bytes(self, stream: BinaryIO) -> CountingReader:
+        reader = CountingReader(stream)
+        self._readers.append(reader)
+        return reader
+
+    def count_files(self, paths: Iterable[str]) -> Iterator[str]:
+        for each_path in paths:
+            try:
+                self.bytes_scanned += os.path.getsize(each_path)
+            except OSError:
+                pass
+            yield each_path
+
+    def counting_searcher(self, searcher):
+        """ Wrap the run's whole-buffer engine (None for none) so the report
+        says how much of the scan it, not the line matcher, did.
+        """
+        if searcher is None:
+            return None
+        self._searcher = CountingSearcher(searcher)
+        return self._searcher
+
+    def timed_emitter(self, emit):
+        """ Wrap a line emitter so time spent writing output is its own stage.
+        """
+        def emit_timed(line, line_number):
+            started = perf_counter_ns()
+            emit(line, line_number)
+            self._stage_ns["output"] += perf_counter_ns() - started
+        return emit_timed
+
+    def sampling_matcher(self, compiled):
+        """ `compiled.is_match_bytes` that also runs the counting VM over the
+        first SAMPLE_LINES lines reaching the engine.
+        """
+        if compiled.program is None:
+            # Only literals (see PatternSet): there are no instructions to count
+            return compiled.is_match_bytes
+        self._program = compiled.program
+        self._hits = [0] * len(compiled.program)
+        self._misses = [0] * len(compiled.program)
+        is_match_bytes = compiled.is_match_bytes
+
+        def matches(line: Union[bytes, memoryview]) -> bool:
+            found = is_match_bytes(line)
+            if self._sampled < SAMPLE_LINES:
+                self._sampled += 1
+                pike_count(
+                    self._program,
+                    to_code_points(str(line, "utf-8", "surrogateescape")),
+                    self._hits,
+                    self._misses,
+                )
+            return found
+        return matches
+
+    # ---------
+    def report(self, pattern: str) -> dict:
+        stages = dict(self._stage_ns)
+        # Output happens inside the scan; report the two separately
+        stages["scan"] = max(0, stages["scan"] - stages["output"])
+        n_bytes = self.bytes_scanned + sum(reader.n_bytes for reader in self._readers)
+        scan_seconds = (stages["scan"] + stages["output"]) / 1e9
+        return {
+            "pattern": pattern,
+            "stages_ns": stages,
+            "total_ns": perf_counter_ns() - self._started_ns,
+            "bytes_scanned": n_bytes,
+            "bytes_per_sec": round(n_bytes / scan_seconds) if scan_seconds else None,
+            # Lines a whole-buffer searcher handles never reach the sampled matcher
+            "searcher": None if self._searcher is None else self._searcher.name,
+            "searcher_bytes": 0 if self._searcher is None else self._searcher.n_bytes,
+            "sampled_lines": self._sampled,
+            "instructions": self._instruction_counts(),
+        }
+
+    def _instruction_counts(self) -> list[dict]:
+        if self._program is None:
+            return []
+        program = self._program
+        counts = []
+        for pc, op in enumerate(program.ops):
+            if op not in (OP_CHAR, OP_CLASS, OP_ANY):
+                continue
+            if op == OP_CHAR:
+                operand = chr(program.arg_x[pc])
+            elif op == OP_CLASS:
+                operand = repr(program.classes[program.arg_x[pc]])
+            else:
+                operand = "."
+            counts.append({
+                "pc": pc,
+                "op": OPCODE_NAMES[op],
+                "operand": operand,
+                "hits": self._hits[pc],
+                "misses": self._misses[pc],
+            })
+        return counts
+
+    def write(self, pattern: str, path: Optional[str] = None) -> None:
+        """ Write the report to `path`, or to stderr when it is None or "-".
+        """
+        document = json.dumps(self.report(pattern), indent=2)
+        if path is None or path == "-":
+            print(document, file=sys.stderr)
+            return
+        with open(path, "w", encoding="utf-8") as file_obj:
+            file_obj.write(document + "\n")
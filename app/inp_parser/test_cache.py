@@ -0,0 +1,82 @@
+import unittest
+import os
+
+from inp_parser.pattern import CompiledPattern
+from inp_parser.cache import (
+    CACHE_ENV_VAR,
+    SUFFIX,
+    cache_enabled,
+    cached_compile,
+    evict,
+    load,
+    pattern_key,
+    store,
+)
+
+
+class TestPatternCache(unittest.TestCase):
+    def setUp(self):
+        import tempfile
+        self._tmp = tempfile.TemporaryDirectory()
+        self.directory = self._tmp.name
+
+    def tearDown(self):
+        self._tmp.cleanup()
+
+    def _tokenize(self, pattern):
+        from inp_parser.parse import RegexParser
+        return RegexParser().parse_regex_tokens(pattern)
+
+    def test_round_trip(self):
+        pattern = r"(\d+|none) [^a-zé]+ms"
+        compiled = cached_compile(pattern, self._tokenize, self.directory)
+        loaded = load(pattern, self.directory)
+        self.assertIsNotNone(loaded)
+        self.assertEqual(loaded.program.dump(), compiled.program.dump())
+        self.assertEqual((loaded.tokens, loaded.required_literal), (compiled.tokens, compiled.required_literal))
+        for line in ("took 12 XY ms", "took none !ms", "took ms", "12 abc ms"):
+            self.assertEqual(loaded.is_match(line), compiled.is_match(line), msg=line)
+
+    def test_stores_reverse_program(self):
+        from unittest import mock
+        pattern = r"\d{1,10}x$"
+        compiled = cached_compile(pattern, self._tokenize, self.directory)
+        self.assertIsNotNone(compiled.reverse_program)
+        with mock.patch("inp_parser.pattern.compile_tokens") as compile_tokens:
+            loaded = load(pattern, self.directory)
+        compile_tokens.assert_not_called()
+        self.assertEqual(loaded.reverse_program.dump(), compiled.reverse_program.dump())
+        for line in ("id 12x", "id 12xy", "x", "5x"):
+            self.assertEqual(loaded.is_match(line), compiled.is_match(line), msg=line)
+            self.assertEqual(loaded.is_match_bytes(line.encode()), compiled.is_match(line), msg=line)
+
+    def test_miss_and_corrupt_entry(self):
+        self.assertIsNone(load("abc", self.directory))
+        with open(os.path.join(self.directory, pattern_key("abc") + SUFFIX), "wb") as file_obj:
+            file_obj.write(b"not marshal")
+        self.assertIsNone(load("abc", self.directory))
+
+    def test_key_covers_pattern(self):
+        self.assertNotEqual(pattern_key("a"), pattern_key("b"))
+        self.assertEqual(pattern_key("a"), pattern_key("a"))
+
+    def test_evicts_least_recently_used(self):
+        for index, pattern in enumerate(("aaa", "bbb", "ccc")):
+            store(CompiledPattern.from_tokens(pattern, self._tokenize(pattern)), self.directory)
+            path = os.path.join(self.directory, pattern_key(pattern) + SUFFIX)
+            os.utime(path, ns=(index * 10**9, index * 10**9))
+        entry_size = os.path.getsize(path)
+        evict(self.directory, max_bytes=2 * entry_size)
+        self.assertIsNone(load("aaa", self.directory))
+        self.assertIsNotNone(load("ccc", self.directory))
+
+    def test_env_switch(self):
+        from unittest import mock
+        with mock.patch.dict(os.environ, {CACHE_ENV_VAR: "off"}):
+            self.assertFalse(cache_enabled())
+        with mock.patch.dict(os.environ, {CACHE_ENV_VAR: ""}):
+            self.assertTrue(cache_enabled())
+
+
+if __name__ == "__main__":
+    unittest.main(verbosity=2)
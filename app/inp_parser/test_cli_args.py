@@ -0,0 +1,86 @@
+import unittest
+
+from inp_parser.cli_args import parse_cli_args
+
+
+class TestParseCliArgs(unittest.TestCase):
+    def _parse(self, *args):
+        return parse_cli_args(list(args), ["-E"])
+
+    def test_pattern_only(self):
+        options = self._parse("-E", r"\d")
+        self.assertEqual((options.pattern, options.files, options.jobs), (r"\d", [], 1))
+
+    def test_files_and_jobs_in_any_order(self):
+        options = self._parse("-j", "4", "-E", "a+", "x.log", "y.log")
+        self.assertEqual((options.pattern, options.files, options.jobs), ("a+", ["x.log", "y.log"], 4))
+        self.assertEqual(self._parse("-E", "a", "x.log", "-j2").jobs, 2)
+        self.assertTrue(self._parse("-n", "-E", "a").line_numbers)
+
+    def test_recursive_options(self):
+        options = self._parse("-R", "--include", "*.log", "--include=*.txt", "--exclude-dir", ".git", "-E", "a", "src")
+        self.assertTrue(options.recursive)
+        self.assertTrue(options.dereference_recursive)
+        self.assertEqual(options.include, ["*.log", "*.txt"])
+        self.assertEqual(options.exclude_dirs, [".git"])
+        self.assertFalse(self._parse("-E", "a").recursive)
+
+    def test_trace_flag(self):
+        from unittest import mock
+        with mock.patch.dict("os.environ", {"GREP_TRACE": ""}):
+            self.assertFalse(self._parse("-E", "a").trace)
+            self.assertTrue(self._parse("--trace", "-E", "a").trace)
+
+    def test_debug_is_separate_from_trace(self):
+        options = self._parse("--debug", "-E", "a")
+        self.assertTrue(options.debug)
+        self.assertFalse(self._parse("--trace", "-E", "a").debug)
+
+    def test_profile_options(self):
+        self.assertFalse(self._parse("-E", "a").profile)
+        self.assertTrue(self._parse("--profile", "-E", "a", "x.log").profile)
+        options = self._parse("-E", "a", "--profile-output", "p.json", "x.log")
+        self.assertEqual((options.profile, options.profile_output, options.files), (True, "p.json", ["x.log"]))
+
+    def test_multiple_patterns(self):
+        import tempfile
+        with tempfile.NamedTemporaryFile("w", suffix=".txt", delete=False) as tmp:
+            tmp.write("alpha\nbeta\n")
+        try:
+            options = self._parse("-e", "x", "--regexp=y", "-f", tmp.name, "data.log")
+        finally:
+            import os
+            os.unlink(tmp.name)
+        self.assertEqual(options.patterns, ["x", "y", "alpha", "beta"])
+        self.assertEqual(options.files, ["data.log"])
+        self.assertEqual(self._parse("-E", "a", "-e", "b").patterns, ["a", "b"])
+
+    def test_patterns_starting_with_a_dash(self):
+        self.assertEqual(self._parse("-E", "-x").patterns, ["-x"])
+        self.assertEqual(self._parse("-e", "-x", "--regexp", "--y", "-e", "-").patterns, ["-x", "--y", "-"])
+        self.assertEqual(self._parse("-E", "-n", "-n").patterns, ["-n"])
+        self.assertTrue(self._parse("-E", "-n", "-n").line_numbers)
+        self.assertEqual(self._parse("-E", "", "x.log").patterns, [""])
+        self.assertEqual(self._parse("-E", "a=b").patterns, ["a=b"])
+
+    def test_double_dash_ends_options(self):
+        options = self._parse("-E", "a", "--", "-x.log", "-E")
+        self.assertEqual((options.patterns, options.files), (["a"], ["-x.log", "-E"]))
+
+    def test_unreadable_pattern_file_raises(self):
+        with self.assertRaises(ValueError):
+            self._parse("-f", "/nonexistent/patterns.txt")
+
+    def test_missing_pattern_raises(self):
+        with self.assertRaises(ValueError):
+            self._parse("x.log")
+
+    def test_invalid_jobs_raise(self):
+        with self.assertRaises(ValueError):
+            self._parse("-E", "a", "-j", "0")
+        with self.assertRaises(ValueError):
+            self._parse("-E", "a", "-j", "many")
+
+
+if __name__ == "__main__":
+    unittest.main(verbosity=2)
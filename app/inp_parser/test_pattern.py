@@ -0,0 +1,161 @@
+import unittest
+
+
+class TestCompiledPattern(unittest.TestCase):
+    def _compile(self, pattern):
+        from inp_parser.parse import compile
+        return compile(pattern)
+
+    def test_reused_across_lines(self):
+        compiled = self._compile(r"\d\d")
+        self.assertIsNotNone(compiled.search("ab12"))
+        self.assertIsNone(compiled.search("a1b2"))
+        self.assertIsNotNone(compiled.search("99"))
+
+    def test_search_span(self):
+        found = self._compile("cat").search("the cat sat")
+        self.assertEqual(found.span(), (4, 7))
+        self.assertEqual(found.group(), "cat")
+
+    def test_match_is_anchored(self):
+        compiled = self._compile(r"\w")
+        self.assertIsNotNone(compiled.match("a!"))
+        self.assertIsNone(compiled.match("!a"))
+
+    def test_finditer(self):
+        found = [m.group() for m in self._compile(r"\d").finditer("a1b22")]
+        self.assertEqual(found, ["1", "2", "2"])
+
+    def test_char_groups(self):
+        self.assertIsNotNone(self._compile("[abc]").search("xxb"))
+        self.assertIsNone(self._compile("[abc]").search("xyz"))
+        self.assertIsNotNone(self._compile("[^abc]").search("cat"))
+        self.assertIsNone(self._compile("[^abc]").search("cab"))
+
+    def test_escaped_literal(self):
+        self.assertIsNotNone(self._compile(r"a\.b").search("a.b"))
+        self.assertIsNone(self._compile(r"a\.b").search("axb"))
+
+    def test_tokens_are_immutable(self):
+        compiled = self._compile(r"a\d")
+        self.assertEqual(compiled.tokens, (("LITERAL", "a"), ("METACHAR", r"\d")))
+
+    def test_quantifiers_and_alternation(self):
+        compiled = self._compile(r"(\d+|none) ms")
+        self.assertEqual(compiled.search("took 120 ms").group(), "120 ms")
+        self.assertEqual(compiled.search("took none ms").group(), "none ms")
+        self.assertIsNone(compiled.search("took ms"))
+
+    def test_is_match_agrees_with_search(self):
+        compiled = self._compile(r"(a|b)*c\d")
+        for line in ("abac1", "c", "abab2", "xc9", ""):
+            self.assertEqual(compiled.is_match(line), compiled.search(line) is not None, msg=line)
+
+    def test_is_match_bytes(self):
+        compiled = self._compile("caf.")
+        self.assertTrue(compiled.is_match_bytes("café".encode()))
+        self.assertTrue(compiled.is_match_bytes(memoryview(b"xcafe")))
+        self.assertFalse(compiled.is_match_bytes(b"\xffcaf"))
+
+    def test_counted_repetition(self):
+        compiled = self._compile(r"id=\d{2,4}!")
+        self.assertIsNone(compiled.search("id=1!"))
+        self.assertEqual(compiled.search("id=123!").group(), "id=123!")
+        self.assertIsNone(compiled.search("id=12345!"))
+        self.assertTrue(self._compile("[a-f]{4}").is_match("x0abcdz"[2:]))
+        self.assertTrue(self._compile("(ab){2,}c").is_match("xababababc"))
+        # Not a quantifier, so the braces are literal
+        self.assertTrue(self._compile("a{x}").is_match("a{x}"))
+        self.assertTrue(self._compile("{2}").is_match("{2}"))
+
+    def test_anchors(self):
+        compiled = self._compile(r"^2026-\d\d")
+        self.assertEqual(compiled.prefix, "2026-")
+        self.assertTrue(compiled.is_match("2026-10 boot"))
+        self.assertFalse(compiled.is_match("at 2026-10"))
+        self.assertTrue(self._compile(r"\d+ms$").is_match("took 12ms"))
+        self.assertFalse(self._compile(r"\d+ms$").is_match("12ms later"))
+        self.assertTrue(self._compile("^$").is_match(""))
+        self.assertFalse(self._compile("^$").is_match("x"))
+        self.assertTrue(self._compile("^a|b$").is_match("xb"))
+
+    def test_end_anchored_runs_backwards(self):
+        compiled = self._compile(r"\d\dms$")
+        self.assertIsNotNone(compiled._reverse_dfa)
+        self.assertTrue(compiled.is_match("took 2538ms"))
+        self.assertFalse(compiled.is_match("took 8ms"))
+        self.assertFalse(compiled.is_match("12ms late"))
+        self.assertIsNone(self._compile(r"^\d$")._reverse_dfa)
+
+    def test_anchored_literals(self):
+        self.assertTrue(self._compile("^ab").literal_only)
+        self.assertTrue(self._compile("^ab").is_match_bytes(memoryview(b"abc")))
+        self.assertFalse(self._compile("^ab").is_match_bytes(b"cab"))
+        self.assertTrue(self._compile("ab$").is_match("cab"))
+        self.assertFalse(self._compile("^ab$").is_match("abab"))
+        self.assertTrue(self._compile("^ab$").is_match("ab"))
+        self.assertFalse(self._compile("^$").literal_only)
+        self.assertTrue(self._compile("^ab$").is_match_bytes(memoryview(b"ab")))
+        self.assertFalse(self._compile("^ab$").is_match_bytes(memoryview(b"abab")))
+        self.assertTrue(self._compile("ab$").is_match_bytes(memoryview(b"cab")))
+        self.assertFalse(self._compile("ab$").is_match_bytes(memoryview(b"b")))
+
+    def test_literal_only(self):
+        compiled = self._compile(r"a\.b c")
+        self.assertTrue(compiled.literal_only)
+        self.assertTrue(compiled.is_match_bytes(memoryview(b"xa.b cx")))
+        self.assertFalse(compiled.is_match("axb c"))
+        self.assertFalse(self._compile("ab+").literal_only)
+        self.assertFalse(self._compile("").literal_only)
+
+    def test_groups(self):
+        found = self._compile(r"(\w+)@(\w+)(\.com)?").search("mail bob@host now")
+        self.assertEqual(found.group(), "bob@host")
+        self.assertEqual(found.groups(), ("bob", "host", None))
+        self.assertEqual(found.span(2), (9, 13))
+        with self.assertRaises(IndexError):
+            found.group(4)
+        self.assertEqual(self._compile("a+").search("baa").groups(), ())
+        self.assertEqual([m.group(1) for m in self._compile(r"(\d)x").finditer("1x 2y 3x")], ["1", "3"])
+
+    def test_backreferences(self):
+        compiled = self._compile(r"(\w+) \1")
+        self.assertTrue(compiled.backreferences)
+        self.assertTrue(compiled.is_match("it is is here"))
+        # The capture-free program accepts this; the backtracker rejects it
+        self.assertFalse(compiled.is_match("it is here"))
+        self.assertFalse(compiled.is_match_bytes(b"it is here"))
+        self.assertEqual(compiled.search("it is is").groups(), ("is",))
+        self.assertTrue(self._compile(r"^(\d+)-\1$").is_match("42-42"))
+        self.assertFalse(self._compile(r"^(\d+)-\1$").is_match("42-421"))
+        self.assertFalse(self._compile(r"(a)?b\1").is_match("b"))
+
+    def test_capture_program_is_lazy(self):
+        compiled = self._compile(r"(\d+)ms")
+        self.assertTrue(compiled.is_match("12ms"))
+        self.assertNotIn("capture_program", vars(compiled))
+        compiled = self._compile(r"\d+ms")
+        self.assertIs(compiled.capture_program, compiled.program)
+
+    def test_bytes_are_not_decoded(self):
+        for pattern in (r"caf\w", "é+$", r"^\d+ é", "[^a-z]", "x.y"):
+            compiled = self._compile(pattern)
+            for data in (b"caf\xc3\xa9", b"\xc3\xa9\xc3\xa9", b"12 \xc3\xa9", b"abc", b"x\xffy", b"x\xc3y", b"caf"):
+                expected = compiled.is_match(data.decode("utf-8", "surrogateescape"))
+                self.assertEqual(compiled.is_match_bytes(data), expected, msg=(pattern, data))
+                self.assertEqual(compiled.is_match_bytes(memoryview(data)), expected, msg=(pattern, data))
+
+    def test_reverse_dfa_over_bytes(self):
+        compiled = self._compile(r"\d\dms$")
+        self.assertTrue(compiled.is_match_bytes(memoryview("é took 12ms".encode())))
+        # Non-ASCII in the tail is decoded instead
+        self.assertFalse(compiled.is_match_bytes(memoryview("took 12ém".encode())))
+        self.assertTrue(self._compile("é+$").is_match_bytes(memoryview("caféé".encode())))
+
+    def test_trailing_backslash_raises(self):
+        with self.assertRaises(ValueError):
+            self._compile("a\\")
+
+
+if __name__ == "__main__":
+    unittest.main(verbosity=2)
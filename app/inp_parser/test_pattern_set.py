@@ -0,0 +1,48 @@
+import unittest
+
+from inp_parser.pattern_set import PatternSet
+
+
+class TestPatternSet(unittest.TestCase):
+    def _set(self, *patterns):
+        from inp_parser.parse import RegexParser
+        return PatternSet.from_patterns(patterns, RegexParser().parse_regex_tokens)
+
+    def test_literals_use_automaton(self):
+        patterns = self._set("foo", "bar", r"a\.b")
+        self.assertIsNone(patterns.regex)
+        self.assertTrue(patterns.is_match("xbarx"))
+        self.assertTrue(patterns.is_match("a.b"))
+        self.assertFalse(patterns.is_match("axb"))
+
+    def test_mixed_literals_and_regexes(self):
+        patterns = self._set("timeout", r"\d+ms", "err(or)?")
+        self.assertIsNotNone(patterns.literals)
+        self.assertTrue(patterns.is_match_bytes(b"took 12ms"))
+        self.assertTrue(patterns.is_match_bytes(b"a timeout"))
+        self.assertTrue(patterns.is_match_bytes(memoryview(b"err")))
+        self.assertFalse(patterns.is_match_bytes(b"ok ms"))
+
+    def test_alternation_keeps_patterns_apart(self):
+        # Without grouping this would read as `a|bc|d`
+        patterns = self._set("ab|c", "d|ef")
+        self.assertTrue(patterns.is_match("c"))
+        self.assertTrue(patterns.is_match("ef"))
+        self.assertFalse(patterns.is_match("b"))
+
+    def test_backreferences_keep_their_groups(self):
+        patterns = self._set(r"(a)\1", r"(\d)(x)\2\1")
+        self.assertTrue(patterns.is_match("aa"))
+        self.assertTrue(patterns.is_match("7xx7"))
+        self.assertFalse(patterns.is_match("ab"))
+        self.assertFalse(patterns.is_match("7xx8"))
+
+    def test_picklable_for_workers(self):
+        import pickle
+        patterns = pickle.loads(pickle.dumps(self._set("needle", r"\d\d")))
+        self.assertTrue(patterns.is_match("a needle"))
+        self.assertTrue(patterns.is_match("42"))
+
+
+if __name__ == "__main__":
+    unittest.main(verbosity=2)
@@ -0,0 +1,61 @@
+import unittest
+import json
+import os
+
+from inp_parser.profile import Profiler
+
+
+class TestProfiler(unittest.TestCase):
+    def test_stages_and_bytes(self):
+        import io
+        from inp_parser.parse import compile
+        from inp_reader.stream import scan_stream
+
+        profiler = Profiler()
+        with profiler.stage("compile"):
+            compiled = compile("ab")
+        found = []
+        with profiler.stage("scan"):
+            scan_stream(
+                profiler.count_bytes(io.BytesIO(b"xab\nzz\n")),
+                profiler.sampling_matcher(compiled),
+                profiler.timed_emitter(lambda line, line_number: found.append(bytes(line))),
+            )
+        report = profiler.report("ab")
+        self.assertEqual(found, [b"xab"])
+        self.assertEqual(report["bytes_scanned"], 7)
+        self.assertEqual(report["sampled_lines"], 2)
+        self.assertGreater(report["stages_ns"]["compile"], 0)
+        self.assertEqual([each["operand"] for each in report["instructions"]], ["a", "b"])
+        self.assertEqual(report["instructions"][1]["hits"], 1)
+
+    def test_reports_searcher(self):
+        from inp_parser.parse import compile
+        from inp_reader.literal import buffer_searcher
+        from inp_reader.stream import scan_buffer
+
+        profiler = Profiler()
+        compiled = compile("ab")
+        data = b"xab\nzz\n"
+        scan_buffer(
+            data, 0, len(data),
+            profiler.sampling_matcher(compiled),
+            lambda line, line_number: None,
+            searcher=profiler.counting_searcher(buffer_searcher(compiled)),
+        )
+        report = profiler.report("ab")
+        self.assertEqual((report["searcher"], report["searcher_bytes"]), ("LiteralSearcher", len(data)))
+        self.assertEqual(report["sampled_lines"], 0)
+        self.assertIsNone(Profiler().report("ab")["searcher"])
+
+    def test_write_to_file(self):
+        import tempfile
+        with tempfile.TemporaryDirectory() as tmp:
+            path = os.path.join(tmp, "profile.json")
+            Profiler().write("x", path)
+            with open(path, encoding="utf-8") as file_obj:
+                self.assertEqual(json.load(file_obj)["pattern"], "x")
+
+
+if __name__ == "__main__":
+    unittest.main(verbosity=2)
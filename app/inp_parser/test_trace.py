@@ -0,0 +1,39 @@
+import unittest
+import os
+
+from inp_parser.trace import TRACE_ENV_VAR, TraceCounters, trace_requested, write_trace
+
+
+class TestTrace(unittest.TestCase):
+    def test_env_var(self):
+        from unittest import mock
+        with mock.patch.dict(os.environ, {TRACE_ENV_VAR: "1"}):
+            self.assertTrue(trace_requested())
+        with mock.patch.dict(os.environ, {TRACE_ENV_VAR: "0"}):
+            self.assertFalse(trace_requested())
+            self.assertTrue(trace_requested(True))
+
+    def test_counts_prefilter_and_fallbacks(self):
+        from inp_parser.parse import compile
+        compiled = compile(r"ERROR \d+")
+        counters = TraceCounters()
+        lines = [b"INFO ok", b"ERROR 12", b"ERROR x", b""]
+        found = [compiled.is_match_bytes_traced(line, counters) for line in lines]
+        self.assertEqual(found, [False, True, False, False])
+        self.assertEqual((counters.lines_read, counters.prefilter_rejected), (4, 2))
+        self.assertEqual((counters.lines_tested, counters.lines_matched), (2, 1))
+        self.assertEqual(counters.chars_scanned, len("ERROR 12") + len("ERROR x"))
+        self.assertEqual(counters.as_dict()["prefilter_hit_rate"], 0.5)
+
+    def test_report_is_one_json_line(self):
+        import io
+        import json
+        err = io.StringIO()
+        write_trace(TraceCounters(lines_read=3), err)
+        prefix, payload = err.getvalue().rstrip("\n").split(": ", 2)[1:]
+        self.assertEqual(prefix, "trace")
+        self.assertEqual(json.loads(payload)["lines_read"], 3)
+
+
+if __name__ == "__main__":
+    unittest.main(verbosity=2)
@@ -0,0 +1,55 @@
+import logging
+import os
+from dataclasses import asdict, dataclass
+from typing import TextIO
+
+logger = logging.getLogger(__name__)
+
+# Setting this to anything but "", "0" or "false" turns tracing on, like --trace
+TRACE_ENV_VAR = "GREP_TRACE"
+
+
+def trace_requested(flag: bool = False) -> bool:
+    """ Whether `--trace` was given or the environment asks for tracing.
+    """
+    return flag or os.environ.get(TRACE_ENV_VAR, "").lower() not in ("", "0", "false")
+
+
+@dataclass
+class TraceCounters:
+    """ Counters gathered by a traced run.
+
+    Nothing here is touched unless tracing is on; the untraced matcher is the
+    plain `CompiledPattern.is_match_bytes`.
+    """
+    pattern_tokens: int = 0
+    program_instructions: int = 0
+    # Every line read; with tracing the literal prefilter runs per line so it can be counted
+    lines_read: int = 0
+    prefilter_rejected: int = 0
+    # Lines that reached the DFA/VM, and the code points fed to them
+    lines_tested: int = 0
+    chars_scanned: int = 0
+    lines_matched: int = 0
+    dfa_states: int = 0
+    dfa_flushes: int = 0
+    vm_fallbacks: int = 0
+
+    @property
+    def prefilter_hit_rate(self) -> float:
+        """ Share of lines the required literal let through to the engine.
+        """
+        return (self.lines_read - self.prefilter_rejected) / self.lines_read if self.lines_read else 0.0
+
+    def as_dict(self) -> dict:
+        counters = asdict(self)
+        counters["prefilter_hit_rate"] = round(self.prefilter_hit_rate, 4)
+        return counters
+
+
+def write_trace(counters: TraceCounters, err: TextIO) -> None:
+    """ One `grep: trace: {...}` JSON line on `err`, after the search is done.
+    """
+    import json
+    print(f"grep: trace: {json.dumps(counters.as_dict(), sort_keys=True)}", file=err)
+    err.flush()
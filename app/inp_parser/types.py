@@ -1,20 +1,16 @@
-import pyparsing as pp 
-from pyparsing import ParserElement, ParseException
-from typing import Annotated
-import logging
 from typing import Literal
+import logging
 
 logger = logging.getLogger(__name__)
 
-FilterKeyType = Annotated[
-    str, 
-    pp.Literal("digit") | 
-    pp.Literal("single_char") | 
-    pp.Literal("alpha_numeric") |
+# Plain string literals; no grammar objects are built at import time
+FilterKeyType = Literal[
+    "digit",
+    "single_char",
+    "alpha_numeric",
     # -------
-    pp.Literal("positive_char_group") |
-    pp.Literal("negative_char_group") |
+    "positive_char_group",
+    "negative_char_group",
     # ------
-    Literal["unknown"]
-    ]
-
+    "unknown",
+]
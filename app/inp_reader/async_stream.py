@@ -0,0 +1,77 @@
+import asyncio
+import copy
+import logging
+from concurrent.futures import Executor
+from typing import AsyncIterator, Optional
+
+from .literal import buffer_searcher
+from .stream import CHUNK_SIZE, NEWLINE, scan_buffer
+
+logger = logging.getLogger(__name__)
+
+# Chunks at least this large are scanned in `executor` rather than on the event loop
+OFFLOAD_SIZE = 256 << 10
+
+
+def _matching_lines(pattern, buffer: bytes, end: int) -> list[bytes]:
+    """ Copies of the matching lines in `buffer[:end]`. Module level so a
+    ProcessPoolExecutor can run it.
+    """
+    found: list[bytes] = []
+    scan_buffer(
+        buffer,
+        0,
+        end,
+        pattern.is_match_bytes,
+        lambda line, line_number: found.append(bytes(line)),
+        required=pattern.required_bytes,
+        searcher=buffer_searcher(pattern),
+    )
+    return found
+
+
+async def afilter(
+    reader: asyncio.StreamReader,
+    pattern,
+    chunk_size: int = CHUNK_SIZE,
+    executor: Optional[Executor] = None,
+    offload_size: int = OFFLOAD_SIZE,
+) -> AsyncIterator[bytes]:
+    """ Matching lines read from `reader`, without their newline.
+
+    `pattern` is a pattern string or a compiled pattern. Input is read
+    `chunk_size` bytes at a time and only complete lines are scanned; a
+    chunk of `offload_size` bytes or more goes to `executor` (the loop's
+    default thread pool when None, or a ProcessPoolExecutor for CPU-heavy
+    patterns), so the event loop keeps running meanwhile. From the first
+    such chunk on, matching uses a copy of `pattern`, as the server does
+    for big requests: its lazy DFA fills a cache as it matches, and other
+    calls may be matching with the same pattern in other threads.
+    """
+    if isinstance(pattern, str):
+        from inp_parser.parse import compile
+        pattern = compile(pattern)
+    loop = asyncio.get_running_loop()
+    is_copy = False
+    # Pieces of the unfinished last line, joined once its newline arrives
+    pending: list[bytes] = []
+    while True:
+        chunk = await reader.read(chunk_size)
+        if chunk and chunk.find(NEWLINE) < 0:
+            pending.append(chunk)
+            continue
+        pending.append(chunk)
+        buffer = b"".join(pending)
+        end = buffer.rfind(NEWLINE) + 1 if chunk else len(buffer)
+        if end:
+            if end >= offload_size:
+                if not is_copy:
+                    pattern, is_copy = copy.deepcopy(pattern), True
+                found = await loop.run_in_executor(executor, _matching_lines, pattern, buffer, end)
+            else:
+                found = _matching_lines(pattern, buffer, end)
+            for line in found:
+                yield line
+        if not chunk:
+            return
+        pending = [buffer[end:]]
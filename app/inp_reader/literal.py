@@ -0,0 +1,80 @@
+import logging
+from typing import Optional
+
+from .stream import BufferSearcher, BytesLike, LineEmitter, NEWLINE, count_lines
+from .vectorized import byte_classifier
+
+logger = logging.getLogger(__name__)
+
+
+class LiteralSearcher:
+    """ Whole-buffer search for patterns made only of LITERAL tokens.
+
+    Each occurrence is found with `buffer.find`, whose two-way and
+    Horspool-style skip tables run in C, and the line around it is emitted
+    without running the engine. Lines between occurrences are only counted.
+    With `at_start`/`at_end` (`^needle`, `needle$`) the line must also
+    start/end with the needle.
+    """
+    # Even a one-line buffer gains nothing from testing line by line
+    min_size = 0
+
+    def __init__(self, needle: bytes, at_start: bool = False, at_end: bool = False):
+        self.needle = needle
+        self.at_start = at_start
+        self.at_end = at_end
+
+    def scan(
+        self,
+        buffer: BytesLike,
+        start: int,
+        end: int,
+        emit: LineEmitter,
+        first_line_number: int = 1,
+    ) -> tuple[int, int]:
+        """ Same contract as `scan_buffer`.
+        """
+        view = memoryview(buffer)
+        needle = self.needle
+        n_matched = 0
+        line_number = first_line_number
+        pos = start
+        while pos < end:
+            hit = buffer.find(needle, pos, end)
+            if hit < 0:
+                line_number += count_lines(buffer, pos, end)
+                break
+            newline_before = buffer.rfind(NEWLINE, pos, hit)
+            line_start = pos if newline_before < 0 else newline_before + 1
+            line_number += count_lines(buffer, pos, line_start)
+            # The needle holds no newline, so the line can't end inside it
+            newline_at = buffer.find(NEWLINE, hit + len(needle), end)
+            line_end = end if newline_at < 0 else newline_at
+            if self._anchors_hold(view, hit, line_start, line_end):
+                emit(view[line_start:line_end], line_number)
+                n_matched += 1
+            line_number += 1
+            pos = line_end + 1
+        return n_matched, line_number - first_line_number
+
+    def _anchors_hold(self, view: memoryview, hit: int, line_start: int, line_end: int) -> bool:
+        """ `hit` is the first occurrence in the line, so `^` holds only there.
+        """
+        if self.at_start and hit != line_start:
+            return False
+        if self.at_end:
+            if self.at_start:
+                return line_end - line_start == len(self.needle)
+            return view[line_end - len(self.needle):line_end] == self.needle
+        return True
+
+
+def buffer_searcher(compiled) -> Optional[BufferSearcher]:
+    """ The whole-buffer engine for `compiled`: `LiteralSearcher` for plain
+    strings, the NumPy `ByteClassifier` for single classes, else None.
+    """
+    if getattr(compiled, "literal_only", False):
+        return LiteralSearcher(
+            compiled.required_bytes, at_start=compiled.prefix is not None, at_end=compiled.suffix is not None
+        )
+    return byte_classifier(compiled)
@@ -0,0 +1,63 @@
+import logging
+import mmap
+import os
+import stat
+import traceback
+from contextlib import contextmanager
+from typing import BinaryIO, Iterator, Optional
+
+from .stream import BufferSearcher, LineEmitter, LineMatcher, scan_buffer, scan_stream
+
+logger = logging.getLogger(__name__)
+
+
+@contextmanager
+def read_only_map(file_obj: BinaryIO) -> Iterator[mmap.mmap]:
+    """ Read-only mapping of the whole of `file_obj`, closed when the block ends.
+
+    When the block ends with an exception, the frames in its traceback still
+    hold the memoryview slices they were scanning, and closing the mapping
+    would fail with BufferError in place of that exception. Those frames
+    are cleared first.
+    """
+    mapped = mmap.mmap(file_obj.fileno(), 0, access=mmap.ACCESS_READ)
+    try:
+        yield mapped
+    except BaseException as e:
+        traceback.clear_frames(e.__traceback__)
+        raise
+    finally:
+        mapped.close()
+
+
+def scan_file(
+    path: str,
+    matches: LineMatcher,
+    emit: LineEmitter,
+    required: bytes = b"",
+    searcher: Optional[BufferSearcher] = None,
+) -> int:
+    """ Scan a file through a read-only memory map.
+
+    Newlines are located with `mmap.find` and lines reach `matches`/`emit` as
+    memoryview slices of the mapping, so the file is never read into Python
+    memory. `emit` must not keep the slices after it returns. Pipes and other
+    non-regular files fall back to chunked streaming. `required` is the
+    prefilter literal and `searcher` the whole-buffer engine described in
+    `scan_buffer`.
+    Returns the number of matching lines.
+    """
+    with open(path, "rb") as file_obj:
+        file_stat = os.fstat(file_obj.fileno())
+        if not stat.S_ISREG(file_stat.st_mode):
+            logger.debug(f"Not a regular file, streaming instead :: {path=}")
+            return scan_stream(file_obj, matches, emit, required=required, searcher=searcher)
+        if file_stat.st_size == 0:
+            return 0
+
+        with read_only_map(file_obj) as mapped:
+            if hasattr(mapped, "madvise"):
+                mapped.madvise(mmap.MADV_SEQUENTIAL)
+            return scan_buffer(
+                mapped, 0, file_stat.st_size, matches, emit, required=required, searcher=searcher
+            )[0]
@@ -0,0 +1,202 @@
+import io
+import logging
+import os
+import stat
+from array import array
+from collections import deque
+from concurrent.futures import Executor, ProcessPoolExecutor
+from typing import BinaryIO, Callable, Iterable, Iterator, Optional, TypeVar
+
+from .mapped_file import read_only_map, scan_file
+from .stream import NEWLINE, checked_output, line_writer, scan_buffer
+from .literal import buffer_searcher
+
+logger = logging.getLogger(__name__)
+
+T = TypeVar("T")
+R = TypeVar("R")
+
+# Files queued per worker; keeps workers busy without listing every file up front
+IN_FLIGHT_PER_JOB = 4
+
+# A single file is only split across processes above this size, into
+# CHUNKS_PER_JOB ranges per worker so one slow range doesn't stall the rest.
+MIN_SPLIT_SIZE = 8 << 20
+CHUNKS_PER_JOB = 4
+# Larger files get more ranges instead of larger ones. A range's matches
+# come back as one block of output, so at most RANGES_IN_FLIGHT_PER_JOB
+# ranges per worker bound memory whatever the file size.
+MAX_RANGE_SIZE = 16 << 20
+RANGES_IN_FLIGHT_PER_JOB = 2
+
+# Compiled pattern shipped once to each worker process by `_init_worker`
+_worker_pattern = None
+_worker_searcher = None
+
+
+def _init_worker(pattern) -> None:
+    global _worker_pattern, _worker_searcher
+    _worker_pattern = pattern
+    _worker_searcher = buffer_searcher(pattern)
+
+
+def _search_file_in_worker(path: str, prefix: bytes, line_numbers: bool) -> tuple[str, bytes, int, Optional[str]]:
+    """ Returns (path, formatted matching lines, number of matches, error message).
+    """
+    out = io.BytesIO()
+    try:
+        n_matched = scan_file(
+            path,
+            _worker_pattern.is_match_bytes,
+            line_writer(out, prefix, line_numbers),
+            required=_worker_pattern.required_bytes,
+            searcher=_worker_searcher,
+        )
+    except OSError as e:
+        return path, b"", 0, e.strerror
+    return path, out.getvalue(), n_matched, None
+
+
+def _scan_range_in_worker(
+    path: str, start: int, end: int, prefix: bytes, line_numbers: bool
+) -> tuple[bytes, Optional[array], int, int]:
+    """ Scan `path[start:end]` through this process's own mapping of the file.
+
+    Returns the matching lines already formatted, their line numbers within
+    the range when `line_numbers` is set (the parent adds the lines before
+    the range and formats them), the number of matches and the number of
+    lines in the range.
+    """
+    out = io.BytesIO()
+    numbers = array("q") if line_numbers else None
+    if numbers is None:
+        emit = line_writer(out, prefix)
+    else:
+        write_line = line_writer(out)
+
+        def emit(line, line_number):
+            numbers.append(line_number)
+            write_line(line, line_number)
+
+    with open(path, "rb") as file_obj:
+        with read_only_map(file_obj) as mapped:
+            n_matched, n_lines = scan_buffer(
+                mapped,
+                start,
+                end,
+                _worker_pattern.is_match_bytes,
+                emit,
+                required=_worker_pattern.required_bytes,
+                searcher=_worker_searcher,
+            )
+    return out.getvalue(), numbers, n_matched, n_lines
+
+
+def split_newline_aligned(buffer, size: int, n_chunks: int) -> list[tuple[int, int]]:
+    """ Cut `buffer[0:size]` into about `n_chunks` byte ranges that each start
+    at the beginning of a line.
+    """
+    ranges = []
+    start = 0
+    for index in range(1, n_chunks + 1):
+        if start >= size:
+            break
+        end = size if index == n_chunks else max(start, size * index // n_chunks)
+        if end < size:
+            newline_at = buffer.find(NEWLINE, end)
+            end = size if newline_at < 0 else newline_at + 1
+        ranges.append((start, end))
+        start = end
+    return ranges
+
+
+def ordered_imap(executor: Executor, fn: Callable[..., R], items: Iterable[T], window: int) -> Iterator[R]:
+    """ Like `executor.map(fn, items)` but consumes `items` lazily, keeping at
+    most `window` calls in flight, and yields results in input order.
+    """
+    pending: deque = deque()
+    for each_item in items:
+        pending.append(executor.submit(fn, *each_item))
+        if len(pending) >= window:
+            yield pending.popleft().result()
+    while pending:
+        yield pending.popleft().result()
+
+
+def search_files_parallel(
+    pattern,
+    paths: Iterable[str],
+    jobs: int,
+    out: BinaryIO,
+    with_prefix: bool,
+    on_error: Callable[[str, str], None],
+    line_numbers: bool = False,
+) -> int:
+    """ Search `paths` across `jobs` processes, writing matches to `out` in
+    input order. Returns the total number of matching lines.
+    """
+    def work_items():
+        for each_path in paths:
+            prefix = each_path.encode("utf-8", "surrogateescape") + b":" if with_prefix else b""
+            yield each_path, prefix, line_numbers
+
+    write, flush = checked_output(out.write), checked_output(out.flush)
+    n_matched = 0
+    with ProcessPoolExecutor(max_workers=jobs, initializer=_init_worker, initargs=(pattern,)) as executor:
+        results = ordered_imap(executor, _search_file_in_worker, work_items(), jobs * IN_FLIGHT_PER_JOB)
+        for path, output, n_file_matched, error in results:
+            if error is not None:
+                flush()
+                on_error(path, error)
+                continue
+            write(output)
+            flush()
+            n_matched += n_file_matched
+    return n_matched
+
+
+def search_file_chunks_parallel(
+    pattern,
+    path: str,
+    jobs: int,
+    out: BinaryIO,
+    prefix: bytes = b"",
+    line_numbers: bool = False,
+    min_split_size: int = MIN_SPLIT_SIZE,
+) -> int:
+    """ Search one large file by splitting it into newline-aligned ranges
+    scanned in `jobs` processes; each maps the same file, so pages are shared.
+
+    Matches are written in file order and line numbers are rebuilt from the
+    per-range line counts. Small or non-regular files are scanned in-process.
+    Returns the number of matching lines.
+    """
+    emit = line_writer(out, prefix, line_numbers)
+    write, flush = checked_output(out.write), checked_output(out.flush)
+    with open(path, "rb") as file_obj:
+        file_stat = os.fstat(file_obj.fileno())
+        if not stat.S_ISREG(file_stat.st_mode) or file_stat.st_size < min_split_size:
+            return scan_file(
+                path, pattern.is_match_bytes, emit, required=pattern.required_bytes, searcher=buffer_searcher(pattern)
+            )
+        n_ranges = max(jobs * CHUNKS_PER_JOB, -(-file_stat.st_size // MAX_RANGE_SIZE))
+        with read_only_map(file_obj) as mapped:
+            ranges = split_newline_aligned(mapped, file_stat.st_size, n_ranges)
+
+    logger.debug(f"Scanning {path=} in {len(ranges)} ranges over {jobs} processes")
+    n_matched = 0
+    lines_before = 0
+    with ProcessPoolExecutor(max_workers=jobs, initializer=_init_worker, initargs=(pattern,)) as executor:
+        work_items = ((path, start, end, prefix, line_numbers) for start, end in ranges)
+        results = ordered_imap(executor, _scan_range_in_worker, work_items, jobs * RANGES_IN_FLIGHT_PER_JOB)
+        for output, numbers, n_range_matched, n_lines in results:
+            if numbers is not None:
+                output = b"".join(
+                    b"%s%d:%s\n" % (prefix, lines_before + line_number, line)
+                    for line_number, line in zip(numbers, output.split(NEWLINE))
+                )
+            write(output)
+            n_matched += n_range_matched
+            lines_before += n_lines
+            flush()
+    return n_matched
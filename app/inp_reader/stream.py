@@ -0,0 +1,196 @@
+import logging
+from typing import BinaryIO, Callable, Optional, Protocol, TypeVar, Union
+
+logger = logging.getLogger(__name__)
+
+# Large reads keep the per-call overhead negligible; memory stays bounded by
+# one chunk plus the longest line.
+CHUNK_SIZE = 1 << 20
+NEWLINE = b"\n"
+
+BytesLike = Union[bytes, bytearray, memoryview]
+LineMatcher = Callable[[BytesLike], bool]
+# Called with (line, 1-based line number)
+LineEmitter = Callable[[BytesLike, int], None]
+R = TypeVar("R")
+
+
+class WriteError(Exception):
+    """ Writing to the output failed, e.g. a closed pipe or a full disk; the
+    OSError is its `__cause__`. Not an OSError itself, so the handlers that
+    report an unreadable input file and carry on let it through.
+    """
+
+
+class BufferSearcher(Protocol):
+    """ Engine that searches a whole buffer at once instead of testing line
+    by line (`inp_reader.literal`, `inp_reader.vectorized`).
+    """
+    # Smaller buffers are left to the line-by-line scan
+    min_size: int
+
+    def scan(
+        self, buffer: BytesLike, start: int, end: int, emit: LineEmitter, first_line_number: int = 1
+    ) -> Optional[tuple[int, int]]:
+        """ Same contract as `scan_buffer`, or None to decline the buffer.
+        """
+
+
+# Newlines in skipped regions are counted in windows of this size, so a
+# mapped file is never copied whole
+COUNT_WINDOW = 1 << 20
+
+
+def count_lines(buffer: BytesLike, start: int, end: int) -> int:
+    """ Number of lines in `buffer[start:end]`, counting a final unterminated one.
+    """
+    n_lines = 0
+    for window_start in range(start, end, COUNT_WINDOW):
+        n_lines += buffer[window_start:min(end, window_start + COUNT_WINDOW)].count(NEWLINE)
+    if end > start and buffer[end - 1] != NEWLINE[0]:
+        n_lines += 1
+    return n_lines
+
+
+def scan_buffer(
+    buffer: BytesLike,
+    start: int,
+    end: int,
+    matches: LineMatcher,
+    emit: LineEmitter,
+    first_line_number: int = 1,
+    required: bytes = b"",
+    searcher: Optional[BufferSearcher] = None,
+) -> tuple[int, int]:
+    """ Run `matches` over every line in `buffer[start:end]`; a final newline
+    terminates the last line rather than starting an empty one.
+
+    Lines are handed out as memoryview slices of `buffer`, never copied.
+    With `required`, lines that don't contain it are skipped over with
+    `buffer.find` and never reach `matches`. A `searcher` takes over
+    buffers of at least its `min_size`, unless it declines them.
+    Returns (number of matching lines, number of lines scanned).
+    """
+    if searcher is not None and end - start >= searcher.min_size:
+        counts = searcher.scan(buffer, start, end, emit, first_line_number)
+        if counts is not None:
+            return counts
+    view = memoryview(buffer)
+    n_matched = 0
+    line_number = first_line_number
+    pos = start
+    while pos < end:
+        if required:
+            hit = buffer.find(required, pos, end)
+            if hit < 0:
+                line_number += count_lines(buffer, pos, end)
+                break
+            newline_before = buffer.rfind(NEWLINE, pos, hit)
+            line_start = pos if newline_before < 0 else newline_before + 1
+            line_number += count_lines(buffer, pos, line_start)
+            pos = line_start
+
+        newline_at = buffer.find(NEWLINE, pos, end)
+        line_end = end if newline_at < 0 else newline_at
+        line = view[pos:line_end]
+        if matches(line):
+            emit(line, line_number)
+            n_matched += 1
+        line_number += 1
+        pos = line_end + 1
+    return n_matched, line_number - first_line_number
+
+
+def scan_stream(
+    stream: BinaryIO,
+    matches: LineMatcher,
+    emit: LineEmitter,
+    chunk_size: int = CHUNK_SIZE,
+    flush: Callable[[], None] = lambda: None,
+    required: bytes = b"",
+    searcher: Optional[BufferSearcher] = None,
+) -> int:
+    """ Line-by-line scan of a binary stream, one large chunk at a time.
+
+    Only a line that straddles two chunks is copied, once, when its newline
+    arrives. `flush` runs after every chunk so matches show up while the
+    stream is still open.
+    Returns the number of matching lines.
+    """
+    read = getattr(stream, "read1", stream.read)
+    # Pieces of the line carried over from earlier chunks, joined only when
+    # it ends so a line spanning many chunks isn't copied over and over
+    pending: list[bytes] = []
+    n_matched = 0
+    line_number = 1
+
+    while True:
+        chunk = read(chunk_size)
+        if not chunk:
+            break
+
+        first_newline = chunk.find(NEWLINE)
+        if first_newline < 0:
+            pending.append(chunk)
+            continue
+
+        # Finish the line carried over from the previous chunks
+        if pending:
+            pending.append(chunk[:first_newline])
+            line = b"".join(pending)
+        else:
+            line = memoryview(chunk)[:first_newline]
+        if matches(line):
+            emit(line, line_number)
+            n_matched += 1
+        line_number += 1
+
+        last_newline = chunk.rfind(NEWLINE)
+        n_chunk_matched, n_lines = scan_buffer(
+            chunk, first_newline + 1, last_newline + 1, matches, emit, line_number, required, searcher
+        )
+        n_matched += n_chunk_matched
+        line_number += n_lines
+        pending = [chunk[last_newline + 1:]] if last_newline + 1 < len(chunk) else []
+        flush()
+
+    if pending:
+        last_line = b"".join(pending)
+        n_matched += scan_buffer(last_line, 0, len(last_line), matches, emit, line_number, required)[0]
+        flush()
+
+    return n_matched
+
+
+def line_writer(out: BinaryIO, prefix: bytes = b"", line_numbers: bool = False) -> LineEmitter:
+    """ Emitter writing each line back with its newline restored, after an
+    optional `prefix` such as `b"name.log:"` and, with `line_numbers`, the
+    GNU-style `b"42:"`.
+    """
+    write = out.write
+
+    def emit(line: BytesLike, line_number: int) -> None:
+        try:
+            if prefix:
+                write(prefix)
+            if line_numbers:
+                write(b"%d:" % line_number)
+            write(line)
+            write(NEWLINE)
+        except OSError as e:
+            raise WriteError(e.strerror) from e
+
+    return emit
+
+
+def checked_output(method: Callable[..., R]) -> Callable[..., R]:
+    """ `out.write`, `out.flush` and the like raising `WriteError` instead of
+    OSError, as `line_writer` does.
+    """
+    def call(*args):
+        try:
+            return method(*args)
+        except OSError as e:
+            raise WriteError(e.strerror) from e
+
+    return call
@@ -0,0 +1,67 @@
+import unittest
+import asyncio
+
+from inp_reader.async_stream import afilter
+
+
+class TestAsyncFilter(unittest.IsolatedAsyncioTestCase):
+    def _reader(self, data: bytes) -> asyncio.StreamReader:
+        reader = asyncio.StreamReader()
+        reader.feed_data(data)
+        reader.feed_eof()
+        return reader
+
+    async def _collect(self, data, pattern, **kwargs):
+        return [line async for line in afilter(self._reader(data), pattern, **kwargs)]
+
+    async def test_lines_across_chunks(self):
+        data = b"took 12ms\nok\nlonger line 7ms here\nno\n3ms"
+        expected = [b"took 12ms", b"longer line 7ms here", b"3ms"]
+        for chunk_size in (1, 4, 1 << 20):
+            self.assertEqual(await self._collect(data, r"\d+ms", chunk_size=chunk_size), expected, msg=chunk_size)
+
+    async def test_offloaded_to_executor(self):
+        from concurrent.futures import ThreadPoolExecutor
+        from inp_parser.parse import compile
+        data = b"".join(b"line %d\n" % each for each in range(5000))
+        with ThreadPoolExecutor(1) as executor:
+            found = await self._collect(data, compile("99"), executor=executor, offload_size=1)
+        self.assertEqual(len(found), sum(1 for each in range(5000) if "99" in str(each)))
+
+    async def test_offloaded_scans_use_their_own_pattern(self):
+        from concurrent.futures import ThreadPoolExecutor
+        from inp_parser.parse import compile
+        compiled = compile("99")
+        used = []
+
+        class RecordingExecutor(ThreadPoolExecutor):
+            def submit(self, fn, *args, **kwargs):
+                used.append(args[0])
+                return super().submit(fn, *args, **kwargs)
+
+        data = b"".join(b"line %d\n" % each for each in range(5000))
+        with RecordingExecutor(2) as executor:
+            results = await asyncio.gather(*(
+                self._collect(data, compiled, chunk_size=4096, executor=executor, offload_size=1) for _ in range(2)
+            ))
+        self.assertEqual(results[0], results[1])
+        # One copy per call, shared by that call's chunks only
+        self.assertEqual(len({id(pattern) for pattern in used}), 2)
+        self.assertNotIn(id(compiled), {id(pattern) for pattern in used})
+
+    async def test_long_lines(self):
+        data = b"x" * 5000 + b"\n" + b"y" * 5000 + b"x"
+        self.assertEqual(await self._collect(data, "x", chunk_size=64), [b"x" * 5000, b"y" * 5000 + b"x"])
+
+    async def test_subprocess_stream(self):
+        import sys
+        process = await asyncio.create_subprocess_exec(
+            sys.executable, "-c", "print('a1'); print('b'); print('c2')", stdout=asyncio.subprocess.PIPE
+        )
+        found = [line async for line in afilter(process.stdout, r"\d")]
+        await process.wait()
+        self.assertEqual(found, [b"a1", b"c2"])
+
+
+if __name__ == "__main__":
+    unittest.main(verbosity=2)
@@ -0,0 +1,43 @@
+import unittest
+
+from inp_reader.literal import LiteralSearcher, buffer_searcher
+
+
+class TestLiteralSearcher(unittest.TestCase):
+    def _scan(self, needle, data, first_line_number=1, **anchors):
+        found = []
+        counts = LiteralSearcher(needle, **anchors).scan(
+            data, 0, len(data), lambda line, n: found.append((n, bytes(line))), first_line_number
+        )
+        return found, counts
+
+    def test_lines_and_numbers(self):
+        found, counts = self._scan(b"err", b"ok\nerr one\nfine\n\nerr err\nlast", 10)
+        self.assertEqual(found, [(11, b"err one"), (14, b"err err")])
+        self.assertEqual(counts, (2, 6))
+
+    def test_agrees_with_line_scan(self):
+        import random
+        from inp_parser.parse import compile
+        from .stream import scan_buffer
+        rng = random.Random(3)
+        for pattern in ("ab", "^ab", "ab$", "^ab$"):
+            compiled = compile(pattern)
+            searcher = buffer_searcher(compiled)
+            for _ in range(100):
+                data = bytes(rng.choice(b"ab\n") for _ in range(rng.randint(0, 40)))
+                found, expected = [], []
+                counts = searcher.scan(data, 0, len(data), lambda l, n: found.append((n, bytes(l))))
+                reference = scan_buffer(
+                    data, 0, len(data), compiled.is_match_bytes, lambda l, n: expected.append((n, bytes(l)))
+                )
+                self.assertEqual((found, counts), (expected, reference), msg=(pattern, data))
+
+    def test_selected_for_plain_strings(self):
+        from inp_parser.parse import compile
+        self.assertIsInstance(buffer_searcher(compile(r"connection\.closed")), LiteralSearcher)
+        self.assertNotIsInstance(buffer_searcher(compile(r"a\d")), LiteralSearcher)
+
+
+if __name__ == "__main__":
+    unittest.main(verbosity=2)
@@ -0,0 +1,55 @@
+import unittest
+import os
+
+from inp_reader.mapped_file import scan_file
+
+
+class TestScanFile(unittest.TestCase):
+    def _scan(self, data, needle):
+        import tempfile
+        found = []
+        with tempfile.NamedTemporaryFile(delete=False) as tmp:
+            tmp.write(data)
+        try:
+            n_matched = scan_file(
+                tmp.name,
+                lambda line: needle in line.tobytes(),
+                lambda line, line_number: found.append(line.tobytes()),
+            )
+        finally:
+            os.unlink(tmp.name)
+        self.assertEqual(n_matched, len(found))
+        return found
+
+    def test_matching_lines(self):
+        self.assertEqual(self._scan(b"one\ntwo\nthree\n", b"o"), [b"one", b"two"])
+
+    def test_no_trailing_newline(self):
+        self.assertEqual(self._scan(b"one\ntwo", b"tw"), [b"two"])
+
+    def test_empty_file(self):
+        self.assertEqual(self._scan(b"", b""), [])
+
+    def test_errors_while_scanning_propagate(self):
+        import tempfile
+
+        def emit(line, line_number):
+            raise ZeroDivisionError
+
+        with tempfile.NamedTemporaryFile(delete=False) as tmp:
+            tmp.write(b"one\ntwo\n")
+        try:
+            # The slice handed to `emit` must not keep the mapping from closing
+            for required in (b"", b"two"):
+                with self.assertRaises(ZeroDivisionError):
+                    scan_file(tmp.name, bool, emit, required=required)
+        finally:
+            os.unlink(tmp.name)
+
+    def test_missing_file_raises(self):
+        with self.assertRaises(FileNotFoundError):
+            scan_file("/nonexistent/input.log", bool, print)
+
+
+if __name__ == "__main__":
+    unittest.main(verbosity=2)
@@ -0,0 +1,98 @@
+import unittest
+import io
+import os
+
+from inp_reader.parallel import (
+    ordered_imap,
+    search_file_chunks_parallel,
+    search_files_parallel,
+    split_newline_aligned,
+)
+
+
+class TestSearchFilesParallel(unittest.TestCase):
+    def test_output_in_input_order(self):
+        import os
+        import tempfile
+        from inp_parser.parse import compile
+
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            paths = []
+            for index in range(6):
+                path = os.path.join(tmp_dir, f"{index}.log")
+                with open(path, "wb") as file_obj:
+                    file_obj.write(b"skip\n" + f"hit {index}\n".encode() * (index % 3))
+                paths.append(path)
+            paths.append(os.path.join(tmp_dir, "missing.log"))
+
+            out = io.BytesIO()
+            errors = []
+            n_matched = search_files_parallel(
+                compile(r"hit \d"), paths, 2, out, True, lambda path, error: errors.append(path)
+            )
+
+        expected = b"".join(
+            f"{path}:hit {index}\n".encode() * (index % 3) for index, path in enumerate(paths[:-1])
+        )
+        self.assertEqual(out.getvalue(), expected)
+        self.assertEqual(n_matched, 6)
+        self.assertEqual(errors, [paths[-1]])
+
+    def test_chunked_file_keeps_order_and_line_numbers(self):
+        import tempfile
+        from inp_parser.parse import compile
+
+        lines = [f"line {n} {'hit' if n % 7 == 0 else 'miss'}".encode() for n in range(1, 500)]
+        with tempfile.NamedTemporaryFile(delete=False) as tmp:
+            tmp.write(b"\n".join(lines))
+        try:
+            out = io.BytesIO()
+            n_matched = search_file_chunks_parallel(
+                compile("hit"), tmp.name, 3, out, b"f:", line_numbers=True, min_split_size=0
+            )
+        finally:
+            os.unlink(tmp.name)
+
+        expected = b"".join(b"f:%d:%s\n" % (n, line) for n, line in enumerate(lines, 1) if b"hit" in line)
+        self.assertEqual(out.getvalue(), expected)
+        self.assertEqual(n_matched, len(lines) // 7)
+
+    def test_large_files_get_more_ranges_not_larger_ones(self):
+        import tempfile
+        from unittest import mock
+        from inp_parser.parse import compile
+        from inp_reader import parallel
+
+        lines = [f"line {n} {'hit' if n % 7 == 0 else 'miss'}".encode() for n in range(1, 500)]
+        with tempfile.NamedTemporaryFile(delete=False) as tmp:
+            tmp.write(b"\n".join(lines) + b"\n")
+        self.addCleanup(os.unlink, tmp.name)
+        out = io.BytesIO()
+        with mock.patch.object(parallel, "MAX_RANGE_SIZE", 100), mock.patch.object(
+            parallel, "ordered_imap", wraps=ordered_imap
+        ) as imap, mock.patch.object(parallel, "split_newline_aligned", wraps=split_newline_aligned) as split:
+            n_matched = search_file_chunks_parallel(compile("hit"), tmp.name, 2, out, min_split_size=0)
+
+        self.assertEqual(split.call_args.args[2], -(-os.path.getsize(tmp.name) // 100))
+        # The window stays the same however many ranges there are
+        self.assertEqual(imap.call_args.args[3], 2 * parallel.RANGES_IN_FLIGHT_PER_JOB)
+        self.assertEqual(out.getvalue(), b"".join(line + b"\n" for line in lines if b"hit" in line))
+        self.assertEqual(n_matched, len(lines) // 7)
+
+    def test_split_newline_aligned(self):
+        data = b"aa\nbbbb\nc\ndddddd\ne"
+        ranges = split_newline_aligned(data, len(data), 3)
+        self.assertEqual(b"".join(data[start:end] for start, end in ranges), data)
+        for start, _ in ranges:
+            self.assertTrue(start == 0 or data[start - 1:start] == b"\n")
+        self.assertEqual(split_newline_aligned(b"one line", 8, 4), [(0, 8)])
+
+    def test_ordered_imap_is_ordered(self):
+        from concurrent.futures import ThreadPoolExecutor
+        with ThreadPoolExecutor(max_workers=3) as executor:
+            results = list(ordered_imap(executor, pow, ((n, 2) for n in range(10)), window=2))
+        self.assertEqual(results, [n * n for n in range(10)])
+
+
+if __name__ == "__main__":
+    unittest.main(verbosity=2)
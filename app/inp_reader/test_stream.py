@@ -0,0 +1,91 @@
+import unittest
+
+from inp_reader.stream import count_lines, line_writer, scan_buffer, scan_stream
+
+
+class TestScanStream(unittest.TestCase):
+    def _scan(self, data, needle, chunk_size):
+        import io
+        found = []
+        n_matched = scan_stream(
+            io.BytesIO(data),
+            lambda line: needle in bytes(line),
+            lambda line, line_number: found.append((line_number, bytes(line))),
+            chunk_size=chunk_size,
+        )
+        self.assertEqual(n_matched, len(found))
+        return [line for _, line in found]
+
+    def test_line_numbers_across_chunks(self):
+        import io
+        found = []
+        scan_stream(
+            io.BytesIO(b"a\nb\n\na\nc\na"),
+            lambda line: bytes(line) == b"a",
+            lambda line, line_number: found.append(line_number),
+            chunk_size=3,
+        )
+        self.assertEqual(found, [1, 4, 6])
+
+    def test_scan_buffer_counts_lines(self):
+        counts = scan_buffer(b"x\ny\nx\n", 0, 6, lambda line: bytes(line) == b"x", lambda *_: None, 10)
+        self.assertEqual(counts, (2, 3))
+
+    def test_required_literal_skips_lines(self):
+        data = b"alpha\nbeta\nthe gamma ray\n\ndelta gamma\nomega"
+        checked, found = [], []
+        counts = scan_buffer(
+            data, 0, len(data),
+            lambda line: checked.append(bytes(line)) or True,
+            lambda line, line_number: found.append(line_number),
+            required=b"gamma",
+        )
+        self.assertEqual(checked, [b"the gamma ray", b"delta gamma"])
+        self.assertEqual(found, [3, 5])
+        self.assertEqual(counts, (2, 6))
+
+    def test_count_lines(self):
+        self.assertEqual(count_lines(b"a\nb\nc", 0, 5), 3)
+        self.assertEqual(count_lines(b"a\nb\n", 0, 4), 2)
+        self.assertEqual(count_lines(b"a\nb\n", 2, 2), 0)
+
+    def test_matching_lines_in_order(self):
+        data = b"alpha\nbeta\ngamma\nalphabet\n"
+        for chunk_size in (1, 3, 7, 1 << 10):
+            self.assertEqual(self._scan(data, b"alpha", chunk_size), [b"alpha", b"alphabet"])
+
+    def test_last_line_without_newline(self):
+        self.assertEqual(self._scan(b"one\ntwo", b"two", 2), [b"two"])
+
+    def test_line_longer_than_chunk(self):
+        long_line = b"x" * 50 + b"needle" + b"y" * 50
+        self.assertEqual(self._scan(b"a\n" + long_line + b"\nb\n", b"needle", 8), [long_line])
+
+    def test_last_line_longer_than_chunk(self):
+        long_line = b"x" * 50 + b"needle"
+        self.assertEqual(self._scan(b"a\n" + long_line, b"needle", 8), [long_line])
+
+    def test_empty_lines_are_scanned(self):
+        self.assertEqual(self._scan(b"\n\nx\n", b"", 2), [b"", b"", b"x"])
+
+    def test_empty_stream(self):
+        self.assertEqual(self._scan(b"", b"", 4), [])
+
+    def test_line_writer_restores_newlines(self):
+        import io
+        out = io.BytesIO()
+        emit = line_writer(out)
+        emit(memoryview(b"abc"), 1)
+        emit(b"", 2)
+        self.assertEqual(out.getvalue(), b"abc\n\n")
+
+    def test_line_writer_prefix(self):
+        import io
+        out = io.BytesIO()
+        line_writer(out, b"a.log:")(b"hit", 3)
+        line_writer(out, b"a.log:", line_numbers=True)(b"hit", 3)
+        self.assertEqual(out.getvalue(), b"a.log:hit\na.log:3:hit\n")
+
+
+if __name__ == "__main__":
+    unittest.main(verbosity=2)
@@ -0,0 +1,102 @@
+import unittest
+
+from inp_reader.vectorized import (
+    ByteClassifier,
+    MATCH,
+    MIN_VECTOR_SIZE,
+    NO_MATCH,
+    VERIFY,
+    _load_numpy,
+    byte_classifier,
+    byte_lookup_table,
+    single_class,
+)
+
+
+class TestByteLookupTable(unittest.TestCase):
+    def _compile(self, pattern):
+        from inp_parser.parse import compile
+        return compile(pattern)
+
+    def test_single_class_patterns(self):
+        for pattern in (r"\d", r"\w+", "[a-f]", "[^,;]"):
+            self.assertIsNotNone(single_class(self._compile(pattern)), msg=pattern)
+        for pattern in ("a", r"\d*", r"\d\d", r"x\w", "[ab]|c"):
+            self.assertIsNone(single_class(self._compile(pattern)), msg=pattern)
+
+    def test_ascii_entries_and_verify(self):
+        lut = byte_lookup_table(single_class(self._compile(r"\d")))
+        self.assertEqual(lut[ord("7")], MATCH)
+        self.assertEqual(lut[ord("x")], NO_MATCH)
+        # Non-ASCII digits exist, so UTF-8 bytes need the scalar engine
+        self.assertEqual(lut[0xD9], VERIFY)
+        self.assertEqual(byte_lookup_table(single_class(self._compile("[a-f]")))[0xC3], NO_MATCH)
+        self.assertEqual(byte_lookup_table(single_class(self._compile("[^a-f]")))[ord("\n")], NO_MATCH)
+
+    def test_pattern_sets_never_qualify(self):
+        from inp_parser.parse import compile_patterns
+        self.assertIsNone(byte_classifier(compile_patterns(["foo", r"\d"])))
+
+
+class TestByteClassifier(unittest.TestCase):
+    def setUp(self):
+        # Not a class decorator: that would import NumPy along with this module
+        if _load_numpy() is None:
+            self.skipTest("NumPy is not installed")
+
+    def _scan(self, pattern, data):
+        from inp_parser.parse import compile
+        from .stream import scan_buffer
+        compiled = compile(pattern)
+        found, expected = [], []
+        result = byte_classifier(compiled, min_size=0, import_after=0).scan(data, 0, len(data), lambda l, n: found.append((n, bytes(l))))
+        reference = scan_buffer(data, 0, len(data), compiled.is_match_bytes, lambda l, n: expected.append((n, bytes(l))))
+        self.assertEqual(found, expected)
+        self.assertEqual(result, reference)
+        return found
+
+    def test_matches_scalar_scan(self):
+        data = "no digits\nline 42\n\nélan\n٣ arabic three\nlast 7".encode()
+        self.assertEqual([n for n, _ in self._scan(r"\d", data)], [2, 5, 6])
+        self._scan(r"\w+", data)
+        self._scan("[^a-z ]", data)
+        self._scan("[é]", data)
+
+    def test_piped_input_is_vectorized(self):
+        import os
+        import threading
+        from unittest import mock
+        from inp_parser.parse import compile
+        from .stream import scan_stream
+        compiled = compile(r"\d")
+        data = b"".join(b"line %d\n" % n if n % 3 else b"no digits here\n" for n in range(400_000))
+        read_fd, write_fd = os.pipe()
+
+        def write():
+            with os.fdopen(write_fd, "wb") as writer:
+                writer.write(data)
+
+        # A pipe hands out at most its 64 KiB buffer per read
+        writer_thread = threading.Thread(target=write)
+        writer_thread.start()
+        found = []
+        with os.fdopen(read_fd, "rb") as reader, mock.patch.object(
+            ByteClassifier, "_scan_block", autospec=True, side_effect=ByteClassifier._scan_block
+        ) as scan_block:
+            n_matched = scan_stream(
+                reader, compiled.is_match_bytes, lambda l, n: found.append(n), searcher=byte_classifier(compiled)
+            )
+        writer_thread.join()
+        self.assertGreater(len(data), MIN_VECTOR_SIZE)
+        self.assertGreater(scan_block.call_count, 0)
+        self.assertEqual(n_matched, sum(1 for n in range(400_000) if n % 3))
+        self.assertEqual(found[:3], [2, 3, 5])
+
+    def test_blocks_split_on_newlines(self):
+        from unittest import mock
+        with mock.patch("inp_reader.vectorized.BLOCK_SIZE", 7):
+            self._scan(r"\d", b"abc\nde1\nfghij9\n\nxyz\n2")
+
+
+if __name__ == "__main__":
+    unittest.main(verbosity=2)
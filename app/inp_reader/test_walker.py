@@ -0,0 +1,60 @@
+import unittest
+import os
+
+from inp_reader.walker import walk_files
+
+
+class TestWalkFiles(unittest.TestCase):
+    def setUp(self):
+        import tempfile
+        self._tmp = tempfile.TemporaryDirectory()
+        self.root = self._tmp.name
+        layout = {
+            "a.log": b"text\n",
+            "b.txt": b"text\n",
+            "bin.dat": b"abc\0def",
+            "sub/c.log": b"text\n",
+            "sub/deeper/d.log": b"text\n",
+            "skip/e.log": b"text\n",
+        }
+        for rel_path, data in layout.items():
+            path = os.path.join(self.root, rel_path)
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            with open(path, "wb") as file_obj:
+                file_obj.write(data)
+
+    def tearDown(self):
+        self._tmp.cleanup()
+
+    def _walk(self, **kwargs):
+        return sorted(os.path.relpath(path, self.root) for path in walk_files([self.root], **kwargs))
+
+    def test_walks_everything_but_binary(self):
+        self.assertEqual(
+            self._walk(),
+            ["a.log", "b.txt", "skip/e.log", "sub/c.log", "sub/deeper/d.log"],
+        )
+
+    def test_binary_kept_when_asked(self):
+        self.assertIn("bin.dat", self._walk(skip_binary=False))
+
+    def test_include_exclude_globs(self):
+        self.assertEqual(
+            self._walk(include=["*.log"], exclude=["d.*"], exclude_dirs=["skip"]),
+            ["a.log", "sub/c.log"],
+        )
+
+    def test_symlink_loops_visited_once(self):
+        os.symlink(self.root, os.path.join(self.root, "sub", "loop"))
+        self.assertEqual(len(self._walk()), 5)
+        self.assertEqual(len(self._walk(follow_symlinks=True)), 5)
+
+    def test_file_root_and_missing_root(self):
+        errors = []
+        found = list(walk_files([os.path.join(self.root, "a.log"), "/nonexistent"], on_error=lambda p, m: errors.append(p)))
+        self.assertEqual(found, [os.path.join(self.root, "a.log")])
+        self.assertEqual(errors, ["/nonexistent"])
+
+
+if __name__ == "__main__":
+    unittest.main(verbosity=2)
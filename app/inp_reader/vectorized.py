@@ -0,0 +1,173 @@
+import logging
+import os
+from typing import Optional
+
+from .stream import BytesLike, LineEmitter, LineMatcher, NEWLINE
+
+logger = logging.getLogger(__name__)
+
+# "0", "off" or "false" keeps the scalar scanner even when NumPy is installed
+NUMPY_ENV_VAR = "GREP_NUMPY"
+# Importing NumPy costs more than scanning a small input, so it waits until
+# this many bytes have come along, in one buffer or over a stream's chunks
+MIN_VECTOR_SIZE = 1 << 20
+# Smallest buffer worth a vectorized pass once NumPy is in; below a pipe's
+# 64 KiB reads, so piped input qualifies too
+MIN_BUFFER_SIZE = 16 << 10
+# Buffers are classified this many bytes at a time to bound the temporary arrays
+BLOCK_SIZE = 16 << 20
+
+# Lookup table values
+NO_MATCH = 0
+MATCH = 1
+# Part of a multi-byte UTF-8 character; the scalar engine decides
+VERIFY = 2
+
+QUANTIFIERS_KEEPING_CLASS = ((), (("OPERATOR", "+"),))
+
+_numpy = None
+
+
+def _load_numpy():
+    """ NumPy, imported on first use, or None when it isn't installed.
+    """
+    global _numpy
+    if _numpy is None:
+        try:
+            import numpy
+            _numpy = numpy
+        except ImportError:
+            _numpy = False
+    return _numpy or None
+
+
+def single_class(compiled) -> Optional[object]:
+    """ The CharClass of a pattern that is one class, optionally with `+`
+    (`\\d`, `\\w+`, `[a-f]`, `[^,;]`), else None. Such a pattern matches a
+    line exactly when one of the line's characters is in the class.
+    """
+    tokens = getattr(compiled, "tokens", ())
+    program = getattr(compiled, "program", None)
+    if not tokens or program is None or len(program.classes) != 1:
+        return None
+    if tokens[0][0] not in ("METACHAR", "MATCH_ANY_GROUP") or tuple(tokens[1:]) not in QUANTIFIERS_KEEPING_CLASS:
+        return None
+    return program.classes[0]
+
+
+def byte_lookup_table(char_class) -> bytes:
+    """ 256 entries, one per byte: ASCII bytes are answered by the class's
+    bitmap, and bytes of multi-byte characters need verifying when the
+    class can contain a non-ASCII character. The newline separates lines,
+    so it is never a candidate even for negated classes.
+    """
+    non_ascii = NO_MATCH if char_class.is_ascii_only else VERIFY
+    lut = bytearray(
+        (MATCH if char_class.bitmap[byte] else NO_MATCH) if byte < 0x80 else non_ascii
+        for byte in range(256)
+    )
+    lut[NEWLINE[0]] = NO_MATCH
+    return bytes(lut)
+
+
+class ByteClassifier:
+    """ Vectorized scan for single-class patterns.
+
+    Every byte of a block is classified at once through a 256-entry lookup
+    table and reduced per line, `np.flatnonzero` gives the candidate lines,
+    and only those whose sole candidates are bytes of non-ASCII characters
+    go through `verify` (the scalar engine).
+    """
+
+    def __init__(
+        self,
+        lut: bytes,
+        verify: LineMatcher,
+        min_size: int = MIN_BUFFER_SIZE,
+        import_after: int = MIN_VECTOR_SIZE,
+    ):
+        self.lut = lut
+        self.verify = verify
+        self.min_size = min_size
+        self.import_after = import_after
+        # Bytes offered so far, declined until they reach `import_after`
+        self.n_offered = 0
+
+    def scan(
+        self,
+        buffer: BytesLike,
+        start: int,
+        end: int,
+        emit: LineEmitter,
+        first_line_number: int = 1,
+    ) -> Optional[tuple[int, int]]:
+        """ Same contract as `scan_buffer`, or None when NumPy is missing or
+        too little input has come along yet to pay for importing it.
+        """
+        self.n_offered += end - start
+        if self.n_offered < self.import_after:
+            return None
+        np = _load_numpy()
+        if np is None:
+            return None
+        lut = np.frombuffer(self.lut, dtype=np.uint8)
+        view = memoryview(buffer)
+        n_matched = 0
+        line_number = first_line_number
+        block_start = start
+        while block_start < end:
+            block_end = min(end, block_start + BLOCK_SIZE)
+            if block_end < end:
+                # Blocks end on a line boundary
+                last_newline = buffer.rfind(NEWLINE, block_start, block_end)
+                if last_newline >= 0:
+                    block_end = last_newline + 1
+                else:
+                    next_newline = buffer.find(NEWLINE, block_end, end)
+                    block_end = end if next_newline < 0 else next_newline + 1
+            matched, n_lines = self._scan_block(np, lut, buffer, view, block_start, block_end, emit, line_number)
+            n_matched += matched
+            line_number += n_lines
+            block_start = block_end
+        return n_matched, line_number - first_line_number
+
+    def _scan_block(self, np, lut, buffer, view, start, end, emit, first_line_number) -> tuple[int, int]:
+        data = np.frombuffer(buffer, dtype=np.uint8, count=end - start, offset=start)
+        newlines = np.flatnonzero(data == NEWLINE[0])
+        # Each line's slice takes its newline along, which is never a candidate
+        line_starts = np.concatenate(([0], newlines + 1))
+        line_starts = line_starts[line_starts < len(data)]
+        n_lines = len(line_starts)
+        if not n_lines:
+            return 0, 0
+
+        classes = lut[data]
+        sure = np.logical_or.reduceat(classes == MATCH, line_starts)
+        maybe = np.logical_or.reduceat(classes == VERIFY, line_starts) & ~sure
+        line_ends = np.append(newlines, len(data))[:n_lines]
+
+        n_matched = 0
+        for line_index in np.flatnonzero(sure | maybe).tolist():
+            line = view[start + int(line_starts[line_index]):start + int(line_ends[line_index])]
+            if sure[line_index] or self.verify(line):
+                emit(line, first_line_number + line_index)
+                n_matched += 1
+        return n_matched, n_lines
+
+
+def byte_classifier(
+    compiled,
+    min_size: int = MIN_BUFFER_SIZE,
+    import_after: int = MIN_VECTOR_SIZE,
+) -> Optional[ByteClassifier]:
+    """ A `ByteClassifier` for `compiled` when it is a single-class pattern and
+    vectorizing is not switched off. It takes buffers of at least `min_size`
+    bytes, and NumPy itself is only imported once `import_after` bytes have
+    come along.
+    """
+    if os.environ.get(NUMPY_ENV_VAR, "").lower() in ("0", "off", "false"):
+        return None
+    char_class = single_class(compiled)
+    if char_class is None:
+        return None
+    return ByteClassifier(byte_lookup_table(char_class), compiled.is_match_bytes, min_size, import_after)
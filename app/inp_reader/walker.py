@@ -0,0 +1,126 @@
+import errno
+import logging
+import os
+import queue
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from fnmatch import fnmatch
+from typing import Callable, Iterable, Iterator
+
+logger = logging.getLogger(__name__)
+
+WALKER_THREADS = 8
+# A NUL byte in the first block marks a file as binary, as GNU grep does
+BINARY_SNIFF_SIZE = 8192
+
+ErrorCallback = Callable[[str, str], None]
+
+
+def is_binary_file(path: str) -> bool:
+    with open(path, "rb") as file_obj:
+        return b"\0" in file_obj.read(BINARY_SNIFF_SIZE)
+
+
+def _selected(name: str, include: Iterable[str], exclude: Iterable[str]) -> bool:
+    if include and not any(fnmatch(name, each_glob) for each_glob in include):
+        return False
+    return not any(fnmatch(name, each_glob) for each_glob in exclude)
+
+
+def walk_files(
+    roots: Iterable[str],
+    follow_symlinks: bool = False,
+    include: Iterable[str] = (),
+    exclude: Iterable[str] = (),
+    exclude_dirs: Iterable[str] = (),
+    skip_binary: bool = True,
+    on_error: ErrorCallback = lambda path, message: None,
+    n_threads: int = WALKER_THREADS,
+) -> Iterator[str]:
+    """ Yield the files under `roots` as soon as they are found.
+
+    Directories are listed with `os.scandir` on a thread pool, and binary
+    sniffing happens on the same threads, so the caller can start searching
+    before the walk is over. Files come out in discovery order. Globs apply
+    to base names, like GNU grep's --include/--exclude/--exclude-dir.
+    Symlinks are followed only for the roots themselves unless
+    `follow_symlinks` (-R) is set.
+    """
+    found: queue.SimpleQueue = queue.SimpleQueue()
+    done = object()
+    lock = threading.Lock()
+    # Starts at 1 for the roots themselves, so `done` can't be queued before they are all submitted
+    n_pending = 1
+    visited_dirs: set[tuple[int, int]] = set()
+
+    def wanted_file(path: str, name: str) -> bool:
+        if not _selected(name, include, exclude):
+            return False
+        if skip_binary:
+            try:
+                if is_binary_file(path):
+                    logger.debug(f"Skipping binary file :: {path=}")
+                    return False
+            except OSError as e:
+                on_error(path, e.strerror)
+                return False
+        return True
+
+    def first_visit(dir_stat: os.stat_result) -> bool:
+        key = (dir_stat.st_dev, dir_stat.st_ino)
+        with lock:
+            if key in visited_dirs:
+                return False
+            visited_dirs.add(key)
+            return True
+
+    def submit_dir(path: str) -> None:
+        nonlocal n_pending
+        with lock:
+            n_pending += 1
+        executor.submit(scan_dir, path)
+
+    def scan_dir(path: str) -> None:
+        try:
+            with os.scandir(path) as entries:
+                for entry in entries:
+                    try:
+                        if entry.is_dir(follow_symlinks=follow_symlinks):
+                            if _selected(entry.name, (), exclude_dirs) and (
+                                not follow_symlinks or first_visit(entry.stat())
+                            ):
+                                submit_dir(entry.path)
+                        elif entry.is_file(follow_symlinks=follow_symlinks):
+                            if wanted_file(entry.path, entry.name):
+                                found.put(entry.path)
+                    except OSError as e:
+                        on_error(entry.path, e.strerror)
+        except OSError as e:
+            on_error(path, e.strerror)
+        finally:
+            release()
+
+    def release() -> None:
+        nonlocal n_pending
+        with lock:
+            n_pending -= 1
+            if n_pending == 0:
+                found.put(done)
+
+    with ThreadPoolExecutor(max_workers=n_threads, thread_name_prefix="grep-walk") as executor:
+        for each_root in roots:
+            if os.path.isdir(each_root):
+                if first_visit(os.stat(each_root)):
+                    submit_dir(each_root)
+            elif os.path.exists(each_root):
+                if wanted_file(each_root, os.path.basename(each_root)):
+                    yield each_root
+            else:
+                on_error(each_root, os.strerror(errno.ENOENT))
+        release()
+
+        while True:
+            path = found.get()
+            if path is done:
+                return
+            yield path
@@ -1,23 +1,39 @@
+import os
 import sys
 import logging
-from inp_parser.parse import RegexParser
+from grep import run
 
 logger = logging.getLogger(__name__)
 
-def logging_config():
+DEBUG_ENV_VAR = "GREP_DEBUG"
+
+
+def debug_requested(argv: list[str]) -> bool:
+    """ Whether `--debug` was given or the environment asks for debug logs.
+    Separate from --trace, so the trace JSON on stderr stays parseable.
+    """
+    return "--debug" in argv or os.environ.get(DEBUG_ENV_VAR, "").lower() not in ("", "0", "false")
+
+def logging_config(level: int = logging.WARNING):
     logging.basicConfig(
-    level=logging.DEBUG,
+    level=level,
     format='%(asctime)s %(levelname)s %(filename)s:%(lineno)d %(funcName)s: %(message)s'
 )
 
 def main() -> None:
-    # Initialize logging
-    logging_config()
+    # Initialize logging; debug output is only paid for when asked for
+    logging_config(logging.DEBUG if debug_requested(sys.argv) else logging.WARNING)
 
     # You can use print statements as follows for debugging, they'll be visible when running tests.
     logger.info("Logs from your program will appear here!")
     logger.debug(f"DEBUG :: {sys.argv=}")
 
+    # `serve SOCKET` keeps a matcher process running instead of searching once
+    if len(sys.argv) == 3 and sys.argv[1] == "serve":
+        from server import serve
+        serve(sys.argv[2])
+        return
+
     # Parsing the command to determine the type of pattern
     # _filter_key: FilterKeyType = parse_command_to_identify_filter_type(sys.argv)  # Validate command
     
@@ -29,14 +45,9 @@ def main() -> None:
     #     input_line=sys.stdin.read()
     #     )
     logger.debug(f"{sys.argv=}")
-    _usr_input = sys.stdin.read().strip("\n")
-    logger.debug(f"{_usr_input=}")
-
-    parser = RegexParser()
-    parser.parse(
-        args=sys.argv, 
-        usr_input=_usr_input
-        )
+
+    # Stream stdin line by line instead of reading it all up front
+    sys.exit(run(sys.argv))
 
 
 if __name__ == "__main__":
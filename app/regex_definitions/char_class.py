@@ -0,0 +1,162 @@
+import logging
+from array import array
+from bisect import bisect_right
+from typing import Iterable
+
+logger = logging.getLogger(__name__)
+
+BITMAP_SIZE = 256
+
+# Unicode-aware character categories, by name so classes stay picklable
+CATEGORY_TESTS = {
+    "digit": str.isdigit,
+    "word": lambda char: char.isalnum() or char == "_",
+    "space": str.isspace,
+}
+
+# Escapes usable on their own or inside [...]
+ESCAPE_CATEGORIES = {
+    "d": ("digit", False),
+    "D": ("digit", True),
+    "w": ("word", False),
+    "W": ("word", True),
+    "s": ("space", False),
+    "S": ("space", True),
+}
+
+
+class CharClass:
+    """ A character class compiled once into lookup tables.
+
+    Code points below 256 are answered by a 256-entry bitmap with negation
+    already applied. Anything wider is checked against sorted, merged
+    [start, end] range arrays with `bisect`, then against the Unicode
+    categories (\\d, \\w, \\s) the class includes.
+    """
+    __slots__ = ("bitmap", "starts", "ends", "categories", "negated")
+
+    def __init__(self, ranges: Iterable[tuple[int, int]] = (), categories: Iterable[str] = (), negated: bool = False):
+        merged: list[list[int]] = []
+        for start, end in sorted(ranges):
+            if start > end:
+                # An inverted range like z-a matches nothing
+                continue
+            if merged and start <= merged[-1][1] + 1:
+                merged[-1][1] = max(merged[-1][1], end)
+            else:
+                merged.append([start, end])
+
+        self.starts = array("I", (start for start, _ in merged))
+        self.ends = array("I", (end for _, end in merged))
+        self.categories = tuple(sorted(set(categories)))
+        self.negated = negated
+        self.bitmap = bytes(
+            self._member(code_point) != negated for code_point in range(BITMAP_SIZE)
+        )
+
+    # ---------
+    @classmethod
+    def from_escape(cls, escape: str) -> "CharClass":
+        """ Class for a standalone escape such as `\\d` or `\\W`.
+        """
+        category, negated = ESCAPE_CATEGORIES[escape.lstrip("\\")]
+        return cls(categories=(category,), negated=negated)
+
+    @classmethod
+    def from_group(cls, group: str) -> "CharClass":
+        """ Class for a bracket expression such as `[a-z_0-9]` or `[^,;]`.
+
+        `]`, `\\`, `^` and `-` can be escaped with a backslash; `-` is also
+        literal first or last. `[]` matches nothing and `[^]` anything.
+        """
+        if not (group.startswith("[") and group.endswith("]")) or len(group) < 2:
+            raise ValueError(f"Invalid character group: {group}")
+        negated = group.startswith("[^")
+        body = group[2 if negated else 1:-1]
+
+        ranges: list[tuple[int, int]] = []
+        categories: list[str] = []
+        index = 0
+        while index < len(body):
+            char = body[index]
+            if char == "\\" and index + 1 < len(body):
+                index += 1
+                escaped = body[index]
+                if escaped in ESCAPE_CATEGORIES:
+                    category, category_negated = ESCAPE_CATEGORIES[escaped]
+                    if category_negated:
+                        raise ValueError(f"Negated escape \\{escaped} is not supported inside {group}")
+                    categories.append(category)
+                    index += 1
+                    continue
+                char = escaped
+            index += 1
+
+            # A '-' between two members makes a range
+            range_end = char
+            if index + 1 < len(body) and body[index] == "-":
+                if body[index + 1] != "\\":
+                    range_end = body[index + 1]
+                    index += 2
+                elif index + 2 < len(body):
+                    range_end = body[index + 2]
+                    index += 3
+            ranges.append((ord(char), ord(range_end)))
+
+        return cls(ranges, categories, negated)
+
+    @classmethod
+    def from_tables(cls, bitmap: bytes, starts: bytes, ends: bytes, categories: tuple, negated: bool) -> "CharClass":
+        """ Rebuild a class from the tables of an earlier one (see `tables`)
+        without recomputing the bitmap.
+        """
+        char_class = cls.__new__(cls)
+        char_class.bitmap = bytes(bitmap)
+        char_class.starts = array("I")
+        char_class.starts.frombytes(starts)
+        char_class.ends = array("I")
+        char_class.ends.frombytes(ends)
+        char_class.categories = tuple(categories)
+        char_class.negated = bool(negated)
+        return char_class
+
+    def tables(self) -> tuple[bytes, bytes, bytes, tuple, bool]:
+        return self.bitmap, self.starts.tobytes(), self.ends.tobytes(), self.categories, self.negated
+
+    # ---------
+    def _member(self, code_point: int) -> bool:
+        index = bisect_right(self.starts, code_point) - 1
+        if index >= 0 and code_point <= self.ends[index]:
+            return True
+        if self.categories:
+            char = chr(code_point)
+            return any(CATEGORY_TESTS[each](char) for each in self.categories)
+        return False
+
+    def __contains__(self, code_point: int) -> bool:
+        if code_point < BITMAP_SIZE:
+            return self.bitmap[code_point] == 1
+        return self._member(code_point) != self.negated
+
+    def matches(self, char: str) -> bool:
+        return ord(char) in self
+
+    @property
+    def is_ascii_only(self) -> bool:
+        """ True when no code point above 127 is a member.
+        """
+        return not self.negated and not self.categories and (not self.ends or self.ends[-1] < 128)
+
+    def __repr__(self):
+        ranges = ", ".join(f"{start}-{end}" for start, end in zip(self.starts, self.ends))
+        return f"CharClass([{ranges}], categories={self.categories}, negated={self.negated})"
+
+    def __getstate__(self):
+        return (
+            [(start, end) for start, end in zip(self.starts, self.ends)],
+            self.categories,
+            self.negated,
+        )
+
+    def __setstate__(self, state):
+        self.__init__(*state)
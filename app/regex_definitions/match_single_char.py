@@ -1,68 +1,11 @@
-import unittest
-import pyparsing as pp
 import logging
-from pyparsing import Char, ParseException
 
 logger = logging.getLogger(__name__)
 
-# Match any single character
-ANY_CHAR = Char(" ")
 
-def match_pattern(input_char: str) -> bool:
-    try:
-        ANY_CHAR.parseString(input_char, parse_all=True)
-        logger.info("Matching :: Single character pattern :: {input_char}, Found")
-        return True    
-    except ParseException:
-        return False
-    
-class TestMatchSingleChar(unittest.TestCase):
-
-    def test_single_char_pattern_found(self):
-        self.assertTrue(match_pattern("hello", "e"))
-
-    def test_single_char_pattern_not_found(self):
-        self.assertFalse(match_pattern("hello", "z"))
-
-    def test_single_char_pattern_at_start(self):
-        self.assertTrue(match_pattern("apple", "a"))
-
-    def test_single_char_pattern_at_end(self):
-        self.assertTrue(match_pattern("banana", "a"))
-
-    def test_single_char_pattern_multiple_occurrences(self):
-        self.assertTrue(match_pattern("banana", "n"))
-
-    def test_empty_input_line(self):
-        self.assertFalse(match_pattern("", "a"))
-
-    def test_empty_pattern_raises(self):
-        with self.assertRaises(RuntimeError):
-            match_pattern("hello", "")
-
-    def test_multi_char_pattern_raises(self):
-        with self.assertRaises(RuntimeError):
-            match_pattern("hello", "ll")
-
-    def test_pattern_is_space(self):
-        self.assertTrue(match_pattern("a b c", " "))
-
-    def test_pattern_is_special_char(self):
-        self.assertTrue(match_pattern("foo@bar", "@"))
-
-    def test_pattern_is_digit(self):
-        self.assertTrue(match_pattern("abc123", "1"))
-
-    def test_pattern_not_in_numeric_string(self):
-        self.assertFalse(match_pattern("12345", "a"))
-
-    def test_pattern_case_sensitive(self):
-        self.assertFalse(match_pattern("Hello", "h"))
-        self.assertTrue(match_pattern("Hello", "H"))
-
-    def test_pattern_unicode_char(self):
-        self.assertTrue(match_pattern("café", "é"))
-        self.assertFalse(match_pattern("cafe", "é"))
-
-if __name__ == "__main__":
-    unittest.main(verbosity=2)
\ No newline at end of file
+def match_pattern(input_line: str, search_pattern: str) -> bool:
+    """ Check if the single character `search_pattern` occurs in input_line.
+    """
+    if len(search_pattern) != 1:
+        raise RuntimeError(f"Expected a single character pattern, got {search_pattern=}")
+    return search_pattern in input_line
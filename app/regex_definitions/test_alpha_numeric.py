@@ -0,0 +1,39 @@
+import unittest
+
+from regex_definitions.alpha_numeric import match_alphanum
+
+
+class TestAlphaNumeric(unittest.TestCase):
+    def test_all_alphanumeric(self):
+        self.assertTrue(match_alphanum("abc123"))
+
+    def test_only_digits(self):
+        self.assertTrue(match_alphanum("123456"))
+
+    def test_only_letters(self):
+        self.assertTrue(match_alphanum("abcdef"))
+
+    def test_with_special_characters(self):
+        self.assertTrue(match_alphanum("abc123!@#"))
+        self.assertFalse(match_alphanum("$!?"))
+    
+    def test_with_underscore(self):
+        self.assertTrue(match_alphanum("÷×=_=+÷"))
+        self.assertTrue(match_alphanum("___"))
+        self.assertTrue(match_alphanum("_"))
+
+    def test_empty_string(self):
+        self.assertFalse(match_alphanum(""))
+
+    def test_with_spaces(self):
+        self.assertTrue(match_alphanum("abc 123"))
+
+    def test_single_alphanumeric(self):
+        self.assertTrue(match_alphanum("a"))
+        self.assertTrue(match_alphanum("1"))
+
+    def test_single_non_alphanumeric(self):
+        self.assertFalse(match_alphanum("!"))
+
+if __name__ == "__main__":
+    unittest.main(verbosity=2)
@@ -0,0 +1,73 @@
+import unittest
+
+from regex_definitions.char_class import CharClass
+
+
+class TestCharClass(unittest.TestCase):
+    def test_singles_and_ranges(self):
+        group = CharClass.from_group("[a-cx]")
+        self.assertTrue(all(group.matches(char) for char in "abcx"))
+        self.assertFalse(any(group.matches(char) for char in "dwyzA"))
+
+    def test_digits_and_punctuation(self):
+        group = CharClass.from_group("[0-9_.,;]")
+        self.assertTrue(all(group.matches(char) for char in "05_.,;"))
+        self.assertFalse(group.matches("a"))
+
+    def test_dash_and_escapes(self):
+        group = CharClass.from_group(r"[-a\]\\]")
+        self.assertTrue(all(group.matches(char) for char in "-a]\\"))
+        self.assertTrue(CharClass.from_group("[a-]").matches("-"))
+        self.assertFalse(CharClass.from_group("[a-]").matches("b"))
+
+    def test_negated(self):
+        group = CharClass.from_group("[^abc]")
+        self.assertFalse(group.matches("a"))
+        self.assertTrue(group.matches("d"))
+        self.assertTrue(group.matches("é"))
+
+    def test_non_ascii_ranges_use_bisect(self):
+        group = CharClass.from_group("[α-ωа-я]")
+        self.assertTrue(group.matches("β"))
+        self.assertTrue(group.matches("ж"))
+        self.assertFalse(group.matches("Ω"))
+
+    def test_escapes_inside_group(self):
+        group = CharClass.from_group(r"[\d_]")
+        self.assertTrue(group.matches("7"))
+        self.assertTrue(group.matches("_"))
+        self.assertTrue(group.matches("٣"))
+        self.assertFalse(group.matches("x"))
+
+    def test_standalone_escapes(self):
+        self.assertTrue(CharClass.from_escape(r"\w").matches("é"))
+        self.assertFalse(CharClass.from_escape(r"\w").matches("-"))
+        self.assertTrue(CharClass.from_escape(r"\D").matches("x"))
+        self.assertFalse(CharClass.from_escape(r"\D").matches("4"))
+
+    def test_empty_and_inverted(self):
+        self.assertFalse(CharClass.from_group("[]").matches("a"))
+        self.assertTrue(CharClass.from_group("[^]").matches("a"))
+        self.assertFalse(CharClass.from_group("[z-a]").matches("m"))
+
+    def test_ranges_are_merged(self):
+        group = CharClass.from_group("[a-dc-fx]")
+        self.assertEqual(list(group.starts), [ord("a"), ord("x")])
+        self.assertEqual(list(group.ends), [ord("f"), ord("x")])
+
+    def test_tables_round_trip(self):
+        group = CharClass.from_tables(*CharClass.from_group(r"[^a-zа-я\d]").tables())
+        self.assertFalse(group.matches("q"))
+        self.assertFalse(group.matches("ж"))
+        self.assertTrue(group.matches("!"))
+        self.assertTrue(group.matches("é"))
+
+    def test_pickle_round_trip(self):
+        import pickle
+        group = pickle.loads(pickle.dumps(CharClass.from_group(r"[^a-z\d]")))
+        self.assertFalse(group.matches("q"))
+        self.assertTrue(group.matches("!"))
+
+
+if __name__ == "__main__":
+    unittest.main(verbosity=2)
@@ -0,0 +1,42 @@
+import unittest
+
+from regex_definitions.negative_char_group import match_neg_char_group
+
+
+class TestNegativeCharGroup(unittest.TestCase):
+    def test_single_char_not_in_group(self):
+        self.assertTrue(match_neg_char_group("d", "[^abc]"))  # 'd' not in 'a','b','c'
+        self.assertTrue(match_neg_char_group("xyz", "[^abc]"))  # all not in group
+
+    def test_single_char_in_group(self):
+        self.assertFalse(match_neg_char_group("a", "[^abc]"))  # 'a' in group
+        self.assertFalse(match_neg_char_group("apple", "[^abc]"))  # 'a' in group
+        self.assertFalse(match_neg_char_group("cab", "[^abc]"))  # all in group
+
+    def test_char_range_not_in_group(self):
+        self.assertTrue(match_neg_char_group("z", "[^a-c]"))  # 'z' not in 'a-c'
+        self.assertTrue(match_neg_char_group("xyz", "[^a-c]"))  # all not in range
+
+    def test_char_range_in_group(self):
+        self.assertFalse(match_neg_char_group("a", "[^a-c]"))  # 'a' in range
+        self.assertFalse(match_neg_char_group("abc", "[^a-c]"))  # all in range
+
+    def test_mixed_group(self):
+        self.assertTrue(match_neg_char_group("m", "[^a-ce-g]"))  # 'm' not in group or ranges
+        self.assertFalse(match_neg_char_group("e", "[^a-ce-g]"))  # 'e' in range
+
+    def test_empty_input(self):
+        self.assertTrue(match_neg_char_group("", "[^abc]"))  # empty input should be True
+
+    def test_empty_pattern(self):
+        self.assertTrue(match_neg_char_group("abc", "[^]"))  # no exclusions, so always True
+
+    def test_non_alpha_characters(self):
+        self.assertTrue(match_neg_char_group("1", "[^a-c]"))  # '1' not in 'a-c'
+        self.assertTrue(match_neg_char_group("-", "[^a-c]"))  # '-' not in 'a-c'
+        self.assertFalse(match_neg_char_group("1.2", "[^0-9.]"))  # digits and punctuation as members
+        
+
+
+if __name__ == "__main__":
+    unittest.main(verbosity=2)
@@ -0,0 +1,56 @@
+import unittest
+
+from regex_definitions.positive_char_group import compile_char_group, match_char_group
+
+
+class TestPositiveCharGroup(unittest.TestCase):
+    def test_single_char_match(self):
+        self.assertTrue(match_char_group("a", "[a]"))
+        self.assertTrue(match_char_group("b", "[ab]"))
+        self.assertFalse(match_char_group("c", "[ab]"))
+
+    def test_char_range_match(self):
+        self.assertTrue(match_char_group("c", "[a-c]"))
+        self.assertTrue(match_char_group("b", "[a-c]"))
+        self.assertFalse(match_char_group("d", "[a-c]"))
+
+    def test_multiple_ranges_and_singles(self):
+        self.assertTrue(match_char_group("e", "[a-ce-g]"))
+        self.assertTrue(match_char_group("f", "[a-ce-g]"))
+        self.assertTrue(match_char_group("a", "[a-ce-g]"))
+        self.assertFalse(match_char_group("h", "[a-ce-g]"))
+
+    def test_overlapping_ranges(self):
+        self.assertTrue(match_char_group("d", "[a-dc-f]"))
+        self.assertTrue(match_char_group("e", "[a-dc-f]"))
+        self.assertFalse(match_char_group("g", "[a-dc-f]"))
+
+    def test_non_alpha_characters(self):
+        self.assertFalse(match_char_group("1", "[a-c]"))
+        self.assertFalse(match_char_group("-", "[a-c]"))
+
+    def test_empty_input(self):
+        self.assertFalse(match_char_group("", "[a-c]"))
+
+    def test_empty_pattern(self):
+        self.assertFalse(match_char_group("a", "[]"))
+
+    def test_multiple_input_chars(self):
+        self.assertTrue(match_char_group("xyz", "[x]"))
+        self.assertTrue(match_char_group("xyz", "[a-z]"))
+        self.assertFalse(match_char_group("123", "[a-z]"))
+
+    def test_digits_and_punctuation(self):
+        self.assertTrue(match_char_group("v2", "[0-9]"))
+        self.assertTrue(match_char_group("a,b", "[,;]"))
+        self.assertFalse(match_char_group("ab", "[0-9,;]"))
+
+    def test_compiled_once(self):
+        self.assertIs(compile_char_group("[a-f]"), compile_char_group("[a-f]"))
+
+    def test_invalid_range(self):
+        # Should not match, but also should not raise
+        self.assertFalse(match_char_group("a", "[z-a]"))
+
+if __name__ == "__main__":
+    unittest.main(verbosity=2)
@@ -0,0 +1,21 @@
+import unittest
+
+from regex_definitions.single_digit import match_digit
+
+
+class TestMatchAnyDigit(unittest.TestCase):
+    def test_contains_digits(self):
+        self.assertTrue(match_digit("abc123"))
+        self.assertTrue(match_digit("mixed123text"))
+        self.assertTrue(match_digit("1"))
+        self.assertTrue(match_digit("0abc"))
+
+    def test_no_digits(self):
+        self.assertFalse(match_digit("no digits here"))
+        self.assertFalse(match_digit("!@#$%^&*()"))
+        self.assertFalse(match_digit(""))
+        self.assertFalse(match_digit("abcdef"))
+        self.assertFalse(match_digit("a"))
+
+if __name__ == "__main__":
+    unittest.main(verbosity=2)
@@ -0,0 +1,82 @@
+import logging
+from collections import deque
+from typing import Iterable, Union
+
+logger = logging.getLogger(__name__)
+
+BytesLike = Union[bytes, bytearray, memoryview]
+
+
+class AhoCorasick:
+    """ Automaton answering "does the input contain any of these byte strings"
+    in one pass, however many strings there are.
+
+    States are trie nodes. `_goto[state]` maps a byte to the next node and
+    `_fail[state]` is the node for the longest proper suffix that is also a
+    trie path. A node accepts when it, or anything on its fail chain, ends a
+    needle.
+    """
+
+    def __init__(self, needles: Iterable[BytesLike]):
+        self._goto: list[dict[int, int]] = [{}]
+        self._accepting: list[bool] = [False]
+        self._shortest = None
+        for needle in needles:
+            self._add(bytes(needle))
+        self._fail = self._link()
+
+    def _add(self, needle: bytes) -> None:
+        state = 0
+        for byte in needle:
+            following = self._goto[state].get(byte)
+            if following is None:
+                following = len(self._goto)
+                self._goto.append({})
+                self._accepting.append(False)
+                self._goto[state][byte] = following
+            state = following
+        self._accepting[state] = True
+        if self._shortest is None or len(needle) < self._shortest:
+            self._shortest = len(needle)
+
+    def _link(self) -> list[int]:
+        """ Fail links, breadth first so a node's suffix is linked before it.
+        """
+        fail = [0] * len(self._goto)
+        pending = deque(self._goto[0].values())
+        while pending:
+            state = pending.popleft()
+            self._accepting[state] = self._accepting[state] or self._accepting[fail[state]]
+            for byte, following in self._goto[state].items():
+                pending.append(following)
+                suffix = fail[state]
+                while suffix and byte not in self._goto[suffix]:
+                    suffix = fail[suffix]
+                fail[following] = self._goto[suffix].get(byte, 0)
+        return fail
+
+    # ---------
+    def __len__(self) -> int:
+        return len(self._goto)
+
+    def contains(self, data: BytesLike) -> bool:
+        """ Whether any needle occurs in `data`.
+        """
+        if self._shortest is None:
+            return False
+        if self._accepting[0]:
+            # An empty needle occurs everywhere
+            return True
+        if len(data) < self._shortest:
+            return False
+        goto, fail, accepting = self._goto, self._fail, self._accepting
+        state = 0
+        for byte in data:
+            transitions = goto[state]
+            while byte not in transitions and state:
+                state = fail[state]
+                transitions = goto[state]
+            state = transitions.get(byte, 0)
+            if accepting[state]:
+                return True
+        return False
@@ -0,0 +1,280 @@
+import logging
+from operator import itemgetter
+from typing import Callable, Optional, Sequence
+
+from .compiler import (
+    Program,
+    NEWLINE,
+    OP_ANY,
+    OP_BACKREF,
+    OP_BOL,
+    OP_CHAR,
+    OP_CLASS,
+    OP_EOL,
+    OP_JMP,
+    OP_MATCH,
+    OP_SAVE,
+    OP_SPLIT,
+)
+from .pike_vm import Slots
+
+logger = logging.getLogger(__name__)
+
+
+def _loop_splits(program: Program) -> dict[int, int]:
+    """ Index of each SPLIT that decides whether a loop goes round again:
+    the one ending `x+` (it jumps back) and the one a `x*` jumps back to.
+    """
+    ops, arg_x = program.ops, program.arg_x
+    loops = {}
+    for pc, op in enumerate(ops):
+        if op == OP_SPLIT and arg_x[pc] < pc:
+            loops.setdefault(pc, len(loops))
+        elif op == OP_JMP and arg_x[pc] < pc and ops[arg_x[pc]] == OP_SPLIT:
+            loops.setdefault(arg_x[pc], len(loops))
+    return loops
+
+
+def _live_slots(program: Program) -> list[tuple[int, ...]]:
+    """ For each pc, the slots some backreference may still read before a
+    SAVE overwrites them. Only those can change what happens from there.
+    """
+    ops, arg_x, arg_y = program.ops, program.arg_x, program.arg_y
+    live: list[frozenset] = [frozenset()] * len(ops)
+    changed = True
+    while changed:
+        changed = False
+        for pc in range(len(ops) - 1, -1, -1):
+            op = ops[pc]
+            if op == OP_MATCH:
+                continue
+            if op == OP_SPLIT:
+                slots = live[arg_x[pc]] | live[arg_y[pc]]
+            elif op == OP_JMP:
+                slots = live[arg_x[pc]]
+            elif op == OP_SAVE:
+                slots = live[pc + 1] - {arg_x[pc]}
+            elif op == OP_BACKREF:
+                slots = live[pc + 1] | {2 * arg_x[pc], 2 * arg_x[pc] + 1}
+            else:
+                slots = live[pc + 1]
+            if slots != live[pc]:
+                live[pc] = slots
+                changed = True
+    return [tuple(sorted(each)) for each in live]
+
+
+def _first_steps(program: Program, start: int = 0) -> Optional[list[tuple[int, int]]]:
+    """ The (op, x) of every instruction that can consume the first code
+    point of a match (of the rest of one, from `start`), or None when it
+    may be empty.
+    """
+    ops, arg_x, arg_y = program.ops, program.arg_x, program.arg_y
+    steps = []
+    seen = set()
+    stack = [start]
+    while stack:
+        pc = stack.pop()
+        if pc in seen:
+            continue
+        seen.add(pc)
+        op = ops[pc]
+        if op in (OP_CHAR, OP_CLASS, OP_ANY):
+            steps.append((op, arg_x[pc]))
+        elif op == OP_SPLIT:
+            stack.extend((arg_x[pc], arg_y[pc]))
+        elif op == OP_JMP:
+            stack.append(arg_x[pc])
+        elif op in (OP_SAVE, OP_BOL):
+            stack.append(pc + 1)
+        else:
+            # MATCH, and EOL or a backreference, which can match empty
+            return None
+    return steps
+
+
+def _consumes(program: Program, steps: list[tuple[int, int]], code: int) -> bool:
+    classes = program.classes
+    for op, x in steps:
+        if op == OP_CHAR and code == x or op == OP_CLASS and code in classes[x] or op == OP_ANY and code != NEWLINE:
+            return True
+    return False
+
+
+# What a guarded SPLIT does with a code point: which branches can take it
+TAKE_NEITHER = 0
+TAKE_X = 1
+TAKE_Y = 2
+TAKE_BOTH = 3
+
+
+class Backtracker:
+    """ Capturing matcher for programs with OP_BACKREF, which the Pike VM
+    and the DFA can't run.
+
+    Depth-first, preferred branch first, so the first MATCH reached is the
+    leftmost-first one. As in Python's re, a loop whose body just matched
+    the empty string exits instead of going round again. Backreferences
+    aren't regular, so unlike the VM this can take time exponential in the
+    pattern; callers only run it on lines the capture-free program has
+    already accepted.
+    """
+
+    def __init__(self, program: Program):
+        self._program = program
+        self._loops = _loop_splits(program)
+        # What a SPLIT's memo key takes from the slots: only the live ones, so
+        # states differing in a finished group or the match start are one state
+        self._live_getters: list[Optional[Callable]] = [
+            itemgetter(*live) if live else None for live in _live_slots(program)
+        ]
+        self._empty_slots = (-1,) * program.n_slots
+        self._first_steps = _first_steps(program)
+        # SPLITs both of whose branches start by consuming a code point, with
+        # the first steps of each. When only one branch can take the next code
+        # point the other is never pushed: `\w+ ` leaves its loop at the
+        # space without trying every shorter word first
+        self._guards: list[Optional[tuple]] = [None] * len(program)
+        # Per guarded SPLIT, the TAKE_* for each code point seen there
+        self._choices: list[Optional[dict[int, int]]] = [None] * len(program)
+        for pc, op in enumerate(program.ops):
+            if op == OP_SPLIT:
+                x_steps = _first_steps(program, program.arg_x[pc])
+                y_steps = _first_steps(program, program.arg_y[pc])
+                if x_steps is not None and y_steps is not None:
+                    self._guards[pc] = (x_steps, y_steps)
+                    self._choices[pc] = {}
+        # Whether a match can begin with a code point, filled in as they're seen
+        self._starts: dict[int, bool] = {}
+
+    def search(self, codes: Sequence[int], start: int = 0, anchored: bool = False) -> Optional[Slots]:
+        """ Slots of the leftmost-first match at or after `start`. Positions
+        whose code point no match begins with never set up a search.
+        """
+        last = start if anchored else len(codes)
+        if self._first_steps is not None:
+            # Every match consumes at least one code point
+            last = min(last, len(codes) - 1)
+        # Shared by every start: a state seen before led to no match then, and
+        # nothing outside its key can make it lead to one now
+        return self._run(codes, start, last, set())
+
+    def _choice(self, pc: int, code: int) -> int:
+        x_steps, y_steps = self._guards[pc]
+        choice = TAKE_X if _consumes(self._program, x_steps, code) else TAKE_NEITHER
+        if _consumes(self._program, y_steps, code):
+            choice |= TAKE_Y
+        self._choices[pc][code] = choice
+        return choice
+
+    def _run(self, codes: Sequence[int], first: int, last: int, visited: set) -> Optional[Slots]:
+        """ Depth-first from each start in `first..last` in turn. `marks`
+        holds the position each loop last decided at. What can still happen
+        from a thread depends only on its pc, position, live slots and marks,
+        so a SPLIT (every branch and cycle goes through one) expands each such
+        state once.
+        """
+        program, loops, live_getters, all_choices = self._program, self._loops, self._live_getters, self._choices
+        ops, arg_x, arg_y, classes = program.ops, program.arg_x, program.arg_y, program.classes
+        first_steps, starts = self._first_steps, self._starts
+        empty_slots, empty_marks = self._empty_slots, (-1,) * len(loops)
+        n_codes = len(codes)
+        stack = []
+        while True:
+            if not stack:
+                # Positions whose code point no match begins with are skipped
+                while first <= last and first_steps is not None:
+                    can_start = starts.get(codes[first])
+                    if can_start is None:
+                        can_start = starts[codes[first]] = _consumes(program, first_steps, codes[first])
+                    if can_start:
+                        break
+                    first += 1
+                if first > last:
+                    return None
+                stack.append((0, first, empty_slots, empty_marks))
+                first += 1
+            pc, pos, slots, marks = stack.pop()
+            while True:
+                op = ops[pc]
+                if op == OP_CHAR:
+                    if pos >= n_codes or codes[pos] != arg_x[pc]:
+                        break
+                    pc, pos = pc + 1, pos + 1
+                elif op == OP_CLASS:
+                    if pos >= n_codes or codes[pos] not in classes[arg_x[pc]]:
+                        break
+                    pc, pos = pc + 1, pos + 1
+                elif op == OP_ANY:
+                    if pos >= n_codes or codes[pos] == NEWLINE:
+                        break
+                    pc, pos = pc + 1, pos + 1
+                elif op == OP_SPLIT:
+                    choice = TAKE_BOTH
+                    choices = all_choices[pc]
+                    if choices is not None:
+                        if pos >= n_codes:
+                            break
+                        choice = choices.get(codes[pos])
+                        if choice is None:
+                            choice = self._choice(pc, codes[pos])
+                        if choice == TAKE_NEITHER:
+                            break
+                    live = live_getters[pc]
+                    # A state with live slots rarely comes round again unless
+                    # it branches; one without is often reached from the next start too
+                    if choice == TAKE_BOTH or live is None:
+                        state = (pc, pos, None if live is None else live(slots), marks)
+                        if state in visited:
+                            break
+                        visited.add(state)
+                    loop = loops.get(pc)
+                    if loop is not None:
+                        if marks[loop] == pos:
+                            pc = arg_y[pc]
+                            continue
+                        marks = marks[:loop] + (pos,) + marks[loop + 1:]
+                    if choice == TAKE_BOTH:
+                        stack.append((arg_y[pc], pos, slots, marks))
+                        pc = arg_x[pc]
+                    else:
+                        pc = arg_x[pc] if choice == TAKE_X else arg_y[pc]
+                elif op == OP_JMP:
+                    pc = arg_x[pc]
+                elif op == OP_SAVE:
+                    slots = slots[:arg_x[pc]] + (pos,) + slots[arg_x[pc] + 1:]
+                    pc += 1
+                elif op == OP_BOL:
+                    if pos != 0:
+                        break
+                    pc += 1
+                elif op == OP_EOL:
+                    if pos != n_codes:
+                        break
+                    pc += 1
+                elif op == OP_BACKREF:
+                    start, end = slots[2 * arg_x[pc]], slots[2 * arg_x[pc] + 1]
+                    # A group that took no part in the match matches nothing, not ""
+                    if start < 0 or end < 0:
+                        break
+                    following = pos + end - start
+                    if following > n_codes or codes[pos:following] != codes[start:end]:
+                        break
+                    pc, pos = pc + 1, following
+                elif op == OP_MATCH:
+                    return slots
+                else:
+                    raise RuntimeError(f"Unhandled opcode: {op}")
+
+
+def backtrack_search(
+    program: Program,
+    codes: Sequence[int],
+    start: int = 0,
+    anchored: bool = False,
+) -> Optional[Slots]:
+    """ Leftmost-first match of a capturing `program` over `codes` from
+    `start`: `pike_search` plus OP_BACKREF. Build a `Backtracker` once
+    instead when running the same program over many lines.
+    """
+    return Backtracker(program).search(codes, start, anchored)
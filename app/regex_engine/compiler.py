@@ -0,0 +1,342 @@
+import logging
+from array import array
+from dataclasses import dataclass
+from typing import Optional
+
+from regex_definitions.char_class import CharClass
+
+logger = logging.getLogger(__name__)
+
+# ---- Opcodes ---- #
+OP_CHAR = 0    # x: code point
+OP_CLASS = 1   # x: index into Program.classes
+OP_ANY = 2     # any code point except newline
+OP_SPLIT = 3   # fork to x (preferred) and y
+OP_JMP = 4     # x: target pc
+OP_SAVE = 5    # x: slot index
+OP_MATCH = 6
+OP_BOL = 7     # zero-width: only at the start of the line
+OP_EOL = 8     # zero-width: only at the end of the line
+OP_BACKREF = 9 # x: group number; the text that group captured, again
+
+# Bump whenever opcodes, Program, CharClass tables or tokens change, so
+# on-disk caches of compiled patterns are invalidated
+ENGINE_VERSION = 4
+
+# Counted repetition is unrolled, so both bounds are capped (as RE2 does)
+MAX_REPEAT = 1000
+MAX_PROGRAM_SIZE = 1 << 16
+
+OPCODE_NAMES = ("CHAR", "CLASS", "ANY", "SPLIT", "JMP", "SAVE", "MATCH", "BOL", "EOL", "BACKREF")
+
+NEWLINE = ord("\n")
+
+
+@dataclass(frozen=True)
+class Program:
+    """ Thompson NFA laid out as parallel arrays, one entry per instruction.
+    """
+    ops: array
+    arg_x: array
+    arg_y: array
+    classes: tuple[CharClass, ...]
+    n_slots: int
+
+    def __len__(self) -> int:
+        return len(self.ops)
+
+    def dump(self) -> str:
+        lines = []
+        for pc, op in enumerate(self.ops):
+            lines.append(f"{pc:4d} {OPCODE_NAMES[op]:<6} {self.arg_x[pc]} {self.arg_y[pc]}")
+        return "\n".join(lines)
+
+
+def counted_repeat(value: str) -> tuple[int, Optional[int]]:
+    """ (min, max) of a `{m}`, `{m,}` or `{m,n}` quantifier; max None is unbounded.
+    """
+    low, comma, high = value[1:-1].partition(",")
+    min_count = int(low)
+    max_count = min_count if not comma else (int(high) if high else None)
+    if max_count is not None and max_count < min_count:
+        raise ValueError(f"Bad repetition {value}: min is greater than max")
+    if max(min_count, max_count or 0) > MAX_REPEAT:
+        raise ValueError(f"Bad repetition {value}: counts are limited to {MAX_REPEAT}")
+    return min_count, max_count
+
+
+# ---- Tokens -> syntax tree ---- #
+class _TokenParser:
+    """ Recursive descent over `parse_regex_tokens` output.
+
+    Nodes are plain tuples: ("char", cp), ("class", CharClass), ("any",),
+    ("bol",), ("eol",), ("cat", items), ("alt", branches),
+    ("repeat", node, min, max), ("group", node, number),
+    ("backref", number) and ("empty",). Groups are numbered from 1 in the
+    order of their '('.
+    """
+
+    QUANTIFIERS = {"*": (0, None), "+": (1, None), "?": (0, 1)}
+
+    def __init__(self, tokens: list[tuple[str, str]]):
+        self._tokens = tokens
+        self._pos = 0
+        # Closed groups by number; a backreference may only name one of these
+        self.groups: dict[int, tuple] = {}
+        self._n_groups = 0
+
+    def parse(self) -> tuple:
+        node = self._parse_alternation()
+        if self._pos < len(self._tokens):
+            raise ValueError(f"Unbalanced ')' at token {self._pos}")
+        return node
+
+    def _peek(self) -> Optional[tuple[str, str]]:
+        return self._tokens[self._pos] if self._pos < len(self._tokens) else None
+
+    def _parse_alternation(self) -> tuple:
+        branches = [self._parse_concatenation()]
+        while self._peek() == ("OPERATOR", "|"):
+            self._pos += 1
+            branches.append(self._parse_concatenation())
+        return branches[0] if len(branches) == 1 else ("alt", tuple(branches))
+
+    def _parse_concatenation(self) -> tuple:
+        items = []
+        while True:
+            token = self._peek()
+            if token is None or token == ("OPERATOR", "|") or token == ("MATCH_ALL_GROUP", ")"):
+                break
+            items.append(self._parse_repeat())
+        if not items:
+            return ("empty",)
+        return items[0] if len(items) == 1 else ("cat", tuple(items))
+
+    def _parse_repeat(self) -> tuple:
+        node = self._parse_atom()
+        while True:
+            token = self._peek()
+            if token is None or token[0] != "OPERATOR":
+                return node
+            if token[1] in self.QUANTIFIERS:
+                min_count, max_count = self.QUANTIFIERS[token[1]]
+            elif token[1].startswith("{"):
+                min_count, max_count = counted_repeat(token[1])
+            else:
+                return node
+            self._pos += 1
+            node = ("repeat", node, min_count, max_count)
+
+    def _parse_atom(self) -> tuple:
+        token_type, value = self._tokens[self._pos]
+        self._pos += 1
+
+        if token_type == "LITERAL":
+            return ("char", ord(value))
+        elif token_type == "METACHAR":
+            return ("class", CharClass.from_escape(value))
+        elif token_type == "MATCH_ANY_GROUP":
+            return ("class", CharClass.from_group(value))
+        elif token_type == "OPERATOR" and value == ".":
+            return ("any",)
+        elif token_type == "ANCHOR":
+            return ("bol",) if value == "^" else ("eol",)
+        elif token_type == "OPERATOR":
+            raise ValueError(f"Nothing to repeat before {value!r}")
+        elif token_type == "MATCH_ALL_GROUP" and value == "(":
+            self._n_groups += 1
+            number = self._n_groups
+            node = self._parse_alternation()
+            if self._peek() != ("MATCH_ALL_GROUP", ")"):
+                raise ValueError("Missing ')'")
+            self._pos += 1
+            self.groups[number] = node
+            return ("group", node, number)
+        elif token_type == "BACKREF":
+            if int(value) not in self.groups:
+                raise ValueError(f"Invalid group reference \\{value}: no such closed group")
+            return ("backref", int(value))
+        elif token_type == "ERROR":
+            raise ValueError(f"Invalid regex near: {value}")
+
+        raise RuntimeError(f"Unhandled token type: {token_type} {value}")
+
+
+# ---- Syntax tree -> bytecode ---- #
+class _Emitter:
+    def __init__(self, captures: bool = False):
+        self.captures = captures
+        self.ops: list[int] = []
+        self.arg_x: list[int] = []
+        self.arg_y: list[int] = []
+        self.classes: list[CharClass] = []
+        # Unrolled copies of a repeated class share one entry in `classes`
+        self._class_index: dict[int, int] = {}
+
+    def emit(self, op: int, x: int = 0, y: int = 0) -> int:
+        if len(self.ops) >= MAX_PROGRAM_SIZE:
+            raise ValueError(f"Pattern too large: over {MAX_PROGRAM_SIZE} instructions")
+        self.ops.append(op)
+        self.arg_x.append(x)
+        self.arg_y.append(y)
+        return len(self.ops) - 1
+
+    def patch(self, pc: int, x: Optional[int] = None, y: Optional[int] = None) -> None:
+        if x is not None:
+            self.arg_x[pc] = x
+        if y is not None:
+            self.arg_y[pc] = y
+
+    def node(self, node: tuple) -> None:
+        kind = node[0]
+
+        if kind == "char":
+            self.emit(OP_CHAR, node[1])
+        elif kind == "class":
+            index = self._class_index.get(id(node[1]))
+            if index is None:
+                self.classes.append(node[1])
+                index = self._class_index[id(node[1])] = len(self.classes) - 1
+            self.emit(OP_CLASS, index)
+        elif kind == "any":
+            self.emit(OP_ANY)
+        elif kind == "bol":
+            self.emit(OP_BOL)
+        elif kind == "eol":
+            self.emit(OP_EOL)
+        elif kind == "empty":
+            pass
+        elif kind == "cat":
+            for item in node[1]:
+                self.node(item)
+        elif kind == "group":
+            if self.captures:
+                self.emit(OP_SAVE, 2 * node[2])
+                self.node(node[1])
+                self.emit(OP_SAVE, 2 * node[2] + 1)
+            else:
+                self.node(node[1])
+        elif kind == "backref":
+            self.emit(OP_BACKREF, node[1])
+        elif kind == "alt":
+            self._alternation(node[1])
+        elif kind == "repeat":
+            self._repeat(node[1], node[2], node[3])
+        else:
+            raise RuntimeError(f"Unhandled syntax node: {kind}")
+
+    def _alternation(self, branches: tuple) -> None:
+        jumps_to_end = []
+        for each_branch in branches[:-1]:
+            split = self.emit(OP_SPLIT)
+            self.patch(split, x=len(self.ops))
+            self.node(each_branch)
+            jumps_to_end.append(self.emit(OP_JMP))
+            self.patch(split, y=len(self.ops))
+        self.node(branches[-1])
+        for each_jump in jumps_to_end:
+            self.patch(each_jump, x=len(self.ops))
+
+    def _repeat(self, body: tuple, min_count: int, max_count: Optional[int]) -> None:
+        if max_count is None:
+            if min_count > 0:
+                # x+ : the last mandatory copy doubles as the loop body
+                for _ in range(min_count - 1):
+                    self.node(body)
+                loop_start = len(self.ops)
+                self.node(body)
+                self.emit(OP_SPLIT, loop_start, len(self.ops) + 1)
+            else:
+                loop = self.emit(OP_SPLIT)
+                self.patch(loop, x=len(self.ops))
+                self.node(body)
+                self.emit(OP_JMP, loop)
+                self.patch(loop, y=len(self.ops))
+            return
+
+        for _ in range(min_count):
+            self.node(body)
+
+        # Optional copies nest, so `x{0,2}` never tries the second without the first
+        pending_splits = []
+        for _ in range(max_count - min_count):
+            split = self.emit(OP_SPLIT)
+            self.patch(split, x=len(self.ops))
+            pending_splits.append(split)
+            self.node(body)
+        for each_split in pending_splits:
+            self.patch(each_split, y=len(self.ops))
+
+
+def _reversed(node: tuple) -> tuple:
+    """ The tree matching the reverse of every string `node` matches.
+    """
+    kind = node[0]
+    if kind == "cat":
+        return ("cat", tuple(_reversed(each) for each in reversed(node[1])))
+    elif kind == "alt":
+        return ("alt", tuple(_reversed(each) for each in node[1]))
+    elif kind == "group":
+        return ("group", _reversed(node[1]), node[2])
+    elif kind == "repeat":
+        return ("repeat", _reversed(node[1]), node[2], node[3])
+    elif kind == "bol":
+        return ("eol",)
+    elif kind == "eol":
+        return ("bol",)
+    return node
+
+
+def _without_backrefs(node: tuple, groups: dict[int, tuple]) -> tuple:
+    """ `node` with each backreference replaced by a copy of its group.
+
+    Whatever a backreference matches, its group's pattern matches too, so
+    the result is regular and accepts a superset of what `node` accepts.
+    """
+    kind = node[0]
+    if kind == "backref":
+        return _without_backrefs(groups[node[1]], groups)
+    elif kind in ("cat", "alt"):
+        return (kind, tuple(_without_backrefs(each, groups) for each in node[1]))
+    elif kind == "group":
+        return ("group", _without_backrefs(node[1], groups), node[2])
+    elif kind == "repeat":
+        return ("repeat", _without_backrefs(node[1], groups), node[2], node[3])
+    return node
+
+
+def compile_tokens(tokens: list[tuple[str, str]], reverse: bool = False, captures: bool = False) -> Program:
+    """ Compile `parse_regex_tokens` output to Pike VM bytecode.
+
+    Slots 0 and 1 record the start and end of the overall match. Without
+    `captures` the program is capture-free: groups only group, and
+    backreferences are widened to their group's pattern, so it may accept
+    lines the pattern rejects (never the reverse). With `captures`, group
+    n is recorded in slots 2n and 2n + 1 and backreferences are kept as
+    OP_BACKREF, which only `backtrack_search` runs. With `reverse`, the
+    program matches reversed input, so a pattern ending in `$` can be run
+    backwards from the end of the line.
+    """
+    parser = _TokenParser(tokens)
+    tree = parser.parse()
+    if not captures:
+        tree = _without_backrefs(tree, parser.groups)
+    elif reverse:
+        raise ValueError("Capturing programs can't be reversed")
+    if reverse:
+        tree = _reversed(tree)
+    emitter = _Emitter(captures)
+    emitter.emit(OP_SAVE, 0)
+    emitter.node(tree)
+    emitter.emit(OP_SAVE, 1)
+    emitter.emit(OP_MATCH)
+
+    program = Program(
+        ops=array("B", emitter.ops),
+        arg_x=array("i", emitter.arg_x),
+        arg_y=array("i", emitter.arg_y),
+        classes=tuple(emitter.classes),
+        n_slots=2 + 2 * len(parser.groups) if captures else 2,
+    )
+    logger.debug(f"Compiled {len(program)} instructions")
+    return program
@@ -0,0 +1,299 @@
+import logging
+from typing import Iterable, Optional
+
+from .compiler import (
+    Program,
+    NEWLINE,
+    OP_ANY,
+    OP_BOL,
+    OP_CHAR,
+    OP_CLASS,
+    OP_EOL,
+    OP_JMP,
+    OP_MATCH,
+    OP_SAVE,
+    OP_SPLIT,
+)
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_MAX_STATES = 2048
+DEFAULT_MAX_TRANSITIONS = 1 << 16
+# Give up on the DFA once it has been flushed more than this many times in a
+# row, each after fewer than MIN_CODES_PER_FLUSH code points.
+DEFAULT_MAX_FLUSHES = 8
+MIN_CODES_PER_FLUSH = 64
+
+# Bytes below this are whole UTF-8 characters, equal to their code point
+ASCII_LIMIT = 0x80
+# Python's "surrogateescape" decodes an undecodable byte b to U+DC00 + b
+SURROGATE_ESCAPE = 0xDC00
+
+
+class _DFAState:
+    __slots__ = ("pcs", "next", "is_match", "matches_at_end", "origin", "pending")
+
+    def __init__(self, pcs: frozenset, is_match: bool):
+        self.pcs = pcs
+        self.next: dict[int, "_DFAState"] = {}
+        self.is_match = is_match
+        # Whether ending the line here satisfies a `$`; worked out on first use
+        self.matches_at_end: Optional[bool] = None
+        # UTF-8 input only: the bytes read so far of an unfinished character,
+        # and the state it started in. Such a state isn't in the cache.
+        self.origin: Optional["_DFAState"] = None
+        self.pending = b""
+
+
+class LazyDFA:
+    """ Match/no-match automaton built on demand from a Pike VM program.
+
+    Each DFA state is the set of NFA instructions alive after the input seen
+    so far, with the start state folded in at every position so the DFA
+    answers "does the line contain a match". States and transitions live in
+    a bounded cache that is flushed when full; if it keeps flushing, the DFA
+    reports thrashing and the caller falls back to the Pike VM.
+
+    `^` only holds in the start state, so a pattern anchored there folds in
+    nothing later and stops at the first dead state. `$` stays in the state
+    until the input ends and is resolved then.
+
+    With `utf8`, input is raw UTF-8 bytes rather than code points, so it
+    never has to be decoded. An ASCII byte is its own code point. The bytes
+    of a longer character go through intermediate states, built on demand,
+    until the character is complete and the program steps once on its code
+    point. Undecodable bytes step as the code points "surrogateescape"
+    decoding gives them, so the answer is the one for the decoded line.
+    A `reverse` program reads the bytes backwards, where UTF-8 can't be
+    assembled one byte at a time, so there any non-ASCII byte makes
+    `is_match` return None for the caller to decode the line instead.
+    """
+
+    def __init__(
+        self,
+        program: Program,
+        max_states: int = DEFAULT_MAX_STATES,
+        max_transitions: int = DEFAULT_MAX_TRANSITIONS,
+        max_flushes: int = DEFAULT_MAX_FLUSHES,
+        utf8: bool = False,
+        reverse: bool = False,
+    ):
+        self._program = program
+        self._utf8 = utf8
+        self._reverse = reverse
+        self._max_states = max_states
+        self._max_transitions = max_transitions
+        self._max_flushes = max_flushes
+        self._start_pcs = self._closure((0,), at_start=True)
+        # Folded into every later state; empty when every match starts with `^`
+        self._restart_pcs = self._closure((0,), at_start=False)
+        self._reset()
+
+    def _reset(self) -> None:
+        self._cache: dict[frozenset, _DFAState] = {}
+        self._n_transitions = 0
+        self._flushes = 0
+        self._codes_consumed = 0
+        # `_codes_consumed` at the last flush, and how many flushes in a row
+        # came too soon after the one before
+        self._consumed_at_flush = 0
+        self._cheap_flushes = 0
+        self.thrashing = False
+        self._start = self._intern(self._start_pcs)
+
+    # Caches are rebuilt lazily in each process
+    def __getstate__(self):
+        return self._program, self._max_states, self._max_transitions, self._max_flushes, self._utf8, self._reverse
+
+    def __setstate__(self, state):
+        self.__init__(*state)
+
+    # ---------
+    def is_match(self, codes: Iterable[int]) -> Optional[bool]:
+        """ True/False, or None when the cache thrashes and the caller should
+        use NFA simulation instead.
+        """
+        if self.thrashing:
+            return None
+        state = self._start
+        if state.is_match:
+            return True
+        consumed_before = self._codes_consumed
+        dead_ends = not self._restart_pcs
+        consumed = 0
+        for code in codes:
+            following = state.next.get(code)
+            if following is None:
+                self._codes_consumed += consumed
+                consumed = 0
+                following = self._transition(state, code)
+                if following is None:
+                    return None
+            state = following
+            consumed += 1
+            if state.is_match:
+                break
+            if dead_ends and not state.pcs:
+                # Anchored at the start and every thread died: the rest can't match
+                self._codes_consumed += consumed
+                return False
+        self._codes_consumed += consumed
+        if state.pending:
+            # The input ended inside a character: its bytes were undecodable
+            state = self._escaped(state.origin, state.pending)
+        return state.is_match or self._matches_at_end(state, at_start=self._codes_consumed == consumed_before)
+
+    @property
+    def n_states(self) -> int:
+        return len(self._cache)
+
+    @property
+    def flushes(self) -> int:
+        return self._flushes
+
+    # ---------
+    def _matches_at_end(self, state: _DFAState, at_start: bool) -> bool:
+        """ Whether the line ending in `state` matches through a `$`. Only
+        an empty line ends at the start, and that answer isn't cached since
+        a later state can have the same instructions.
+        """
+        if at_start:
+            return self._accepts(self._closure(state.pcs, at_start=True, at_end=True))
+        if state.matches_at_end is None:
+            state.matches_at_end = self._accepts(self._closure(state.pcs, at_end=True))
+        return state.matches_at_end
+
+    def _accepts(self, pcs: Iterable[int]) -> bool:
+        ops = self._program.ops
+        return any(ops[pc] == OP_MATCH for pc in pcs)
+
+    def _closure(self, pcs: Iterable[int], at_start: bool = False, at_end: bool = False) -> frozenset:
+        """ Instructions reachable from `pcs` without consuming input. `^`
+        passes only `at_start`; `$` passes `at_end` and otherwise stays in
+        the set, waiting for the end of the line.
+        """
+        ops, arg_x, arg_y = self._program.ops, self._program.arg_x, self._program.arg_y
+        alive = set()
+        visited = set()
+        stack = list(pcs)
+        while stack:
+            pc = stack.pop()
+            if pc in visited:
+                continue
+            visited.add(pc)
+            op = ops[pc]
+            if op == OP_JMP:
+                stack.append(arg_x[pc])
+            elif op == OP_SPLIT:
+                stack.append(arg_x[pc])
+                stack.append(arg_y[pc])
+            elif op == OP_SAVE:
+                stack.append(pc + 1)
+            elif op == OP_BOL:
+                if at_start:
+                    stack.append(pc + 1)
+            elif op == OP_EOL and at_end:
+                stack.append(pc + 1)
+            else:
+                alive.add(pc)
+        return frozenset(alive)
+
+    def _intern(self, pcs: frozenset) -> _DFAState:
+        state = self._cache.get(pcs)
+        if state is None:
+            ops = self._program.ops
+            state = _DFAState(pcs, any(ops[pc] == OP_MATCH for pc in pcs))
+            self._cache[pcs] = state
+        return state
+
+    def _step(self, pcs: frozenset, code: int) -> frozenset:
+        ops, arg_x, classes = self._program.ops, self._program.arg_x, self._program.classes
+        advanced = []
+        for pc in pcs:
+            op = ops[pc]
+            if op == OP_CHAR:
+                if code == arg_x[pc]:
+                    advanced.append(pc + 1)
+            elif op == OP_CLASS:
+                if code in classes[arg_x[pc]]:
+                    advanced.append(pc + 1)
+            elif op == OP_ANY:
+                if code != NEWLINE:
+                    advanced.append(pc + 1)
+        return self._closure(advanced) | self._restart_pcs
+
+    def _transition(self, state: _DFAState, code: int) -> Optional[_DFAState]:
+        if len(self._cache) >= self._max_states or self._n_transitions >= self._max_transitions:
+            if not self._flush(state):
+                return None
+        if self._utf8 and (code >= ASCII_LIMIT or state.pending):
+            if self._reverse:
+                # Never cached, so a non-ASCII byte always comes back here
+                return None
+            following = self._utf8_transition(state, code)
+        else:
+            following = self._intern(self._step(state.pcs, code))
+        state.next[code] = following
+        self._n_transitions += 1
+        return following
+
+    def _utf8_transition(self, state: _DFAState, byte: int) -> _DFAState:
+        """ The state after one more byte of a multi-byte (or undecodable)
+        character, decided by Python's own decoder.
+        """
+        origin = state.origin if state.pending else state
+        sequence = state.pending + bytes((byte,))
+        try:
+            char = sequence.decode("utf-8")
+        except UnicodeDecodeError as e:
+            if e.reason == "unexpected end of data":
+                pending = _DFAState(origin.pcs, False)
+                pending.origin, pending.pending = origin, sequence
+                return pending
+            if not state.pending:
+                # Can't start a character at all
+                return self._intern(self._step(origin.pcs, SURROGATE_ESCAPE + byte))
+            # The unfinished character was undecodable; this byte starts afresh
+            escaped = self._escaped(origin, state.pending)
+            if escaped.is_match:
+                return escaped
+            if byte < ASCII_LIMIT:
+                return self._intern(self._step(escaped.pcs, byte))
+            return self._utf8_transition(escaped, byte)
+        return self._intern(self._step(origin.pcs, ord(char)))
+
+    def _escaped(self, origin: _DFAState, pending: bytes) -> _DFAState:
+        """ `origin` after `pending` read as undecodable bytes, stopping at a
+        match since the line matches whatever follows.
+        """
+        state = origin
+        for each_byte in pending:
+            state = self._intern(self._step(state.pcs, SURROGATE_ESCAPE + each_byte))
+            if state.is_match:
+                break
+        return state
+
+    def _flush(self, current: _DFAState) -> bool:
+        self._flushes += 1
+        if self._codes_consumed - self._consumed_at_flush < MIN_CODES_PER_FLUSH:
+            self._cheap_flushes += 1
+        else:
+            self._cheap_flushes = 0
+        self._consumed_at_flush = self._codes_consumed
+        if self._cheap_flushes > self._max_flushes:
+            logger.info(f"Lazy DFA thrashing after {self._flushes} flushes, falling back to NFA")
+            self.thrashing = True
+            return False
+        for each_state in self._cache.values():
+            each_state.next.clear()
+        if current.pending:
+            # Keep the state the unfinished character started in instead
+            current.next.clear()
+            current = current.origin
+        self._cache = {current.pcs: current}
+        self._n_transitions = 0
+        if current.pcs != self._start_pcs:
+            self._start = self._intern(self._start_pcs)
+        else:
+            self._start = current
+        return True
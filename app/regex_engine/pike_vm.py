@@ -0,0 +1,165 @@
+import logging
+from typing import Optional, Sequence
+
+from .compiler import (
+    Program,
+    NEWLINE,
+    OP_ANY,
+    OP_BOL,
+    OP_CHAR,
+    OP_CLASS,
+    OP_EOL,
+    OP_JMP,
+    OP_MATCH,
+    OP_SAVE,
+    OP_SPLIT,
+)
+
+logger = logging.getLogger(__name__)
+
+Slots = tuple[int, ...]
+
+
+def to_code_points(line: str) -> Sequence[int]:
+    """ Index-able code points of `line` without a per-character Python loop.
+    """
+    return memoryview(line.encode("utf-32-le", "surrogatepass")).cast("I")
+
+
+def _add_thread(
+    thread_list: list,
+    pc: int,
+    slots: Slots,
+    pos: int,
+    program: Program,
+    seen: list[int],
+    n_codes: int,
+) -> None:
+    """ Follow epsilon edges from `pc` in priority order, queueing every
+    instruction that consumes input (or matches). Anchors hold only at
+    position 0 and `n_codes`; elsewhere the thread dies.
+    """
+    ops, arg_x, arg_y = program.ops, program.arg_x, program.arg_y
+    stack = [(pc, slots)]
+    while stack:
+        pc, slots = stack.pop()
+        if seen[pc] == pos:
+            continue
+        seen[pc] = pos
+        op = ops[pc]
+        if op == OP_JMP:
+            stack.append((arg_x[pc], slots))
+        elif op == OP_SPLIT:
+            # Push the lower-priority branch first so the preferred one runs first
+            stack.append((arg_y[pc], slots))
+            stack.append((arg_x[pc], slots))
+        elif op == OP_SAVE:
+            updated = list(slots)
+            updated[arg_x[pc]] = pos
+            stack.append((pc + 1, tuple(updated)))
+        elif op == OP_BOL:
+            if pos == 0:
+                stack.append((pc + 1, slots))
+        elif op == OP_EOL:
+            if pos == n_codes:
+                stack.append((pc + 1, slots))
+        else:
+            thread_list.append((pc, slots))
+
+
+def pike_search(
+    program: Program,
+    codes: Sequence[int],
+    start: int = 0,
+    anchored: bool = False,
+) -> Optional[Slots]:
+    """ Leftmost-first match of `program` over `codes` from `start`.
+
+    All threads advance in lockstep, one input position at a time, and each
+    instruction is live at most once per position, so the run is bounded by
+    O(len(program) * len(codes)) whatever the pattern.
+    """
+    ops, arg_x, classes = program.ops, program.arg_x, program.classes
+    n_codes = len(codes)
+    seen = [-1] * len(ops)
+    empty_slots = (-1,) * program.n_slots
+    matched: Optional[Slots] = None
+    current: list = []
+    pos = start
+
+    while True:
+        if matched is None and (not anchored or pos == start):
+            _add_thread(current, 0, empty_slots, pos, program, seen, n_codes)
+
+        if not current:
+            if matched is not None or anchored or pos >= n_codes:
+                break
+            pos += 1
+            continue
+
+        code = codes[pos] if pos < n_codes else -1
+        following: list = []
+        for pc, slots in current:
+            op = ops[pc]
+            if op == OP_MATCH:
+                # Lower-priority threads can no longer win
+                matched = slots
+                break
+            if code < 0:
+                continue
+            if op == OP_CHAR:
+                advanced = code == arg_x[pc]
+            elif op == OP_CLASS:
+                advanced = code in classes[arg_x[pc]]
+            elif op == OP_ANY:
+                advanced = code != NEWLINE
+            else:
+                raise RuntimeError(f"Unhandled opcode: {op}")
+            if advanced:
+                _add_thread(following, pc + 1, slots, pos + 1, program, seen, n_codes)
+
+        current = following
+        if pos >= n_codes:
+            break
+        pos += 1
+
+    return matched
+
+
+def pike_count(program: Program, codes: Sequence[int], hits: list[int], misses: list[int]) -> bool:
+    """ Unanchored `pike_search` that adds, per instruction, how often a live
+    thread consumed the current code point (`hits`) or died on it (`misses`).
+
+    A separate loop so the plain VM carries no counting branches.
+    """
+    ops, arg_x, classes = program.ops, program.arg_x, program.classes
+    n_codes = len(codes)
+    seen = [-1] * len(ops)
+    empty_slots = (-1,) * program.n_slots
+    current: list = []
+
+    for pos in range(n_codes + 1):
+        _add_thread(current, 0, empty_slots, pos, program, seen, n_codes)
+        code = codes[pos] if pos < n_codes else -1
+        following: list = []
+        for pc, slots in current:
+            op = ops[pc]
+            if op == OP_MATCH:
+                return True
+            if code < 0:
+                continue
+            if op == OP_CHAR:
+                advanced = code == arg_x[pc]
+            elif op == OP_CLASS:
+                advanced = code in classes[arg_x[pc]]
+            elif op == OP_ANY:
+                advanced = code != NEWLINE
+            else:
+                raise RuntimeError(f"Unhandled opcode: {op}")
+            if advanced:
+                hits[pc] += 1
+                _add_thread(following, pc + 1, slots, pos + 1, program, seen, n_codes)
+            else:
+                misses[pc] += 1
+        current = following
+    return False
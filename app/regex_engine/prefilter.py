@@ -0,0 +1,125 @@
+import logging
+from typing import Optional
+
+from .compiler import counted_repeat
+
+logger = logging.getLogger(__name__)
+
+# Quantifiers that let the preceding atom be skipped entirely
+OPTIONAL_QUANTIFIERS = ("*", "?")
+QUANTIFIERS = ("*", "+", "?")
+
+
+def _is_quantifier(token) -> bool:
+    return token is not None and token[0] == "OPERATOR" and (token[1] in QUANTIFIERS or token[1].startswith("{"))
+
+
+def _is_optional(token) -> bool:
+    """ A quantifier letting the preceding atom be skipped: `*`, `?`, `{0,n}`.
+    """
+    if token[1].startswith("{"):
+        return counted_repeat(token[1])[0] == 0
+    return token[1] in OPTIONAL_QUANTIFIERS
+
+
+def _group_end(tokens: list[tuple[str, str]], open_at: int) -> int:
+    depth = 0
+    for index in range(open_at, len(tokens)):
+        if tokens[index] == ("MATCH_ALL_GROUP", "("):
+            depth += 1
+        elif tokens[index] == ("MATCH_ALL_GROUP", ")"):
+            depth -= 1
+            if depth == 0:
+                return index
+    return len(tokens) - 1
+
+
+def _has_top_level_alternation(tokens: list[tuple[str, str]]) -> bool:
+    depth = 0
+    for token_type, value in tokens:
+        if token_type == "MATCH_ALL_GROUP":
+            depth += 1 if value == "(" else -1
+        elif (token_type, value) == ("OPERATOR", "|") and depth == 0:
+            return True
+    return False
+
+
+def anchored_prefix(tokens: list[tuple[str, str]]) -> Optional[str]:
+    """ For a pattern anchored with a leading `^`, the literal every matching
+    line starts with ("" if none); None when the pattern isn't anchored.
+
+    `^2026-\\d+` -> "2026-".
+    """
+    if not tokens or tokens[0] != ("ANCHOR", "^") or _has_top_level_alternation(tokens):
+        return None
+    prefix = []
+    for index in range(1, len(tokens)):
+        following = tokens[index + 1] if index + 1 < len(tokens) else None
+        if tokens[index][0] != "LITERAL" or _is_quantifier(following):
+            break
+        prefix.append(tokens[index][1])
+    return "".join(prefix)
+
+
+def anchored_suffix(tokens: list[tuple[str, str]]) -> Optional[str]:
+    """ `anchored_prefix` for a trailing `$`: the literal every matching line
+    ends with.
+    """
+    if not tokens or tokens[-1] != ("ANCHOR", "$") or _has_top_level_alternation(tokens):
+        return None
+    suffix = []
+    for index in range(len(tokens) - 2, -1, -1):
+        if tokens[index][0] != "LITERAL":
+            break
+        suffix.append(tokens[index][1])
+    return "".join(reversed(suffix))
+
+
+def required_literal(tokens: list[tuple[str, str]]) -> str:
+    """ Longest literal substring that every match of `tokens` must contain,
+    or "" when there is none (e.g. a top-level alternation).
+
+    `ERROR \\d+ ms` -> "ERROR ".
+    """
+    if _has_top_level_alternation(tokens):
+        return ""
+
+    best = ""
+    run: list[str] = []
+
+    def end_run():
+        nonlocal best
+        if len(run) > len(best):
+            best = "".join(run)
+        run.clear()
+
+    index = 0
+    while index < len(tokens):
+        token = tokens[index]
+        following = tokens[index + 1] if index + 1 < len(tokens) else None
+
+        if token == ("MATCH_ALL_GROUP", "("):
+            end_run()
+            close_at = _group_end(tokens, index)
+            after_group = tokens[close_at + 1] if close_at + 1 < len(tokens) else None
+            if not (_is_quantifier(after_group) and _is_optional(after_group)):
+                inner = required_literal(tokens[index + 1:close_at])
+                if len(inner) > len(best):
+                    best = inner
+            index = close_at + 1
+            continue
+
+        if token[0] == "LITERAL":
+            if _is_quantifier(following) and _is_optional(following):
+                end_run()
+            else:
+                run.append(token[1])
+                if _is_quantifier(following):
+                    # `x+` needs one x, but whatever follows need not be adjacent
+                    end_run()
+        elif not _is_quantifier(token):
+            end_run()
+        index += 1
+
+    end_run()
+    return best
@@ -0,0 +1,42 @@
+import unittest
+
+from regex_engine.aho_corasick import AhoCorasick
+
+
+class TestAhoCorasick(unittest.TestCase):
+    def test_finds_any_needle(self):
+        automaton = AhoCorasick([b"he", b"she", b"his", b"hers"])
+        self.assertTrue(automaton.contains(b"ushers"))
+        self.assertTrue(automaton.contains(b"this"))
+        self.assertFalse(automaton.contains(b"hi there"[:4]))
+        self.assertFalse(automaton.contains(b"xyz"))
+
+    def test_match_through_fail_links(self):
+        # "abcd" fails at 'x', and "bcx" has to be found through the fail link of "abc"
+        automaton = AhoCorasick([b"abcd", b"bcx"])
+        self.assertTrue(automaton.contains(b"abcx"))
+        self.assertFalse(automaton.contains(b"abcbc"))
+
+    def test_needle_inside_longer_needle(self):
+        automaton = AhoCorasick([b"needles", b"eed"])
+        self.assertTrue(automaton.contains(b"a reed"))
+
+    def test_empty_needle_and_no_needles(self):
+        self.assertTrue(AhoCorasick([b""]).contains(b""))
+        self.assertFalse(AhoCorasick([]).contains(b"anything"))
+
+    def test_agrees_with_naive_search(self):
+        import random
+        rng = random.Random(5)
+        needles = [bytes(rng.choice(b"abc") for _ in range(rng.randint(1, 4))) for _ in range(20)]
+        automaton = AhoCorasick(needles)
+        for _ in range(300):
+            data = bytes(rng.choice(b"abcd") for _ in range(rng.randint(0, 12)))
+            self.assertEqual(automaton.contains(data), any(each in data for each in needles), msg=data)
+
+    def test_memoryview_input(self):
+        self.assertTrue(AhoCorasick([b"\xc3\xa9"]).contains(memoryview("café".encode())))
+
+
+if __name__ == "__main__":
+    unittest.main(verbosity=2)
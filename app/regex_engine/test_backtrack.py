@@ -0,0 +1,94 @@
+import unittest
+
+from regex_engine.compiler import OP_CHAR, OP_CLASS
+from regex_engine.backtrack import (
+    Backtracker,
+    TAKE_X,
+    TAKE_Y,
+    _first_steps,
+    _live_slots,
+    backtrack_search,
+)
+
+
+class TestBacktrack(unittest.TestCase):
+    def _search(self, pattern, line, anchored=False):
+        from inp_parser.parse import RegexParser
+        from .compiler import compile_tokens
+        from .pike_vm import to_code_points
+        program = compile_tokens(RegexParser().parse_regex_tokens(pattern), captures=True)
+        slots = backtrack_search(program, to_code_points(line), anchored=anchored)
+        if slots is None:
+            return None
+        return [None if slots[each] < 0 else line[slots[each]:slots[each + 1]] for each in range(0, len(slots), 2)]
+
+    def test_backreferences(self):
+        self.assertEqual(self._search(r"(\w+) \1", "say hello hello"), ["hello hello", "hello"])
+        self.assertEqual(self._search(r"(a|b)\1", "abba"), ["bb", "b"])
+        self.assertIsNone(self._search(r"(\d)\1", "1213"))
+        self.assertEqual(self._search(r"(\d)-(\d)-\2-\1", "x1-2-2-1"), ["1-2-2-1", "1", "2"])
+
+    def test_unset_group_fails_backreference(self):
+        self.assertIsNone(self._search(r"(a)?b\1", "b"))
+        self.assertEqual(self._search(r"(a)?b\1", "aba"), ["aba", "a"])
+
+    def test_agrees_with_pike_vm(self):
+        from inp_parser.parse import RegexParser
+        from .compiler import compile_tokens
+        from .pike_vm import pike_search, to_code_points
+        for pattern, line in (("a|ab", "ab"), (r"(\d+)-(\d*)", "x12-y12-345"), ("(a|b)*c", "xabac"), ("(a+)|b", "b")):
+            program = compile_tokens(RegexParser().parse_regex_tokens(pattern), captures=True)
+            codes = to_code_points(line)
+            self.assertEqual(backtrack_search(program, codes), pike_search(program, codes), msg=pattern)
+
+    def test_empty_iteration_ends_loop(self):
+        # As Python's re: the empty iteration counts, and the loop stops there
+        self.assertEqual(self._search(r"(b)(a?|\1+.)*", "babb"), ["ba", "b", ""])
+        self.assertEqual(self._search(r"(a?)+b", "b"), ["b", ""])
+        self.assertEqual(self._search("(a*)*b", "aab"), ["aab", ""])
+
+    def test_start_positions(self):
+        from .compiler import compile_tokens
+        from inp_parser.parse import RegexParser
+        program = compile_tokens(RegexParser().parse_regex_tokens(r"x?(\d)\1"), captures=True)
+        self.assertEqual(sorted(op for op, _ in _first_steps(program)), [OP_CHAR, OP_CLASS])
+        self.assertIsNone(_first_steps(compile_tokens(RegexParser().parse_regex_tokens("a*"), captures=True)))
+        self.assertEqual(self._search(r"x?(\d)\1", "ab 1 22"), ["22", "2"])
+        self.assertEqual(self._search(r"(a*)\1$", "ab"), ["", ""])
+
+    def _backtracker(self, pattern):
+        from inp_parser.parse import RegexParser
+        from .compiler import compile_tokens
+        return Backtracker(compile_tokens(RegexParser().parse_regex_tokens(pattern), captures=True))
+
+    def test_live_slots(self):
+        backtracker = self._backtracker(r"(\w+) \1")
+        live = _live_slots(backtracker._program)
+        loop = next(iter(backtracker._loops))
+        # The group's start is read by \1; its end is saved again before that
+        self.assertEqual(live[loop], (2,))
+        self.assertEqual(live[len(live) - 1], ())
+
+    def test_states_shared_across_starts(self):
+        from .pike_vm import to_code_points
+        backtracker = self._backtracker(r".*(\d)\1ms")
+        codes = to_code_points("took 1234 then 5678 and 90ms " * 20)
+        visited = set()
+        self.assertIsNone(backtracker._run(codes, 0, len(codes) - 1, visited))
+        self.assertLess(len(visited), 3 * len(codes))
+
+    def test_guarded_split_skips_the_other_branch(self):
+        from .pike_vm import to_code_points
+        backtracker = self._backtracker(r"(\w+) \1")
+        self.assertEqual(backtracker.search(to_code_points("ab cd ab ab")), (6, 11, 6, 8))
+        loop = next(iter(backtracker._loops))
+        self.assertEqual(backtracker._choices[loop], {ord("b"): TAKE_X, ord("d"): TAKE_X, ord(" "): TAKE_Y})
+
+    def test_anchored(self):
+        self.assertIsNone(self._search(r"(b)\1", "abb", anchored=True))
+        self.assertEqual(self._search(r"^(x+)y\1$", "xxyxx"), ["xxyxx", "xx"])
+        self.assertIsNone(self._search(r"^(x+)y\1$", "xxyx"))
+
+
+if __name__ == "__main__":
+    unittest.main(verbosity=2)
@@ -0,0 +1,85 @@
+import unittest
+
+from regex_engine.compiler import (
+    OP_BACKREF,
+    OP_BOL,
+    OP_CHAR,
+    OP_CLASS,
+    OP_EOL,
+    OP_JMP,
+    OP_MATCH,
+    OP_SAVE,
+    OP_SPLIT,
+    compile_tokens,
+)
+
+
+class TestCompiler(unittest.TestCase):
+    def _program(self, pattern):
+        from inp_parser.parse import RegexParser
+        return compile_tokens(RegexParser().parse_regex_tokens(pattern))
+
+    def test_literal_program(self):
+        program = self._program("ab")
+        self.assertEqual(list(program.ops), [OP_SAVE, OP_CHAR, OP_CHAR, OP_SAVE, OP_MATCH])
+        self.assertEqual(list(program.arg_x[1:3]), [ord("a"), ord("b")])
+
+    def test_star_loops_back(self):
+        program = self._program("a*")
+        self.assertEqual(list(program.ops), [OP_SAVE, OP_SPLIT, OP_CHAR, OP_JMP, OP_SAVE, OP_MATCH])
+        self.assertEqual((program.arg_x[1], program.arg_y[1]), (2, 4))
+        self.assertEqual(program.arg_x[3], 1)
+
+    def test_alternation_jumps_to_end(self):
+        program = self._program("a|b")
+        self.assertEqual(list(program.ops), [OP_SAVE, OP_SPLIT, OP_CHAR, OP_JMP, OP_CHAR, OP_SAVE, OP_MATCH])
+        self.assertEqual(program.arg_x[3], 5)
+
+    def test_anchors_are_zero_width(self):
+        program = self._program("^a$")
+        self.assertEqual(list(program.ops), [OP_SAVE, OP_BOL, OP_CHAR, OP_EOL, OP_SAVE, OP_MATCH])
+
+    def test_reversed_program(self):
+        from inp_parser.parse import RegexParser
+        program = compile_tokens(RegexParser().parse_regex_tokens(r"a\d$"), reverse=True)
+        self.assertEqual(list(program.ops), [OP_SAVE, OP_BOL, OP_CLASS, OP_CHAR, OP_SAVE, OP_MATCH])
+
+    def test_classes_are_shared_by_index(self):
+        program = self._program(r"\d[ab]")
+        self.assertEqual(len(program.classes), 2)
+        self.assertIn(ord("7"), program.classes[0])
+        self.assertNotIn(ord("c"), program.classes[1])
+
+    def test_counted_repetition_is_compact(self):
+        program = self._program("[a-f]{32,64}")
+        # One CLASS per copy plus one SPLIT per optional copy, sharing a single class
+        self.assertEqual(len(program), 2 + 32 + 2 * 32 + 1)
+        self.assertEqual(len(program.classes), 1)
+        self.assertEqual(list(self._program("a{2,}").ops), [OP_SAVE, OP_CHAR, OP_CHAR, OP_SPLIT, OP_SAVE, OP_MATCH])
+        self.assertEqual(list(self._program("ab{0}").ops), [OP_SAVE, OP_CHAR, OP_SAVE, OP_MATCH])
+
+    def test_counted_repetition_limits(self):
+        for pattern in ("a{3,2}", "a{1001}", "(a{1000}){1000}"):
+            with self.assertRaises(ValueError, msg=pattern):
+                self._program(pattern)
+
+    def test_capture_slots(self):
+        from inp_parser.parse import RegexParser
+        tokens = RegexParser().parse_regex_tokens(r"(a)(b)\1")
+        program = compile_tokens(tokens, captures=True)
+        self.assertEqual(program.n_slots, 6)
+        self.assertEqual(list(program.ops), [
+            OP_SAVE, OP_SAVE, OP_CHAR, OP_SAVE, OP_SAVE, OP_CHAR, OP_SAVE, OP_BACKREF, OP_SAVE, OP_MATCH,
+        ])
+        self.assertEqual(list(program.arg_x[:9]), [0, 2, ord("a"), 3, 4, ord("b"), 5, 1, 1])
+        # Capture-free: no group slots, and the backreference widened to its group
+        self.assertEqual(list(self._program(r"(a)(b)\1").ops), [OP_SAVE, OP_CHAR, OP_CHAR, OP_CHAR, OP_SAVE, OP_MATCH])
+
+    def test_syntax_errors(self):
+        for pattern in ("(a", "a)", "*a", "a|*", r"\1", r"(a\1)", r"(a)\2"):
+            with self.assertRaises(ValueError, msg=pattern):
+                self._program(pattern)
+
+
+if __name__ == "__main__":
+    unittest.main(verbosity=2)
@@ -0,0 +1,95 @@
+import unittest
+
+from regex_engine.lazy_dfa import LazyDFA
+
+
+class TestLazyDFA(unittest.TestCase):
+    def _program(self, pattern):
+        from inp_parser.parse import RegexParser
+        from .compiler import compile_tokens
+        return compile_tokens(RegexParser().parse_regex_tokens(pattern))
+
+    def _codes(self, line):
+        from .pike_vm import to_code_points
+        return to_code_points(line)
+
+    def test_agrees_with_pike_vm(self):
+        from .pike_vm import pike_search
+        patterns = ["cat", r"\d+ms", "(a|b)*c", "colou?r", "x.y", "[^abc]", "", "^ab", "c$", "^$", "^a|d$", "(^|x)a"]
+        lines = ["", "cat", "concat", "12ms", "ms", "ababc", "abab", "color", "x\ny", "xzy", "abc", "abcd"]
+        for pattern in patterns:
+            program = self._program(pattern)
+            dfa = LazyDFA(program)
+            for line in lines:
+                expected = pike_search(program, self._codes(line)) is not None
+                self.assertEqual(dfa.is_match(self._codes(line)), expected, msg=(pattern, line))
+
+    def test_anchored_start_stops_early(self):
+        dfa = LazyDFA(self._program("^2026-"))
+        self.assertFalse(dfa.is_match(self._codes("x" + "2026-" * 50)))
+        # Only the start state and the dead state were ever built
+        self.assertEqual(dfa.n_states, 2)
+
+    def test_states_are_reused(self):
+        dfa = LazyDFA(self._program("ab"))
+        dfa.is_match(self._codes("xxabxx"))
+        n_states = dfa.n_states
+        dfa.is_match(self._codes("xxabxx"))
+        self.assertEqual(dfa.n_states, n_states)
+
+    def test_cache_flushes_when_full(self):
+        dfa = LazyDFA(self._program("(a|b)*abb"), max_states=3, max_flushes=1000)
+        self.assertTrue(dfa.is_match(self._codes("babababb")))
+        self.assertGreater(dfa.flushes, 0)
+        self.assertLessEqual(dfa.n_states, 3)
+        self.assertFalse(dfa.is_match(self._codes("bababab")))
+
+    def test_utf8_agrees_with_decoded_input(self):
+        patterns = ["é+", "caf.", "^.$", "^..$", "[^a]b", r"\w+$", "x.y", "[α-ω]", "ü|a", ".."]
+        lines = [
+            "", "café", "é", "ab", "éé!", "xüy", "β", "αβ", "ü",
+            b"\xe2\x82".decode("utf-8", "surrogateescape"),
+            b"\xe2\x82x\xffb".decode("utf-8", "surrogateescape"),
+            b"\xed\xa0\x80".decode("utf-8", "surrogateescape"),
+            b"\xf0\x9f\x98".decode("utf-8", "surrogateescape"),
+        ]
+        for pattern in patterns:
+            program = self._program(pattern)
+            by_code, by_byte = LazyDFA(program), LazyDFA(program, utf8=True)
+            for line in lines:
+                data = line.encode("utf-8", "surrogateescape")
+                self.assertEqual(by_byte.is_match(data), by_code.is_match(self._codes(line)), msg=(pattern, data))
+
+    def test_utf8_ascii_is_one_step_per_byte(self):
+        dfa = LazyDFA(self._program("ab"), utf8=True)
+        self.assertTrue(dfa.is_match(memoryview(b"xxab")))
+        self.assertFalse(dfa.is_match(b"xa\xc3\xa9b"))
+
+    def test_utf8_reverse_gives_up_on_non_ascii(self):
+        from .compiler import compile_tokens
+        from inp_parser.parse import RegexParser
+        program = compile_tokens(RegexParser().parse_regex_tokens(r"\dms$"), reverse=True)
+        dfa = LazyDFA(program, utf8=True, reverse=True)
+        self.assertTrue(dfa.is_match(reversed(memoryview("é took 2ms".encode()))))
+        self.assertIsNone(dfa.is_match(reversed(b"2m\xc3\xa9s")))
+        self.assertFalse(dfa.is_match(reversed(b"2ms!")))
+        self.assertFalse(dfa.thrashing)
+
+    def test_thrashing_after_a_long_good_run(self):
+        dfa = LazyDFA(self._program("(a|b)*a(a|b)(a|b)c"), max_states=4, max_flushes=2)
+        for _ in range(1000):
+            self.assertFalse(dfa.is_match(self._codes("z" * 50)))
+        self.assertEqual(dfa.flushes, 0)
+        # 50k code points without a flush must not buy that many cheap flushes later
+        varied = "".join(format(each, "b") for each in range(64)).translate(str.maketrans("01", "ab"))
+        self.assertIsNone(dfa.is_match(self._codes(varied)))
+        self.assertTrue(dfa.thrashing)
+
+    def test_thrashing_reports_fallback(self):
+        dfa = LazyDFA(self._program("(a|b)*abb"), max_states=2, max_flushes=1)
+        self.assertIsNone(dfa.is_match(self._codes("abababababab")))
+        self.assertTrue(dfa.thrashing)
+
+
+if __name__ == "__main__":
+    unittest.main(verbosity=2)
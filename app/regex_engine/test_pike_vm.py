@@ -0,0 +1,73 @@
+import unittest
+
+from regex_engine.pike_vm import pike_count, pike_search, to_code_points
+
+
+class TestPikeVM(unittest.TestCase):
+    def _search(self, pattern, line, anchored=False):
+        from inp_parser.parse import RegexParser
+        from .compiler import compile_tokens
+        program = compile_tokens(RegexParser().parse_regex_tokens(pattern))
+        slots = pike_search(program, to_code_points(line), anchored=anchored)
+        return None if slots is None else line[slots[0]:slots[1]]
+
+    def test_literals(self):
+        self.assertEqual(self._search("cat", "concatenate"), "cat")
+        self.assertIsNone(self._search("dog", "concatenate"))
+
+    def test_quantifiers(self):
+        self.assertEqual(self._search("ca+t", "a caaat"), "caaat")
+        self.assertEqual(self._search("ca*t", "ct"), "ct")
+        self.assertEqual(self._search("colou?r", "color"), "color")
+        self.assertIsNone(self._search("ca+t", "ct"))
+
+    def test_alternation_and_groups(self):
+        self.assertEqual(self._search("(cat|dog)s", "hotdogs"), "dogs")
+        self.assertEqual(self._search("a(b|c)+d", "xabcbd"), "abcbd")
+        self.assertIsNone(self._search("(cat|dog)s", "cows"))
+
+    def test_leftmost_first(self):
+        self.assertEqual(self._search("a|ab", "ab"), "a")
+        self.assertEqual(self._search(r"\d+", "x123y45"), "123")
+
+    def test_dot_skips_newline(self):
+        self.assertEqual(self._search("a.c", "abc"), "abc")
+        self.assertIsNone(self._search("a.c", "a\nc"))
+
+    def test_anchored(self):
+        self.assertIsNone(self._search("b", "ab", anchored=True))
+        self.assertEqual(self._search("a", "ab", anchored=True), "a")
+
+    def test_empty_loops_terminate(self):
+        self.assertEqual(self._search("(a*)*b", "aaab"), "aaab")
+        self.assertEqual(self._search("(a?)*", "xyz"), "")
+
+    def test_pathological_pattern_is_linear(self):
+        # Exponential for a backtracker; a handful of threads for the VM
+        line = "a" * 2000
+        self.assertIsNone(self._search("(a*)*b", line))
+
+    def test_anchors(self):
+        self.assertEqual(self._search("^ab", "abab"), "ab")
+        self.assertIsNone(self._search("^b", "ab"))
+        self.assertEqual(self._search(r"\d+$", "12 34"), "34")
+        self.assertEqual(self._search("^$", ""), "")
+        self.assertIsNone(self._search("a$b", "ab"))
+
+    def test_non_ascii(self):
+        self.assertEqual(self._search("é+", "caféé!"), "éé")
+
+    def test_count_hits_and_misses(self):
+        from inp_parser.parse import RegexParser
+        from .compiler import compile_tokens
+        program = compile_tokens(RegexParser().parse_regex_tokens("ab"))
+        hits, misses = [0] * len(program), [0] * len(program)
+        self.assertTrue(pike_count(program, to_code_points("xab"), hits, misses))
+        # pc 1 is 'a', pc 2 is 'b'
+        self.assertEqual((hits[1], misses[1]), (1, 2))
+        self.assertEqual((hits[2], misses[2]), (1, 0))
+        self.assertFalse(pike_count(program, to_code_points("ba"), hits, misses))
+
+
+if __name__ == "__main__":
+    unittest.main(verbosity=2)
@@ -0,0 +1,52 @@
+import unittest
+
+from regex_engine.prefilter import anchored_prefix, anchored_suffix, required_literal
+
+
+class TestRequiredLiteral(unittest.TestCase):
+    def _literal(self, pattern):
+        from inp_parser.parse import RegexParser
+        return required_literal(RegexParser().parse_regex_tokens(pattern))
+
+    def test_longest_run_wins(self):
+        self.assertEqual(self._literal(r"ERROR \d+ ms"), "ERROR ")
+        self.assertEqual(self._literal(r"a\d+timeout"), "timeout")
+
+    def test_optional_characters_break_runs(self):
+        self.assertEqual(self._literal("colou?r"), "colo")
+        self.assertEqual(self._literal("ab*cd"), "cd")
+        self.assertEqual(self._literal("abc+d"), "abc")
+
+    def test_counted_repetition(self):
+        self.assertEqual(self._literal("abc{2}d"), "abc")
+        self.assertEqual(self._literal("xy{0,3}zw"), "zw")
+        self.assertEqual(self._literal("a{x}b"), "a{x}b")
+
+    def test_escaped_metacharacters_are_literal(self):
+        self.assertEqual(self._literal(r"a\.b"), "a.b")
+
+    def test_alternation_has_no_literal(self):
+        self.assertEqual(self._literal("cat|dog"), "")
+        self.assertEqual(self._literal(r"\d+"), "")
+
+    def test_anchored_prefix_and_suffix(self):
+        from inp_parser.parse import RegexParser
+        tokenize = RegexParser().parse_regex_tokens
+        self.assertEqual(anchored_prefix(tokenize(r"^2026-\d+")), "2026-")
+        self.assertEqual(anchored_prefix(tokenize("^ab*c")), "a")
+        self.assertEqual(anchored_prefix(tokenize(r"^\d")), "")
+        self.assertIsNone(anchored_prefix(tokenize("2026-")))
+        self.assertIsNone(anchored_prefix(tokenize("^a|b")))
+        self.assertEqual(anchored_suffix(tokenize(r"\d+ms$")), "ms")
+        self.assertEqual(anchored_suffix(tokenize("(a|b)$")), "")
+        self.assertIsNone(anchored_suffix(tokenize("a$|b")))
+        self.assertEqual(self._literal("^ERROR:"), "ERROR:")
+
+    def test_groups(self):
+        self.assertEqual(self._literal("x(needle)?y"), "x")
+        self.assertEqual(self._literal("x(needle)+y"), "needle")
+        self.assertEqual(self._literal("x(a|b)yz"), "yz")
+
+
+if __name__ == "__main__":
+    unittest.main(verbosity=2)
@@ -0,0 +1,157 @@
+""" Long-lived matcher listening on a Unix domain socket, so callers skip the
+interpreter start and pattern compile that every CLI run pays.
+
+    python main.py serve /tmp/grep.sock
+
+The protocol is one JSON object per line in each direction, usable from any
+language (`socat - UNIX-CONNECT:/tmp/grep.sock`):
+
+    {"id": 1, "pattern": "\\d+ms", "lines": ["took 12ms", "ok"]}
+    {"id": 1, "matches": [0]}
+
+"patterns" (a list, as with -e) may replace "pattern", and `"mask": true`
+asks for a bitmask integer instead of indices. A bad request gets
+`{"id": ..., "error": "..."}` and the connection stays open. Requests of
+OFFLOAD_SIZE bytes or more are matched on the loop's thread pool, so a big
+batch doesn't hold up other connections.
+"""
+import asyncio
+import contextlib
+import copy
+import errno
+import json
+import logging
+import os
+import socket
+import stat
+from typing import Any, Optional
+
+import grep
+from inp_reader.async_stream import OFFLOAD_SIZE
+
+logger = logging.getLogger(__name__)
+
+# Longest request line; one request carries a whole batch of lines
+MAX_REQUEST_BYTES = 16 << 20
+
+
+def handle_request(request: Any, private: bool = False) -> dict:
+    """ The response to one decoded request. `private` matches with a copy
+    of the compiled pattern, whose DFA caches no other thread is filling.
+    """
+    request_id = request.get("id") if isinstance(request, dict) else None
+    try:
+        if not isinstance(request, dict):
+            raise ValueError("Request must be a JSON object")
+        patterns = request.get("patterns")
+        if patterns is None:
+            patterns = [request.get("pattern")]
+        lines = request.get("lines")
+        if not patterns or not all(isinstance(each, str) for each in patterns):
+            raise ValueError("'pattern' must be a string or 'patterns' a list of strings")
+        if not isinstance(lines, list) or not all(isinstance(each, str) for each in lines):
+            raise ValueError("'lines' must be a list of strings")
+        compiled = grep.compile(*patterns)
+        if private:
+            compiled = copy.deepcopy(compiled)
+        if request.get("mask"):
+            return {"id": request_id, "mask": grep.match_mask(compiled, lines)}
+        return {"id": request_id, "matches": grep.match_many(compiled, lines)}
+    except (ValueError, RuntimeError) as e:
+        return {"id": request_id, "error": str(e)}
+
+
+def _respond(raw: bytes, private: bool = False) -> dict:
+    try:
+        return handle_request(json.loads(raw), private)
+    except ValueError as e:
+        return {"id": None, "error": f"Invalid JSON: {e}"}
+
+
+async def _serve_connection(reader: asyncio.StreamReader, writer: asyncio.StreamWriter) -> None:
+    try:
+        while True:
+            try:
+                raw = await reader.readline()
+            except ValueError:
+                # Over MAX_REQUEST_BYTES; the stream can't be resynchronised
+                writer.write(b'{"id": null, "error": "Request too large"}\n')
+                break
+            if not raw:
+                break
+            if len(raw) >= OFFLOAD_SIZE:
+                response = await asyncio.get_running_loop().run_in_executor(None, _respond, raw, True)
+            else:
+                response = _respond(raw)
+            writer.write(json.dumps(response).encode() + b"\n")
+            await writer.drain()
+    except ConnectionError as e:
+        logger.debug(f"Client went away :: {e}")
+    finally:
+        writer.close()
+
+
+def _remove_stale_socket(path: str) -> None:
+    """ Remove the socket file an earlier run left at `path` once nothing
+    answers on it any more. A file that isn't a socket, or the socket of a
+    server still listening, raises instead of being replaced.
+    """
+    try:
+        mode = os.lstat(path).st_mode
+    except FileNotFoundError:
+        return
+    if not stat.S_ISSOCK(mode):
+        raise FileExistsError(errno.EEXIST, "Exists and is not a socket", path)
+    with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as probe:
+        try:
+            probe.connect(path)
+        except ConnectionRefusedError:
+            logger.info(f"Removing stale socket :: {path=}")
+            os.unlink(path)
+            return
+    raise OSError(errno.EADDRINUSE, "Another server is listening", path)
+
+
+async def start_server(path: str) -> asyncio.AbstractServer:
+    """ Listen on `path`, replacing a stale socket file left by an earlier run.
+    """
+    _remove_stale_socket(path)
+    server = await asyncio.start_unix_server(_serve_connection, path=path, limit=MAX_REQUEST_BYTES)
+    logger.info(f"Serving on {path=}")
+    return server
+
+
+def serve(path: str) -> None:
+    """ Serve until interrupted, then remove the socket file.
+    """
+    async def run() -> None:
+        server = await start_server(path)
+        try:
+            async with server:
+                await server.serve_forever()
+        finally:
+            # Only once it is ours: a failed start leaves what was there alone
+            with contextlib.suppress(FileNotFoundError):
+                os.unlink(path)
+
+    try:
+        asyncio.run(run())
+    except KeyboardInterrupt:
+        pass
+
+
+async def query(path: str, lines: list[str], pattern: Optional[str] = None, patterns: Optional[list[str]] = None) -> list[int]:
+    """ Client side: indices of the `lines` the server matched. Raises
+    ValueError with the server's message for a rejected request.
+    """
+    reader, writer = await asyncio.open_unix_connection(path, limit=MAX_REQUEST_BYTES)
+    try:
+        request = {"lines": lines, **({"patterns": patterns} if patterns is not None else {"pattern": pattern})}
+        writer.write(json.dumps(request).encode() + b"\n")
+        await writer.drain()
+        response = json.loads(await reader.readline())
+    finally:
+        writer.close()
+    if "error" in response:
+        raise ValueError(response["error"])
+    return response["matches"]
@@ -0,0 +1,121 @@
+import unittest
+
+import grep
+
+
+class TestLibraryApi(unittest.TestCase):
+    def setUp(self):
+        import os
+        import tempfile
+        from unittest import mock
+        from inp_parser.cache import CACHE_DIR_ENV_VAR
+        # `run` caches compiled patterns; keep them out of the user's cache
+        cache_dir = tempfile.TemporaryDirectory()
+        self.addCleanup(cache_dir.cleanup)
+        patcher = mock.patch.dict(os.environ, {CACHE_DIR_ENV_VAR: cache_dir.name})
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def test_match_many_and_mask(self):
+        lines = ["took 12ms", "ok", b"took 3ms", "12 s"]
+        self.assertEqual(grep.match_many(r"\d+ms", lines), [0, 2])
+        self.assertEqual(grep.match_mask(r"\d+ms", lines), 0b101)
+        hits = {0, 7, 8, 15, 16, 100}
+        self.assertEqual(grep.match_mask("x", ["x" if n in hits else "" for n in range(101)]), sum(1 << n for n in hits))
+        self.assertEqual(grep.match_mask("x", ["", "y"]), 0)
+        self.assertEqual(grep.match_many("xyz", []), [])
+
+    def test_filter_is_lazy(self):
+        def lines():
+            yield "a1"
+            raise AssertionError("read too far")
+        self.assertEqual(next(grep.filter(r"\d", lines())), "a1")
+
+    def test_compiled_and_multiple_patterns(self):
+        pattern = grep.compile("foo", r"\d\d")
+        self.assertIs(grep.compile("foo", r"\d\d"), pattern)
+        self.assertEqual(list(grep.filter(pattern, ["foo", "bar", "42"])), ["foo", "42"])
+        with self.assertRaises(ValueError):
+            grep.compile()
+
+    def test_run_returns_status(self):
+        import io
+        out = io.BytesIO()
+        self.assertEqual(grep.run(["grep", "-E", "b+"], io.BytesIO(b"abc\nxyz\n"), out), 0)
+        self.assertEqual(out.getvalue(), b"abc\n")
+        self.assertEqual(grep.run(["grep", "-E", "q"], io.BytesIO(b"abc\n"), io.BytesIO()), 1)
+        self.assertEqual(grep.run(["grep", "-E", "a", "/nonexistent/file"], io.BytesIO(), io.BytesIO()), 2)
+
+    def test_run_reports_bad_patterns(self):
+        import io
+        from contextlib import redirect_stderr
+        for args in (["grep", "-E", "a\\"], ["grep", "-E", "(a"], ["grep"]):
+            errors = io.StringIO()
+            with redirect_stderr(errors):
+                self.assertEqual(grep.run(args, io.BytesIO(b"a\n"), io.BytesIO()), 2, msg=args)
+            self.assertTrue(errors.getvalue().startswith("grep: "), msg=args)
+
+    def test_run_reports_write_errors(self):
+        import errno
+        import io
+        from contextlib import redirect_stderr
+
+        class FailingOutput(io.BytesIO):
+            def __init__(self, error):
+                super().__init__()
+                self.error = error
+
+            def write(self, data):
+                raise self.error
+
+        for error, message in (
+            (BrokenPipeError(errno.EPIPE, "Broken pipe"), ""),
+            (OSError(errno.ENOSPC, "No space left on device"), "grep: write error: No space left on device\n"),
+        ):
+            errors = io.StringIO()
+            with redirect_stderr(errors):
+                status = grep.run(["grep", "-E", "a"], io.BytesIO(b"abc\n" * 10), FailingOutput(error))
+            self.assertEqual(status, 2, msg=error)
+            self.assertEqual(errors.getvalue(), message)
+
+    def test_write_errors_are_not_read_errors(self):
+        import errno
+        import io
+        import os
+        import tempfile
+        from contextlib import redirect_stderr
+
+        class FullOutput(io.BytesIO):
+            def write(self, data):
+                raise OSError(errno.ENOSPC, "No space left on device")
+
+        with tempfile.NamedTemporaryFile(delete=False) as tmp:
+            tmp.write(b"abc\n" * 10)
+        self.addCleanup(os.unlink, tmp.name)
+        errors = io.StringIO()
+        with redirect_stderr(errors):
+            status = grep.run(["grep", "-E", "a", tmp.name, tmp.name], io.BytesIO(), FullOutput())
+        self.assertEqual(status, 2)
+        self.assertEqual(errors.getvalue(), "grep: write error: No space left on device\n")
+
+    def test_closed_pipe_is_quiet(self):
+        import os
+        import subprocess
+        import sys
+        main = os.path.join(os.path.dirname(os.path.abspath(__file__)), "main.py")
+        process = subprocess.Popen(
+            [sys.executable, main, "-E", "a"], stdin=subprocess.PIPE, stdout=subprocess.PIPE, stderr=subprocess.PIPE
+        )
+        # The reader is gone before grep writes anything
+        process.stdout.close()
+        _, errors = process.communicate(b"abc\n" * 100_000)
+        self.assertEqual(errors, b"")
+        self.assertEqual(process.returncode, 2)
+
+    def test_definition_matchers_return(self):
+        self.assertTrue(grep.grep("alpha_numeric", "a1"))
+        self.assertFalse(grep.grep("positive_char_group", "xyz", "[abc]"))
+
+
+if __name__ == "__main__":
+    unittest.main(verbosity=2)
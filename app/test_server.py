@@ -0,0 +1,100 @@
+import unittest
+import asyncio
+import json
+import os
+
+from inp_reader.async_stream import OFFLOAD_SIZE
+from server import handle_request, query, start_server
+
+
+class TestServer(unittest.IsolatedAsyncioTestCase):
+    async def asyncSetUp(self):
+        import tempfile
+        self._tmp = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self._tmp.name, "grep.sock")
+        self.server = await start_server(self.path)
+
+    async def asyncTearDown(self):
+        self.server.close()
+        await self.server.wait_closed()
+        self._tmp.cleanup()
+
+    async def test_replaces_only_stale_sockets(self):
+        import errno
+        import socket
+        with self.assertRaises(OSError) as raised:
+            await start_server(self.path)
+        self.assertEqual(raised.exception.errno, errno.EADDRINUSE)
+        self.assertEqual(await query(self.path, ["a1"], r"\d"), [0])
+
+        stale_path = os.path.join(self._tmp.name, "stale.sock")
+        with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as stale:
+            stale.bind(stale_path)
+        server = await start_server(stale_path)
+        self.addAsyncCleanup(server.wait_closed)
+        self.addCleanup(server.close)
+        self.assertEqual(await query(stale_path, ["a1"], r"\d"), [0])
+
+        file_path = os.path.join(self._tmp.name, "notes.txt")
+        with open(file_path, "w") as file_obj:
+            file_obj.write("keep me")
+        with self.assertRaises(FileExistsError):
+            await start_server(file_path)
+        with open(file_path) as file_obj:
+            self.assertEqual(file_obj.read(), "keep me")
+
+    async def test_query(self):
+        self.assertEqual(await query(self.path, ["took 12ms", "ok", "3ms"], r"\d+ms"), [0, 2])
+        self.assertEqual(await query(self.path, ["foo", "42", "x"], patterns=["foo", r"\d"]), [0, 1])
+
+    async def test_concurrent_clients(self):
+        results = await asyncio.gather(*(query(self.path, ["a", str(each)], r"\d") for each in range(20)))
+        self.assertEqual(results, [[1]] * 20)
+
+    async def test_errors_keep_connection_open(self):
+        reader, writer = await asyncio.open_unix_connection(self.path)
+        writer.write(b"not json\n")
+        writer.write(b'{"id": 7, "pattern": "a", "lines": "abc"}\n')
+        writer.write(b'{"id": 8, "pattern": "b", "lines": ["abc", "x"], "mask": true}\n')
+        await writer.drain()
+        responses = [json.loads(await reader.readline()) for _ in range(3)]
+        writer.close()
+        self.assertIn("Invalid JSON", responses[0]["error"])
+        self.assertEqual(responses[1]["id"], 7)
+        self.assertIn("lines", responses[1]["error"])
+        self.assertEqual(responses[2], {"id": 8, "mask": 1})
+
+    async def test_big_request_does_not_block_others(self):
+        import threading
+        import time
+        from unittest import mock
+        finished = []
+        started = threading.Event()
+        handle = handle_request
+
+        def slow_handle_request(request, private=False):
+            if len(request["lines"]) > 2:
+                started.set()
+                time.sleep(0.5)
+            return handle(request, private)
+
+        async def timed_query(name, lines, pattern):
+            result = await query(self.path, lines, pattern)
+            finished.append(name)
+            return result
+
+        big = ["x" * 100] * (OFFLOAD_SIZE // 100) + ["took 12ms"]
+        with mock.patch("server.handle_request", slow_handle_request):
+            big_task = asyncio.create_task(timed_query("big", big, r"\d+ms"))
+            await asyncio.get_running_loop().run_in_executor(None, started.wait, 5)
+            self.assertEqual(await timed_query("small", ["a1", "b"], r"\d"), [0])
+            self.assertEqual(await big_task, [len(big) - 1])
+        self.assertEqual(finished, ["small", "big"])
+
+    async def test_bad_pattern(self):
+        with self.assertRaises(ValueError):
+            await query(self.path, ["x"], "a\\")
+
+
+if __name__ == "__main__":
+    unittest.main(verbosity=2)
@@ -0,0 +1,127 @@
+""" Reproducible synthetic corpora for the throughput benchmarks.
+
+Every generator takes a seed and a target size, and returns the same bytes
+for the same arguments on any machine and Python version (only
+`random.Random` with an integer seed is used).
+"""
+import unittest
+import json
+import os
+import random
+from typing import Callable
+
+DEFAULT_SEED = 1234
+
+LEVELS = ("DEBUG", "INFO", "INFO", "INFO", "WARN", "ERROR")
+COMPONENTS = ("db", "http", "cache", "auth", "queue", "scheduler")
+WORDS = ("request", "served", "timeout", "retry", "user", "colour", "color", "connection", "closed", "payload")
+# Latin with accents, Greek, Cyrillic, CJK and a few astral-plane symbols
+UNICODE_ALPHABETS = (
+    "abcdefghijklmnopqrstuvwxyzéèàüöçñ",
+    "αβγδεζηθικλμνξοπρστυφχψω",
+    "абвгдежзийклмнопрстуфхцчшщэюя",
+    "日本語中文字漢字検索正規表現",
+    "😀🚀🌍🎉🔥",
+)
+
+
+def _log_line(rng: random.Random) -> str:
+    return (
+        f"2024-{rng.randint(1, 12):02d}-{rng.randint(1, 28):02d}T"
+        f"{rng.randint(0, 23):02d}:{rng.randint(0, 59):02d}:{rng.randint(0, 59):02d} "
+        f"{rng.choice(LEVELS)} {rng.choice(COMPONENTS)}: "
+        f"{' '.join(rng.choice(WORDS) for _ in range(rng.randint(2, 6)))} "
+        f"id={rng.randint(1, 99999)} took {rng.randint(1, 5000)}ms"
+    )
+
+
+def _json_line(rng: random.Random) -> str:
+    record = {
+        "id": rng.randint(1, 10**9),
+        "user": {"name": "".join(rng.choice("abcdefghij") for _ in range(8)), "email": f"u{rng.randint(1, 9999)}@example.com"},
+        "tags": [rng.choice(WORDS) for _ in range(rng.randint(5, 30))],
+        "events": [
+            {"ts": rng.randint(1_600_000_000, 1_700_000_000), "kind": rng.choice(WORDS), "value": rng.random()}
+            for _ in range(rng.randint(10, 40))
+        ],
+    }
+    return json.dumps(record, separators=(",", ":"))
+
+
+def _unicode_line(rng: random.Random) -> str:
+    words = []
+    for _ in range(rng.randint(4, 16)):
+        alphabet = rng.choice(UNICODE_ALPHABETS)
+        words.append("".join(rng.choice(alphabet) for _ in range(rng.randint(1, 10))))
+    if rng.random() < 0.2:
+        words.append(str(rng.randint(0, 999)))
+    return " ".join(words)
+
+
+def _adversarial_line(rng: random.Random) -> str:
+    # Long runs that almost match nested-quantifier patterns like (a*)*b
+    kind = rng.randrange(3)
+    if kind == 0:
+        return "a" * rng.randint(50, 400)
+    if kind == 1:
+        return "ab" * rng.randint(25, 200) + "a"
+    return "".join(rng.choice("a" * 15 + "c") for _ in range(rng.randint(50, 400)))
+
+
+GENERATORS: dict[str, Callable[[random.Random], str]] = {
+    "log": _log_line,
+    "json": _json_line,
+    "unicode": _unicode_line,
+    "adversarial": _adversarial_line,
+}
+
+
+def generate(name: str, size: int, seed: int = DEFAULT_SEED) -> bytes:
+    """ At least `size` bytes of newline-terminated `name` lines.
+    """
+    rng = random.Random(f"{name}:{seed}")
+    make_line = GENERATORS[name]
+    lines = []
+    n_bytes = 0
+    while n_bytes < size:
+        line = make_line(rng).encode("utf-8") + b"\n"
+        lines.append(line)
+        n_bytes += len(line)
+    return b"".join(lines)
+
+
+def write_corpora(directory: str, size: int, seed: int = DEFAULT_SEED) -> dict[str, str]:
+    """ Generate every corpus into `directory`; returns name -> path.
+    Existing files are reused when their name records the same size and seed.
+    """
+    os.makedirs(directory, exist_ok=True)
+    paths = {}
+    for name in GENERATORS:
+        path = os.path.join(directory, f"{name}-{size}-{seed}.txt")
+        if not os.path.exists(path):
+            with open(path + ".tmp", "wb") as file_obj:
+                file_obj.write(generate(name, size, seed))
+            os.replace(path + ".tmp", path)
+        paths[name] = path
+    return paths
+
+
+class TestCorpora(unittest.TestCase):
+    def test_reproducible(self):
+        for name in GENERATORS:
+            self.assertEqual(generate(name, 4096, seed=7), generate(name, 4096, seed=7), msg=name)
+            self.assertNotEqual(generate(name, 4096, seed=7), generate(name, 4096, seed=8), msg=name)
+
+    def test_size_and_lines(self):
+        data = generate("log", 10_000)
+        self.assertGreaterEqual(len(data), 10_000)
+        self.assertTrue(data.endswith(b"\n"))
+        self.assertTrue(all(b" took " in line for line in data.splitlines()))
+
+    def test_unicode_is_multibyte(self):
+        data = generate("unicode", 4096)
+        self.assertGreater(len(data), len(data.decode("utf-8")))
+
+
+if __name__ == "__main__":
+    unittest.main(verbosity=2)
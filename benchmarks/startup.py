@@ -0,0 +1,152 @@
+""" Startup-time check for the grep CLI.
+
+Runs `python -X importtime app/main.py -E <pattern>` on empty stdin and
+reports how long the CLI's own imports take, on top of what the interpreter
+loads before `main.py` starts. Fails when that exceeds the budget or when
+a module that only some runs need (pyparsing, process pools, the
+directory walker, unittest) is imported anyway.
+
+The budget defaults to a multiple of the interpreter's own startup imports
+on the same machine, so it holds on slow and fast machines alike;
+`--budget-ms` sets a fixed one instead.
+
+    python benchmarks/startup.py [--runs 20] [--budget-ratio 10 | --budget-ms 50] [--pattern 'a\\d']
+"""
+import unittest
+import argparse
+import os
+import statistics
+import subprocess
+import sys
+from typing import Container, Iterable
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+MAIN = os.path.join(REPO_ROOT, "app", "main.py")
+
+DEFAULT_RUNS = 20
+# The CLI may import for this many times as long as `python -c pass` does;
+# about 30 ms against 4.5 ms on a machine where the interpreter starts quickly
+DEFAULT_BUDGET_RATIO = 10.0
+# Must not be imported by a plain `grep -E pattern` over stdin
+LAZY_MODULES = (
+    "pyparsing",
+    "multiprocessing",
+    "concurrent.futures.process",
+    "inp_reader.parallel",
+    "inp_reader.walker",
+    "inp_parser.profile",
+    "unittest",
+)
+
+
+def parse_importtime(stderr: str) -> list[tuple[str, int, int]]:
+    """ (module, self us, cumulative us) for every top-level import in
+    `-X importtime` output; nested imports are folded into their parent.
+    """
+    imports = []
+    for each_line in stderr.splitlines():
+        if not each_line.startswith("import time:") or "[us]" in each_line:
+            continue
+        self_us, cumulative_us, name = each_line[len("import time:"):].split("|")
+        # Nesting is shown by indentation after the last '|'
+        if name.startswith("  "):
+            continue
+        imports.append((name.strip(), int(self_us), int(cumulative_us)))
+    return imports
+
+
+def all_imported(stderr: str) -> set[str]:
+    return {
+        each_line.rsplit("|", 1)[1].strip()
+        for each_line in stderr.splitlines()
+        if each_line.startswith("import time:") and "[us]" not in each_line
+    }
+
+
+def _importtime(argv: Iterable[str]) -> str:
+    completed = subprocess.run(
+        [sys.executable, "-X", "importtime", *argv],
+        stdin=subprocess.DEVNULL,
+        stdout=subprocess.DEVNULL,
+        stderr=subprocess.PIPE,
+        text=True,
+        cwd=os.path.dirname(MAIN),
+    )
+    return completed.stderr
+
+
+def _import_ms(stderr: str, skip: Container[str] = ()) -> float:
+    return sum(cumulative_us for name, _, cumulative_us in parse_importtime(stderr) if name not in skip) / 1000
+
+
+def measure(pattern: str, runs: int) -> tuple[float, float, list[tuple[str, int]], set[str]]:
+    """ Median CLI import time in ms, median interpreter startup import time
+    in ms, the slowest top-level CLI imports of the last run, and every module
+    that run imported. The two are sampled in turns so load on the machine
+    affects both alike.
+    """
+    interpreter_samples, samples = [], []
+    for _ in range(runs):
+        interpreter_stderr = _importtime(["-c", "pass"])
+        interpreter_samples.append(_import_ms(interpreter_stderr))
+        interpreter_modules = {name for name, _, _ in parse_importtime(interpreter_stderr)}
+        stderr = _importtime([MAIN, "-E", pattern])
+        samples.append(_import_ms(stderr, interpreter_modules))
+    cli_imports = [
+        (name, cumulative_us)
+        for name, _, cumulative_us in parse_importtime(stderr)
+        if name not in interpreter_modules
+    ]
+    slowest = sorted(cli_imports, key=lambda each: each[1], reverse=True)[:10]
+    return statistics.median(samples), statistics.median(interpreter_samples), slowest, all_imported(stderr)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--runs", type=int, default=DEFAULT_RUNS)
+    parser.add_argument("--budget-ms", type=float, default=None)
+    parser.add_argument("--budget-ratio", type=float, default=DEFAULT_BUDGET_RATIO)
+    parser.add_argument("--pattern", default="a")
+    options = parser.parse_args()
+
+    median_ms, interpreter_ms, slowest, imported = measure(options.pattern, options.runs)
+    if options.budget_ms is None:
+        budget_ms = options.budget_ratio * interpreter_ms
+        budget = f"{budget_ms:.1f} ms, {options.budget_ratio:g}x the interpreter's {interpreter_ms:.1f} ms"
+    else:
+        budget_ms = options.budget_ms
+        budget = f"{budget_ms:.1f} ms"
+    print(f"CLI imports: {median_ms:.1f} ms median over {options.runs} runs (budget {budget})")
+    for name, cumulative_us in slowest:
+        print(f"  {cumulative_us / 1000:7.2f} ms  {name}")
+
+    failed = False
+    eager = sorted(name for name in imported if name in LAZY_MODULES)
+    if eager:
+        print(f"FAIL: imported on the plain search path: {', '.join(eager)}")
+        failed = True
+    if median_ms > budget_ms:
+        print("FAIL: over budget")
+        failed = True
+    sys.exit(1 if failed else 0)
+
+
+class TestParseImporttime(unittest.TestCase):
+    SAMPLE = "\n".join([
+        "import time: self [us] | cumulative | imported package",
+        "import time:       100 |        100 |   _io",
+        "import time:       200 |        300 | io",
+        "import time:        50 |         50 |     re._parser",
+        "import time:        70 |        120 |   re",
+        "import time:       400 |        520 | inp_parser.parse",
+    ])
+
+    def test_top_level_only(self):
+        self.assertEqual(parse_importtime(self.SAMPLE), [("io", 200, 300), ("inp_parser.parse", 400, 520)])
+
+    def test_all_imported(self):
+        self.assertEqual(all_imported(self.SAMPLE), {"_io", "io", "re._parser", "re", "inp_parser.parse"})
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,307 @@
+""" Throughput of the grep engine next to Python's `re`, over the corpora in
+`benchmarks.corpora`.
+
+Each (corpus, pattern, engine) case runs in a fresh spawned process so its
+peak RSS is its own. Results are written as JSON and can be compared
+against an earlier run:
+
+    python -m benchmarks.throughput --save results.json
+    python -m benchmarks.throughput --compare results.json
+"""
+import unittest
+import argparse
+import json
+import os
+import platform
+import re
+import resource
+import sys
+import tempfile
+import time
+from dataclasses import asdict, dataclass
+from multiprocessing import get_context
+from typing import Callable, Optional
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+APP_DIR = os.path.join(REPO_ROOT, "app")
+if APP_DIR not in sys.path:
+    sys.path.insert(0, APP_DIR)
+
+from benchmarks.corpora import DEFAULT_SEED, GENERATORS, write_corpora  # noqa: E402
+from inp_parser.parse import compile  # noqa: E402
+from inp_reader.literal import buffer_searcher  # noqa: E402
+from inp_reader.stream import scan_buffer  # noqa: E402
+
+DEFAULT_SIZE = 1 << 20
+DEFAULT_REPEAT = 3
+DEFAULT_TOLERANCE = 0.10
+# Backtracking engines can take exponential time on the adversarial corpus
+DEFAULT_TIMEOUT = 60.0
+ENGINES = ("grep", "definitions", "re")
+
+
+@dataclass(frozen=True)
+class Case:
+    construct: str
+    pattern: str
+    # Standalone `regex_definitions` matcher with the same semantics, if any
+    definition: Optional[str] = None
+
+
+CASES = (
+    Case("literal", "ERROR"),
+    Case("literal", "connection closed"),
+    Case("digit", r"\d\d\d"),
+    Case("word", r"\w", "alpha_numeric"),
+    Case("word", r"\w+@\w+"),
+    Case("char_group", "[xyz]", "positive_char_group"),
+    Case("char_group", "[0-9]+ms"),
+    Case("neg_char_group", "[^a-z ]", "negative_char_group"),
+    Case("anchor", "^2024"),
+    Case("anchor", "ms$"),
+    Case("quantifier", "colou?r"),
+    Case("quantifier", r"id=\d+ took"),
+    Case("quantifier", "(a*)*b"),
+    Case("quantifier", "(a|aa)*c"),
+    Case("backreference", r"(\w+) \1"),
+    Case("backreference", r"id=(\d+) .*id=\1"),
+    # A backtracking search from every start, sharing states across them
+    Case("backreference", r".*(\d)\1ms"),
+)
+
+
+@dataclass
+class Result:
+    corpus: str
+    construct: str
+    pattern: str
+    engine: str
+    # All None when the case hit the timeout
+    seconds: Optional[float]
+    mb_per_s: Optional[float]
+    lines_per_s: Optional[float]
+    matched: Optional[int]
+    peak_rss_kb: Optional[int]
+    agrees_with_re: Optional[bool] = None
+    timed_out: bool = False
+
+    @property
+    def key(self) -> tuple[str, str, str]:
+        return self.corpus, self.pattern, self.engine
+
+
+def _definition_matcher(name: str, pattern: str) -> Callable[[str], bool]:
+    if name == "alpha_numeric":
+        from regex_definitions.alpha_numeric import match_alphanum
+        return match_alphanum
+    if name == "positive_char_group":
+        from regex_definitions.positive_char_group import match_char_group
+        return lambda line: match_char_group(line, pattern)
+    if name == "negative_char_group":
+        from regex_definitions.negative_char_group import match_neg_char_group
+        return lambda line: match_neg_char_group(line, pattern)
+    raise ValueError(f"Unknown definition matcher: {name}")
+
+
+def _count_matches(engine: str, case: Case, data: bytes) -> int:
+    if engine == "grep":
+        compiled = compile(case.pattern)
+        # As parse_stream does, so plain strings and single classes take the whole-buffer engines
+        return scan_buffer(
+            data, 0, len(data), compiled.is_match_bytes, lambda line, line_number: None,
+            required=compiled.required_bytes, searcher=buffer_searcher(compiled),
+        )[0]
+    lines = data.decode("utf-8", "surrogateescape").splitlines()
+    if engine == "re":
+        search = re.compile(case.pattern).search
+        return sum(1 for each_line in lines if search(each_line))
+    matcher = _definition_matcher(case.definition, case.pattern)
+    return sum(1 for each_line in lines if matcher(each_line))
+
+
+def run_case(corpus: str, path: str, case: Case, engine: str, repeat: int) -> Result:
+    """ Best of `repeat` timed runs; meant to run in a fresh process.
+    """
+    with open(path, "rb") as file_obj:
+        data = file_obj.read()
+    n_lines = data.count(b"\n")
+    if engine == "definitions":
+        _definition_matcher(case.definition, case.pattern)
+    best = float("inf")
+    matched = 0
+    for _ in range(repeat):
+        started = time.perf_counter()
+        matched = _count_matches(engine, case, data)
+        best = min(best, time.perf_counter() - started)
+    return Result(
+        corpus=corpus,
+        construct=case.construct,
+        pattern=case.pattern,
+        engine=engine,
+        seconds=round(best, 6),
+        mb_per_s=round(len(data) / best / 1e6, 3),
+        lines_per_s=round(n_lines / best),
+        matched=matched,
+        # kilobytes on Linux
+        peak_rss_kb=resource.getrusage(resource.RUSAGE_SELF).ru_maxrss,
+    )
+
+
+def _run_case_in_child(conn, *args) -> None:
+    conn.send(run_case(*args))
+    conn.close()
+
+
+def run_isolated(corpus: str, path: str, case: Case, engine: str, repeat: int, timeout: float) -> Result:
+    """ `run_case` in a fresh spawned process, so the peak RSS is the case's
+    own, killed after `timeout` seconds.
+    """
+    context = get_context("spawn")
+    receiver, sender = context.Pipe(duplex=False)
+    process = context.Process(target=_run_case_in_child, args=(sender, corpus, path, case, engine, repeat))
+    process.start()
+    sender.close()
+    try:
+        if receiver.poll(timeout):
+            return receiver.recv()
+        return Result(corpus, case.construct, case.pattern, engine, None, None, None, None, None, timed_out=True)
+    finally:
+        process.kill()
+        process.join()
+        receiver.close()
+
+
+def run_all(corpus_paths: dict[str, str], cases, engines, repeat: int, timeout: float = DEFAULT_TIMEOUT) -> list[Result]:
+    jobs = [
+        (corpus, path, case, engine)
+        for corpus, path in corpus_paths.items()
+        for case in cases
+        for engine in engines
+        if engine != "definitions" or case.definition
+    ]
+    results = []
+    for corpus, path, case, engine in jobs:
+        result = run_isolated(corpus, path, case, engine, repeat, timeout)
+        if result.timed_out:
+            summary = f"timed out after {timeout:.0f}s"
+        else:
+            summary = f"{result.mb_per_s:9.2f} MB/s {result.lines_per_s:>10} lines/s {result.peak_rss_kb:>8} KB"
+        print(f"{corpus:<12} {case.pattern:<20} {engine:<12} {summary}", file=sys.stderr)
+        results.append(result)
+
+    expected = {
+        (each.corpus, each.pattern): each.matched
+        for each in results
+        if each.engine == "re" and not each.timed_out
+    }
+    for each in results:
+        if each.engine != "re" and not each.timed_out and (each.corpus, each.pattern) in expected:
+            each.agrees_with_re = each.matched == expected[(each.corpus, each.pattern)]
+    return results
+
+
+def compare(results: list[Result], baseline: dict, tolerance: float) -> list[str]:
+    """ One line per case slower than `baseline` by more than `tolerance`.
+    """
+    previous = {
+        (each["corpus"], each["pattern"], each["engine"]): each["mb_per_s"]
+        for each in baseline["results"]
+    }
+    regressions = []
+    for each in results:
+        before = previous.get(each.key)
+        if before and (each.timed_out or each.mb_per_s < before * (1 - tolerance)):
+            regressions.append(
+                f"{each.corpus} {each.pattern!r} {each.engine}: {before:.2f} -> "
+                + ("timed out" if each.timed_out else f"{each.mb_per_s:.2f} MB/s")
+            )
+    return regressions
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--size", type=int, default=DEFAULT_SIZE, help="Bytes per corpus")
+    parser.add_argument("--seed", type=int, default=DEFAULT_SEED)
+    parser.add_argument("--repeat", type=int, default=DEFAULT_REPEAT)
+    parser.add_argument("--corpus", action="append", choices=sorted(GENERATORS), help="Only these corpora")
+    parser.add_argument("--engine", action="append", choices=ENGINES, help="Only these engines")
+    parser.add_argument("--pattern", action="append", help="Only these patterns")
+    parser.add_argument("--corpus-dir", default=os.path.join(tempfile.gettempdir(), "grep-bench-corpora"))
+    parser.add_argument("--save", metavar="JSON", help="Write results to JSON")
+    parser.add_argument("--compare", metavar="JSON", help="Fail on regressions against an earlier --save")
+    parser.add_argument("--tolerance", type=float, default=DEFAULT_TOLERANCE)
+    parser.add_argument("--timeout", type=float, default=DEFAULT_TIMEOUT, help="Seconds per case")
+    options = parser.parse_args()
+
+    corpus_paths = write_corpora(options.corpus_dir, options.size, options.seed)
+    if options.corpus:
+        corpus_paths = {name: corpus_paths[name] for name in options.corpus}
+    cases = [each for each in CASES if not options.pattern or each.pattern in options.pattern]
+    engines = options.engine or ENGINES
+    if "re" not in engines:
+        engines = [*engines, "re"]
+
+    results = run_all(corpus_paths, cases, engines, options.repeat, options.timeout)
+    for each in results:
+        if each.agrees_with_re is False:
+            print(f"MISMATCH: {each.corpus} {each.pattern!r} {each.engine} matched {each.matched} lines", file=sys.stderr)
+
+    document = {
+        "meta": {
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "size": options.size,
+            "seed": options.seed,
+            "repeat": options.repeat,
+            "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S%z"),
+        },
+        "results": [asdict(each) for each in results],
+    }
+    if options.save:
+        with open(options.save, "w", encoding="utf-8") as file_obj:
+            json.dump(document, file_obj, indent=2)
+    else:
+        json.dump(document, sys.stdout, indent=2)
+
+    if options.compare:
+        with open(options.compare, encoding="utf-8") as file_obj:
+            regressions = compare(results, json.load(file_obj), options.tolerance)
+        for each_line in regressions:
+            print(f"REGRESSION: {each_line}", file=sys.stderr)
+        sys.exit(1 if regressions else 0)
+
+
+class TestThroughput(unittest.TestCase):
+    def test_engines_agree_on_log_corpus(self):
+        from benchmarks.corpora import generate
+        data = generate("log", 20_000)
+        for case in CASES:
+            expected = _count_matches("re", case, data)
+            self.assertEqual(_count_matches("grep", case, data), expected, msg=case.pattern)
+            if case.definition:
+                self.assertEqual(_count_matches("definitions", case, data), expected, msg=case.pattern)
+
+    def test_grep_engine_uses_buffer_searcher(self):
+        from unittest import mock
+        from inp_reader.literal import LiteralSearcher
+        data = b"ok\nERROR one\nfine\nERROR two\n"
+        with mock.patch.object(LiteralSearcher, "scan", autospec=True, side_effect=LiteralSearcher.scan) as scan:
+            self.assertEqual(_count_matches("grep", Case("literal", "ERROR"), data), 2)
+        scan.assert_called_once()
+
+    def test_compare_flags_slowdowns(self):
+        result = Result("log", "literal", "ERROR", "grep", 1.0, 50.0, 1000, 3, 1000)
+        baseline = {"results": [{"corpus": "log", "pattern": "ERROR", "engine": "grep", "mb_per_s": 100.0}]}
+        self.assertEqual(len(compare([result], baseline, 0.1)), 1)
+        self.assertEqual(compare([result], baseline, 0.6), [])
+
+    def test_isolated_run_times_out(self):
+        from benchmarks.corpora import write_corpora
+        with tempfile.TemporaryDirectory() as tmp:
+            path = write_corpora(tmp, 200_000)["adversarial"]
+            result = run_isolated("adversarial", path, Case("quantifier", "(a*)*b"), "re", 1, timeout=2.0)
+        self.assertTrue(result.timed_out)
+
+
+if __name__ == "__main__":
+    main()